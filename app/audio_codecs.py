@@ -0,0 +1,224 @@
+"""Compressed encodings for /api/audio-stream.
+
+TTS audio is 24 kHz speech. Sending it as 48 kHz int16 PCM costs 768 kbit/s
+per listener, half of which is the upsampling. Listeners pick a format:
+
+    pcm48   48 kHz int16 PCM (default, what the web player used to get)
+    pcm24   24 kHz int16 PCM, the vocoder output without upsampling (384 kbit/s)
+    adpcm   IMA ADPCM blocks, 24 kHz, 4 bits per sample (~97 kbit/s)
+    opus    Opus packets, 24 kHz (AUDIO_OPUS_BITRATE, needs opuslib + libopus)
+
+The encoders are streaming: they keep state across the chunks of one
+utterance, emit only complete blocks/packets, and flush() the rest (padded
+with silence) when the utterance ends. Every block/packet decodes on its own,
+so a listener can start at any chunk.
+
+ADPCM output is a sequence of standard IMA ADPCM blocks, as in WAV files
+(format 0x11, mono, block align ADPCM_BLOCK_BYTES): a 4-byte header (int16 LE
+first sample, uint8 step index, uint8 0) and then 4-bit codes, low nibble
+first. Opus output is a sequence of packets, each prefixed with its length as
+uint16 LE.
+"""
+
+import struct
+from typing import Union
+
+import numpy as np
+
+from app.config import AUDIO_OPUS_BITRATE
+
+try:
+    import opuslib
+except Exception:  # ImportError, or libopus missing at import time
+    opuslib = None
+
+SOURCE_RATE = 24000  # TTS vocoder output
+
+# Stream parameters per format (also sent as X-Audio-* response headers)
+AUDIO_FORMATS = {
+    "pcm48": {"rate": 48000, "format": "s16le"},
+    "pcm24": {"rate": SOURCE_RATE, "format": "s16le"},
+    "adpcm": {"rate": SOURCE_RATE, "format": "ima_adpcm"},
+    "opus": {"rate": SOURCE_RATE, "format": "opus"},
+}
+
+ADPCM_BLOCK_BYTES = 512
+ADPCM_BLOCK_SAMPLES = 1 + (ADPCM_BLOCK_BYTES - 4) * 2  # 1017
+
+OPUS_FRAME_SAMPLES = SOURCE_RATE // 50  # 20 ms
+
+_STEP_TABLE = (
+    7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37, 41, 45,
+    50, 55, 60, 66, 73, 80, 88, 97, 107, 118, 130, 143, 157, 173, 190, 209, 230,
+    253, 279, 307, 337, 371, 408, 449, 494, 544, 598, 658, 724, 796, 876, 963,
+    1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066, 2272, 2499, 2749, 3024, 3327,
+    3660, 4026, 4428, 4871, 5358, 5894, 6484, 7132, 7845, 8630, 9493, 10442,
+    11487, 12635, 13899, 15289, 16818, 18500, 20350, 22385, 24623, 27086, 29794,
+    32767,
+)
+_INDEX_TABLE = (-1, -1, -1, -1, 2, 4, 6, 8)
+
+
+def available_formats() -> list[str]:
+    """Formats this server can produce (opus only with opuslib installed)."""
+    return [name for name in AUDIO_FORMATS if name != "opus" or opuslib is not None]
+
+
+def to_int16(audio: np.ndarray) -> np.ndarray:
+    """Float audio in [-1, 1] to int16 samples."""
+    return np.clip(audio * 32767, -32768, 32767).astype(np.int16)
+
+
+class AdpcmEncoder:
+    """Streaming IMA ADPCM encoder for 24 kHz int16 mono audio.
+
+    The step index carries over from block to block (and is stored in each
+    block header), so quality doesn't reset at block boundaries.
+    """
+
+    def __init__(self):
+        self._pending = np.empty(0, dtype=np.int16)
+        self._index = 0
+
+    def encode(self, samples: np.ndarray) -> bytes:
+        """Add int16 samples; returns the blocks completed by them."""
+        self._pending = np.concatenate([self._pending, samples])
+        n_blocks = len(self._pending) // ADPCM_BLOCK_SAMPLES
+        out = b"".join(
+            self._block(self._pending[i * ADPCM_BLOCK_SAMPLES:(i + 1) * ADPCM_BLOCK_SAMPLES])
+            for i in range(n_blocks)
+        )
+        self._pending = self._pending[n_blocks * ADPCM_BLOCK_SAMPLES:]
+        return out
+
+    def flush(self) -> bytes:
+        """Encode the remaining samples as one last block, padded with silence."""
+        if len(self._pending) == 0:
+            return b""
+        block = np.zeros(ADPCM_BLOCK_SAMPLES, dtype=np.int16)
+        block[:len(self._pending)] = self._pending
+        self._pending = np.empty(0, dtype=np.int16)
+        return self._block(block)
+
+    def _block(self, samples: np.ndarray) -> bytes:
+        values = samples.tolist()
+        predictor = values[0]
+        index = self._index
+        header = struct.pack("<hBB", predictor, index, 0)
+        codes = bytearray(ADPCM_BLOCK_BYTES - 4)
+        step_table, index_table = _STEP_TABLE, _INDEX_TABLE
+        for i, sample in enumerate(values[1:]):
+            step = step_table[index]
+            diff = sample - predictor
+            code = 0
+            if diff < 0:
+                code = 8
+                diff = -diff
+            # Same delta the decoder reconstructs from the code bits
+            delta = step >> 3
+            if diff >= step:
+                code |= 4
+                diff -= step
+                delta += step
+            step >>= 1
+            if diff >= step:
+                code |= 2
+                diff -= step
+                delta += step
+            step >>= 1
+            if diff >= step:
+                code |= 1
+                delta += step
+            predictor = predictor - delta if code & 8 else predictor + delta
+            predictor = -32768 if predictor < -32768 else 32767 if predictor > 32767 else predictor
+            index += index_table[code & 7]
+            index = 0 if index < 0 else 88 if index > 88 else index
+            codes[i >> 1] |= code << 4 if i & 1 else code
+        self._index = index
+        return header + bytes(codes)
+
+
+class OpusEncoder:
+    """Streaming Opus encoder (20 ms packets, length-prefixed)."""
+
+    def __init__(self, bitrate: int = AUDIO_OPUS_BITRATE):
+        if opuslib is None:
+            raise RuntimeError("opus encoding needs opuslib and libopus")
+        self._encoder = opuslib.Encoder(SOURCE_RATE, 1, opuslib.APPLICATION_VOIP)
+        self._encoder.bitrate = bitrate
+        self._pending = np.empty(0, dtype=np.int16)
+
+    def encode(self, samples: np.ndarray) -> bytes:
+        """Add int16 samples; returns the packets completed by them."""
+        self._pending = np.concatenate([self._pending, samples])
+        n_frames = len(self._pending) // OPUS_FRAME_SAMPLES
+        out = b"".join(
+            self._packet(self._pending[i * OPUS_FRAME_SAMPLES:(i + 1) * OPUS_FRAME_SAMPLES])
+            for i in range(n_frames)
+        )
+        self._pending = self._pending[n_frames * OPUS_FRAME_SAMPLES:]
+        return out
+
+    def flush(self) -> bytes:
+        """Encode the remaining samples as one last packet, padded with silence."""
+        if len(self._pending) == 0:
+            return b""
+        frame = np.zeros(OPUS_FRAME_SAMPLES, dtype=np.int16)
+        frame[:len(self._pending)] = self._pending
+        self._pending = np.empty(0, dtype=np.int16)
+        return self._packet(frame)
+
+    def _packet(self, frame: np.ndarray) -> bytes:
+        packet = self._encoder.encode(frame.tobytes(), OPUS_FRAME_SAMPLES)
+        return struct.pack("<H", len(packet)) + packet
+
+
+def audio_samples(encoding: str, data: bytes) -> int:
+    """Number of samples (at the format's rate) in a piece of encoded audio."""
+    if encoding == "adpcm":
+        return len(data) // ADPCM_BLOCK_BYTES * ADPCM_BLOCK_SAMPLES
+    if encoding == "opus":
+        packets = 0
+        pos = 0
+        while pos < len(data):
+            pos += 2 + struct.unpack_from("<H", data, pos)[0]
+            packets += 1
+        return packets * OPUS_FRAME_SAMPLES
+    return len(data) // 2  # int16 PCM
+
+
+def split_frames(encoding: str, data: bytes, max_seconds: float) -> list[tuple[bytes, float]]:
+    """Cut encoded audio into pieces of at most max_seconds (at least one
+    block/packet each), on block or packet boundaries.
+
+    Returns (piece, seconds of audio in it) pairs.
+    """
+    if encoding == "adpcm":
+        units = [data[i:i + ADPCM_BLOCK_BYTES] for i in range(0, len(data), ADPCM_BLOCK_BYTES)]
+        unit_seconds = ADPCM_BLOCK_SAMPLES / SOURCE_RATE
+    elif encoding == "opus":
+        units = []
+        pos = 0
+        while pos < len(data):
+            end = pos + 2 + struct.unpack_from("<H", data, pos)[0]
+            units.append(data[pos:end])
+            pos = end
+        unit_seconds = OPUS_FRAME_SAMPLES / SOURCE_RATE
+    else:
+        # PCM: cut anywhere on a sample boundary
+        rate = AUDIO_FORMATS[encoding]["rate"]
+        step = max(1, int(max_seconds * rate)) * 2  # int16
+        return [(data[i:i + step], len(data[i:i + step]) / 2 / rate)
+                for i in range(0, len(data), step)]
+    per_piece = max(1, int(max_seconds / unit_seconds))
+    return [(b"".join(units[i:i + per_piece]), len(units[i:i + per_piece]) * unit_seconds)
+            for i in range(0, len(units), per_piece)]
+
+
+def create_encoder(name: str) -> Union[AdpcmEncoder, OpusEncoder, None]:
+    """Streaming encoder for a compressed format; None for PCM formats."""
+    if name == "adpcm":
+        return AdpcmEncoder()
+    if name == "opus":
+        return OpusEncoder()
+    return None
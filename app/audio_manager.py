@@ -2,21 +2,134 @@
 
 Receives 24kHz float32 audio chunks from the model's TTS, resamples
 to 48kHz int16 PCM (WebRTC / playback standard), and publishes to
-subscribers via async queues (same pub/sub pattern as MonitorLoop).
+subscribers via a shared BroadcastRing (same pub/sub pattern as MonitorLoop).
+
+Post-processing runs on its own thread: the inference thread hands each
+generation result to feed() and goes straight back to generating tokens.
+The audio thread moves the tensor to the CPU, resamples, converts to int16
+and publishes, and also owns the "..." buffering (audio is held back until
+the response is known not to be a skip signal). With a PhraseCache, audio is
+also held while the response may still be a cached phrase, short complete
+responses are stored, and play_cached() replaces a response's audio.
+
+Listeners choose an encoding (see app/audio_codecs.py). Each chunk is
+encoded once, on the audio thread, into every encoding that currently has a
+listener, and all listeners of an encoding share the result.
 """
 
 import asyncio
+import concurrent.futures
 import logging
+import math
+import queue
+import secrets
+import threading
 import time
-from typing import Optional
+from typing import TYPE_CHECKING, NamedTuple, Optional
 
 import numpy as np
-import torch
-from scipy.signal import resample_poly
+
+from app.audio_codecs import AUDIO_FORMATS, audio_samples, create_encoder, to_int16
+from app.broadcast import BroadcastRing, RingSubscriber
+from app.config import (
+    AUDIO_ACK_POLICY,
+    AUDIO_ACK_QUORUM,
+    AUDIO_ACK_TIMEOUT,
+    AUDIO_CLOCK,
+    AUDIO_QUEUE_SIZE,
+    AUDIO_RING_SIZE,
+)
+from app.phrase_cache import PhraseCache
+from app.resampler import StreamingResampler
+
+if TYPE_CHECKING:
+    import torch  # audio arrives as tensors; only .cpu().numpy() is used
 
 logger = logging.getLogger(__name__)
 
 
+class _UtteranceEnd(NamedTuple):
+    """Queue item from end_utterance()."""
+
+    done: concurrent.futures.Future
+    suppress: bool
+
+
+class AudioChunk:
+    """One published chunk: 48 kHz PCM plus the other encodings listeners want.
+
+    `encoded` only holds the formats that had a listener when the chunk was
+    processed. The chunk published at the end of an utterance carries the
+    flushed tails: the resampler's last samples in `pcm`, and what the
+    compressed encoders held back in `encoded`.
+
+    Alignment: `offsets` gives, per encoding, the position of the chunk's
+    first sample within its utterance (in samples at that encoding's rate;
+    compressed encoders hold samples back, so this differs per encoding).
+    `frame_ts` is the capture time of the newest frame the utterance
+    comments on (the cycle's newest_frame_at), set when published.
+    """
+
+    __slots__ = ("pcm", "encoded", "offsets", "frame_ts")
+
+    def __init__(self, pcm: bytes, encoded: dict[str, bytes], offsets: dict[str, int]):
+        self.pcm = pcm  # 48kHz, mono, int16 LE
+        self.encoded = encoded
+        self.offsets = offsets
+        self.frame_ts = 0.0
+
+    def get(self, encoding: str) -> Optional[bytes]:
+        """This chunk in the given encoding, or None if it wasn't produced."""
+        return self.pcm if encoding == "pcm48" else self.encoded.get(encoding)
+
+
+class PlaybackReport:
+    """Audio sent to one player and how much of it the player has played,
+    plus its delivery counters (see app/audio_pacer.py)."""
+
+    __slots__ = ("encoding", "sent", "played", "acked_at", "sent_at_ack", "sent_after_ack_at",
+                 "underruns", "dropped")
+
+    def __init__(self, encoding: str = "pcm48"):
+        self.encoding = encoding
+        self.underruns = 0  # times the player ran out of audio mid-utterance
+        self.dropped = 0  # chunks skipped because the player fell too far behind
+        self.sent = 0.0  # seconds of audio written to the player
+        self.played = 0.0  # seconds the player last reported as played
+        self.acked_at = 0.0  # wall-clock time of that report (0 = never)
+        self.sent_at_ack = 0.0  # value of `sent` at that report
+        self.sent_after_ack_at = 0.0  # first write after the report
+
+    def record_sent(self, seconds: float) -> None:
+        if self.sent == self.sent_at_ack:
+            self.sent_after_ack_at = time.time()
+        self.sent += seconds
+
+    def record_ack(self, played: float) -> None:
+        self.played = played
+        self.acked_at = time.time()
+        self.sent_at_ack = self.sent
+
+    def playback_end(self) -> float:
+        """Wall-clock time the player will have played everything sent.
+
+        Audio written after the report plays after the player's backlog, or
+        from when it arrived if the player had run out by then.
+        """
+        end = self.acked_at + max(0.0, self.sent_at_ack - self.played)
+        if self.sent > self.sent_at_ack:
+            end = max(end, self.sent_after_ack_at) + self.sent - self.sent_at_ack
+        return end
+
+    def stats(self) -> dict:
+        return {
+            "encoding": self.encoding,
+            "sent_sec": round(self.sent, 1),
+            "underruns": self.underruns,
+            "dropped": self.dropped,
+        }
+
+
 class AudioManager:
     """Receives TTS audio, resamples, and delivers to consumers.
 
@@ -25,51 +138,215 @@ class AudioManager:
     the next inference cycle (prevents queue buildup / drift).
     """
 
-    # Output format after resample_to_48k_int16()
+    # Output format of AudioChunk.pcm
     SAMPLE_RATE = 48000
     BYTES_PER_SAMPLE = 2  # int16
 
-    def __init__(self):
-        self._subscribers: set[asyncio.Queue[Optional[bytes]]] = set()
+    # A response is a skip signal ("...") until its text is longer than this
+    SKIP_SIGNAL_LEN = 5
+
+    # Bound on tracked players (entries are removed on disconnect)
+    _MAX_PLAYERS = 1024
+
+    def __init__(self, phrase_cache: Optional[PhraseCache] = None):
+        self.phrase_cache = phrase_cache
+        self._ring = BroadcastRing(AUDIO_RING_SIZE)
+        self._cycle = 0  # MonitorLoop cycle of the current utterance
+        self._at_cycle_start = True  # next chunk starts an utterance
+        # Filter state carries across a cycle's chunks; reset per utterance
+        self._resampler = StreamingResampler(up=2)
         # Audio clock — tracks playback timing per cycle
         self._first_publish_time: Optional[float] = None
         self._audio_seconds: float = 0.0
+        # Post-processing stage (see start()). Queue items:
+        # (text, audio) from feed(), int16 PCM from play_cached(),
+        # _UtteranceEnd from end_utterance(), None = exit.
+        self._queue: queue.Queue = queue.Queue(maxsize=AUDIO_QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Set once the audio thread has exited: feed() drops its input and
+        # end_utterance() futures fail instead of waiting forever
+        self._stopped = threading.Event()
+        self._exiting = False  # stop() called: exit even if None can't be queued
+        self._queue_waits = 0  # feed() calls that found the queue full
+        self._max_queued = 0
+        # Listeners per encoding. All keys exist up front, so the audio
+        # thread can iterate while the event loop changes the counts.
+        self._listeners: dict[str, int] = dict.fromkeys(AUDIO_FORMATS, 0)
+        self._sub_encoding: dict[RingSubscriber, str] = {}
+        self._encoders: dict = {}  # encoding -> streaming encoder (audio thread)
+        # Utterance position (24 kHz samples) of the audio processed so far,
+        # and of the next sample each compressed encoder will emit
+        self._utterance_samples = 0
+        self._encoder_samples: dict[str, int] = {}
+        self._frame_ts = 0.0  # newest frame of the current cycle
+        # Playback positions reported by players (see ack())
+        self._players: dict[str, PlaybackReport] = {}
+
+    def start(self) -> None:
+        """Start the audio post-processing thread. Call from the event loop."""
+        if self._thread is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._thread = threading.Thread(target=self._worker, name="audio", daemon=True)
+        self._thread.start()
+
+    def feed(self, text: Optional[str], audio: Optional["torch.Tensor"]) -> None:
+        """Hand one generation result to the audio thread. Call from the
+        inference thread, in generation order.
+
+        Only blocks if the audio thread is AUDIO_QUEUE_SIZE results behind.
+        Dropped once the audio thread has stopped.
+        """
+        item = (text, audio)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._queue_waits += 1
+            logger.warning("Audio queue full, inference waiting on audio processing")
+            if not self._put_unless_stopped(item):
+                return
+        self._max_queued = max(self._max_queued, self._queue.qsize())
+
+    def play_cached(self, pcm: np.ndarray) -> None:
+        """Play the rest of the current response from cached PCM (int16,
+        24 kHz): audio not yet published is replaced, and the cached phrase
+        starts where the published audio got to. Call from the inference
+        thread after the response's last feed(), then stop generating."""
+        self._put_unless_stopped(pcm)
+
+    def end_utterance(self, suppress: bool = False) -> concurrent.futures.Future:
+        """Mark the end of the current response.
+
+        The returned future resolves once all of the response's audio has been
+        handed to the event loop for publishing (True if it was suppressed as
+        a "..." skip signal, or on request). Publishing cycle_end after waiting
+        on it keeps the audio ahead of its cycle_end, and the audio clock
+        complete.
+
+        Args:
+            suppress: Drop the response's audio that has not been published
+                yet (a repeat cut short). Audio already streaming can't be
+                recalled, so it simply stops.
+
+        The future fails with RuntimeError if the audio thread has stopped.
+        """
+        done: concurrent.futures.Future = concurrent.futures.Future()
+        if not self._put_unless_stopped(_UtteranceEnd(done, suppress)):
+            done.set_exception(RuntimeError("Audio thread stopped"))
+        return done
 
-    def subscribe(self) -> asyncio.Queue[Optional[bytes]]:
-        """Subscribe to audio events. Returns a queue that receives:
+    def subscribe(self, join_utterance: bool = False,
+                  encoding: str = "pcm48") -> RingSubscriber:
+        """Subscribe to audio events. Returns a cursor whose get() yields a
+        BroadcastEvent whose data is:
 
-        - bytes: PCM audio chunk (48kHz, mono, int16 LE)
+        - AudioChunk: use chunk.get(encoding) for the subscribed encoding
         - None: stop signal
+
+        With join_utterance, a listener joining while an utterance is still
+        playing starts at that utterance's first chunk instead of mid-word.
+        The first listener of a compressed encoding gets it from the next
+        processed chunk on; replayed chunks without it return None.
+        """
+        if encoding not in AUDIO_FORMATS:
+            raise ValueError(f"Unknown audio encoding: {encoding}")
+        if join_utterance and time.time() < self.estimated_playback_end:
+            sub = self._ring.subscribe(replay_boundaries=1)
+        else:
+            sub = self._ring.subscribe()
+        self._listeners[encoding] += 1
+        self._sub_encoding[sub] = encoding
+        logger.debug(f"Audio subscriber added ({encoding}, total: {self._ring.subscriber_count})")
+        return sub
+
+    def unsubscribe(self, sub: RingSubscriber) -> None:
+        """Remove a subscriber."""
+        self._ring.unsubscribe(sub)
+        encoding = self._sub_encoding.pop(sub, None)
+        if encoding is not None:
+            self._listeners[encoding] -= 1
+        logger.debug(f"Audio subscriber removed (total: {self._ring.subscriber_count})")
+
+    @staticmethod
+    def new_player_id() -> str:
+        return secrets.token_hex(8)
+
+    def add_player(self, encoding: str = "pcm48", player_id: Optional[str] = None) -> str:
+        """Register an /api/audio-stream or WebSocket player (delivery
+        counters, and the playback position it may report).
+
+        Returns the id it reports with (sent to it as X-Audio-Stream-Id):
+        player_id if given (from new_player_id()), else a new one.
         """
-        q: asyncio.Queue[Optional[bytes]] = asyncio.Queue(maxsize=200)
-        self._subscribers.add(q)
-        logger.debug(f"Audio subscriber added (total: {len(self._subscribers)})")
-        return q
+        if len(self._players) >= self._MAX_PLAYERS:
+            self._players.pop(next(iter(self._players)))  # oldest
+        player_id = player_id or self.new_player_id()
+        self._players[player_id] = PlaybackReport(encoding)
+        return player_id
+
+    def get_player(self, player_id: str) -> PlaybackReport:
+        """A player's report (a detached one if it was evicted)."""
+        return self._players.get(player_id) or PlaybackReport()
+
+    def remove_player(self, player_id: str) -> None:
+        self._players.pop(player_id, None)
 
-    def unsubscribe(self, q: asyncio.Queue) -> None:
-        """Remove a subscriber queue."""
-        self._subscribers.discard(q)
-        logger.debug(f"Audio subscriber removed (total: {len(self._subscribers)})")
+    def ack(self, player_id: str, played: float) -> bool:
+        """Store a player's report: seconds of audio played since it connected.
+
+        Returns False for an unknown (or disconnected) player.
+        """
+        report = self._players.get(player_id)
+        if report is None:
+            return False
+        report.record_ack(played)
+        return True
 
-    def publish(self, data: Optional[bytes]) -> None:
+    def stream_stats(self) -> dict:
+        """Broadcast counters: published, dropped, resyncs, subscriber lag,
+        plus the post-processing queue depth."""
+        stats = self._ring.stats()
+        stats["processing_queue"] = {
+            "queued": self._queue.qsize(),
+            "max_queued": self._max_queued,
+            "waits": self._queue_waits,
+        }
+        stats["playback_reports"] = len(self._reporting_players())
+        stats["players"] = [report.stats() for report in self._players.values()]
+        if self.phrase_cache is not None:
+            stats["phrase_cache"] = self.phrase_cache.stats()
+        return stats
+
+    def publish(self, data: Optional[AudioChunk]) -> None:
         """Send audio data to all subscribers. Also tracks audio clock.
 
-        NOTE: data is ALREADY resampled 48kHz int16 PCM (via
-        resample_to_48k_int16() in monitor_loop._inference_worker).
-        So len(data) / (SAMPLE_RATE * BYTES_PER_SAMPLE) = seconds of audio.
+        NOTE: data.pcm is ALREADY resampled 48kHz int16 PCM (by the
+        streaming resampler on the audio thread).
+        So len(data.pcm) / (SAMPLE_RATE * BYTES_PER_SAMPLE) = seconds of audio.
         """
         if data is not None:
+            data.frame_ts = self._frame_ts
+        if data is not None and data.pcm:
             if self._first_publish_time is None:
                 self._first_publish_time = time.time()
-            self._audio_seconds += len(data) / (self.SAMPLE_RATE * self.BYTES_PER_SAMPLE)
-        for q in self._subscribers:
-            try:
-                q.put_nowait(data)
-            except asyncio.QueueFull:
-                pass  # Drop data for slow consumers
+            self._audio_seconds += len(data.pcm) / (self.SAMPLE_RATE * self.BYTES_PER_SAMPLE)
+        # First chunk of each cycle is a boundary: lagging listeners resync
+        # to the start of an utterance, never into the middle of one.
+        self._ring.publish(data, cycle=self._cycle, boundary=self._at_cycle_start)
+        self._at_cycle_start = data is None
 
-    def reset_clock(self) -> None:
-        """Reset audio clock for a new cycle. Call at cycle start."""
+    def reset_clock(self, frame_ts: float, cycle: int) -> None:
+        """Reset audio clock for a new cycle. Call at cycle start.
+
+        frame_ts: capture time of the newest frame the cycle comments on;
+        carried by the cycle's audio chunks for audio/video alignment.
+        cycle: MonitorLoop's cycle number, so audio carries the same cycle
+        id as the cycle's text and cycle_end events.
+        """
+        self._cycle = cycle
+        self._frame_ts = frame_ts
+        self._at_cycle_start = True
         self._first_publish_time = None
         self._audio_seconds = 0.0
 
@@ -77,33 +354,186 @@ class AudioManager:
     def estimated_playback_end(self) -> float:
         """Wall-clock time when the browser is estimated to finish playing.
 
+        Uses the players' own reports when there are recent ones
+        (AUDIO_ACK_POLICY picks the most advanced player or a quorum),
+        else first publish time + seconds of audio published.
         Returns 0.0 if no audio was published this cycle (no waiting needed).
         """
         if self._first_publish_time is None:
             return 0.0
+        ends = sorted(r.playback_end() for r in self._reporting_players())
+        if ends:
+            if AUDIO_ACK_POLICY == "quorum":
+                return ends[max(0, math.ceil(AUDIO_ACK_QUORUM * len(ends)) - 1)]
+            return ends[0]
         return self._first_publish_time + self._audio_seconds
 
+    def _reporting_players(self) -> list[PlaybackReport]:
+        """Players with a report from the last AUDIO_ACK_TIMEOUT seconds."""
+        if AUDIO_CLOCK != "ack":
+            return []
+        cutoff = time.time() - AUDIO_ACK_TIMEOUT
+        return [r for r in self._players.values() if r.acked_at > cutoff]
+
     def stop(self) -> None:
-        """Send stop signal to all subscribers."""
+        """Send stop signal to all subscribers and end the audio thread.
+
+        Call after the last cycle has ended (see main.lifespan): audio still
+        queued is dropped and pending end_utterance() futures fail.
+        """
         self.publish(None)
+        self._exiting = True
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass  # daemon thread, exits with the process
 
-    @staticmethod
-    def resample_to_48k_int16(audio_24k: torch.Tensor) -> bytes:
-        """Convert a 24kHz float32 tensor to 48kHz int16 PCM bytes.
+    def _put_unless_stopped(self, item) -> bool:
+        """Queue an item for the audio thread, waiting while the queue is full.
+        False if the audio thread has stopped (the item is dropped)."""
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=0.5)
+            except queue.Full:
+                continue
+            if self._stopped.is_set():
+                self._drain()  # the thread exited around the put
+            return True
+        return False
 
-        Args:
-            audio_24k: Tensor of shape (1, N) or (N,), float32, 24kHz.
+    def _drain(self) -> None:
+        """Empty the queue once the audio thread has exited, failing the
+        futures of waiting end_utterance() calls."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if isinstance(item, _UtteranceEnd) and not item.done.done():
+                item.done.set_exception(RuntimeError("Audio thread stopped"))
+
+    def _worker(self) -> None:
+        """Audio thread: runs _process() until stop(), then unblocks producers."""
+        try:
+            self._process()
+        finally:
+            self._stopped.set()
+            self._drain()
+
+    def _process(self) -> None:
+        """Buffer, resample and publish one response at a time."""
+        pending: list[np.ndarray] = []  # held back while it may be "..."
+        text: list[str] = []
+        confirmed = False  # response is real commentary: stream audio directly
+        recorded: list[np.ndarray] = []  # the response's audio, for the phrase cache
+        from_cache = False
+        cache = self.phrase_cache
+        while True:
+            item = self._queue.get()
+            if item is None or self._exiting:
+                return
+            if isinstance(item, _UtteranceEnd):
+                # End of response: flush unless it was the skip signal
+                full_text = "".join(text)
+                suppressed = item.suppress or full_text.strip() == "..."
+                try:
+                    if suppressed:
+                        logger.debug(f"Response {full_text.strip()[:40]!r} — audio suppressed")
+                    else:
+                        for audio in pending:
+                            self._publish_threadsafe(audio)
+                        self._flush_tails()
+                        if cache is not None and recorded and not from_cache:
+                            cache.put(full_text, to_int16(np.concatenate(recorded)))
+                finally:
+                    pending.clear()
+                    text.clear()
+                    recorded.clear()
+                    confirmed = False
+                    from_cache = False
+                    self._resampler.reset()
+                    self._encoders.clear()
+                    self._encoder_samples.clear()
+                    self._utterance_samples = 0
+                    item.done.set_result(suppressed)
+                continue
 
-        Returns:
-            Raw PCM bytes: 48kHz, mono, int16 little-endian.
+            try:
+                if isinstance(item, np.ndarray):
+                    # Cache hit: the cached phrase replaces the held audio, or
+                    # goes on from where the already published audio got to
+                    pending.clear()
+                    from_cache = confirmed = True
+                    rest = item[self._utterance_samples:]
+                    if len(rest):
+                        self._publish_threadsafe(rest.astype(np.float32) / 32767)
+                    continue
+                chunk, audio = item
+                if chunk:
+                    text.append(chunk)
+                    # Once accumulated text exceeds the skip signal, flush the buffer
+                    so_far = "".join(text)
+                    if not confirmed and len(so_far.strip()) > self.SKIP_SIGNAL_LEN:
+                        confirmed = True
+                        for buffered in pending:
+                            self._publish_threadsafe(buffered)
+                        pending.clear()
+                if audio is not None:
+                    audio = self._to_numpy(audio)
+                    if cache is not None and not from_cache:
+                        recorded.append(audio)
+                    if confirmed:
+                        self._publish_threadsafe(audio)
+                    else:
+                        pending.append(audio)
+            except Exception:
+                logger.exception("Audio processing failed")
+
+    def _publish_threadsafe(self, audio_np: np.ndarray) -> None:
+        """Resample and encode one chunk (audio thread) and publish it.
+
+        Chunks of one utterance must come in order: the resampler and the
+        encoders carry their state from chunk to chunk, so the chunks join
+        without boundary artefacts.
         """
-        audio_np = audio_24k.cpu().numpy()
-        if audio_np.ndim > 1:
-            audio_np = audio_np.squeeze(0)
+        pcm = self._resampler.process(audio_np)
+        start = self._utterance_samples
+        encoded = {}
+        offsets = {"pcm48": start * 2, "pcm24": start}
+        pcm24 = None
+        for encoding, listeners in self._listeners.items():
+            if not listeners or encoding == "pcm48":
+                continue
+            if pcm24 is None:
+                pcm24 = to_int16(audio_np)
+            if encoding == "pcm24":
+                encoded[encoding] = pcm24.tobytes()
+                continue
+            encoder = self._encoders.get(encoding)
+            if encoder is None:
+                # First listener mid-utterance: the encoder starts here
+                encoder = self._encoders[encoding] = create_encoder(encoding)
+                self._encoder_samples[encoding] = start
+            encoded[encoding] = encoder.encode(pcm24)
+            offsets[encoding] = self._encoder_samples[encoding]
+            self._encoder_samples[encoding] += audio_samples(encoding, encoded[encoding])
+        self._utterance_samples += len(audio_np)
+        self._loop.call_soon_threadsafe(self.publish, AudioChunk(pcm, encoded, offsets))
 
-        # Resample 24kHz -> 48kHz (exact factor of 2)
-        audio_48k = resample_poly(audio_np, up=2, down=1).astype(np.float32)
+    def _flush_tails(self) -> None:
+        """Publish what the resampler and the compressed encoders still hold
+        (end of utterance, before they are reset)."""
+        pcm = self._resampler.flush() if self._utterance_samples else b""
+        tails = {name: encoder.flush() for name, encoder in self._encoders.items()}
+        tails = {name: data for name, data in tails.items() if data}
+        if pcm or tails:
+            offsets = {name: self._encoder_samples[name] for name in tails}
+            offsets["pcm48"] = self._utterance_samples * 2
+            self._loop.call_soon_threadsafe(self.publish, AudioChunk(pcm, tails, offsets))
 
-        # float32 [-1, 1] -> int16 [-32768, 32767]
-        audio_int16 = np.clip(audio_48k * 32767, -32768, 32767).astype(np.int16)
-        return audio_int16.tobytes()
+    @staticmethod
+    def _to_numpy(audio: "torch.Tensor") -> np.ndarray:
+        audio_np = audio.cpu().numpy()
+        if audio_np.ndim > 1:
+            audio_np = audio_np.squeeze(0)
+        return audio_np
@@ -0,0 +1,135 @@
+"""Real-time pacing of /api/audio-stream and WebSocket audio, one pacer per listener.
+
+The vocoder produces audio in bursts, faster than real time. Written straight
+through, every burst lands in the player's buffer at once, and the player has
+to absorb it. AudioPacer releases a listener's audio in pieces of at most
+AUDIO_PACE_FRAME_MS. It never lets the player get more than AUDIO_PACE_LEAD
+seconds ahead of real time. The rest waits in the shared broadcast ring,
+whose size bounds server memory; a listener that falls too far behind
+resyncs to the next utterance, counted as dropped.
+
+The pacer keeps a play clock: the wall-clock time at which the listener
+will have played everything released so far. When that clock falls behind
+"now" in the middle of an utterance, the listener ran out of audio (an
+underrun: the vocoder was slower than playback, or the network stalled).
+
+With framing on, every piece is sent with a header (FRAME_HEADER) carrying
+its sequence number and scheduled play time, plus alignment data: the cycle,
+the piece's sample offset within the utterance and the capture time of the
+frame the utterance refers to. A player can line audio up with the delayed
+video from that instead of relying on the global sync delay.
+"""
+
+import asyncio
+import struct
+import time
+from collections import deque
+from typing import Optional
+
+from app.audio_codecs import audio_samples, split_frames
+from app.audio_manager import PlaybackReport
+from app.broadcast import RingSubscriber
+from app.config import AUDIO_PACE_FRAME_MS, AUDIO_PACE_LEAD
+
+# Frame header, little-endian:
+#   uint16  header length in bytes (skip anything past the known fields)
+#   uint16  flags (0)
+#   uint32  sequence number (per stream, from 1; gaps never happen)
+#   uint32  payload length in bytes
+#   float64 scheduled play time of the first sample (server wall clock)
+#   uint32  cycle id
+#   uint32  offset of the first sample within the cycle's utterance, in
+#           samples at the stream's rate
+#   float64 capture time of the newest frame the utterance comments on
+#           (server wall clock, the cycle's newest_frame_at)
+FRAME_HEADER = struct.Struct("<HHIIdIId")
+
+
+class AudioFrame:
+    """One paced piece of audio."""
+
+    __slots__ = ("seq", "play_at", "seconds", "data", "cycle", "offset", "frame_ts")
+
+    def __init__(self, seq: int, play_at: float, seconds: float, data: bytes,
+                 cycle: int, offset: int, frame_ts: float):
+        self.seq = seq
+        self.play_at = play_at
+        self.seconds = seconds
+        self.data = data
+        self.cycle = cycle
+        self.offset = offset
+        self.frame_ts = frame_ts
+
+    def framed(self) -> bytes:
+        """Header + payload."""
+        return FRAME_HEADER.pack(
+            FRAME_HEADER.size, 0, self.seq, len(self.data), self.play_at,
+            self.cycle, self.offset, self.frame_ts,
+        ) + self.data
+
+
+class AudioPacer:
+    """Releases one listener's audio at real-time rate.
+
+    Args:
+        sub: The listener's subscription (AudioManager.subscribe).
+        encoding: The encoding it subscribed with.
+        report: Its PlaybackReport; sent seconds, underruns and drops are
+            recorded there (shown in /api/stats).
+        lead: Max seconds of audio the listener may hold ahead of real time.
+            0 = no pacing, chunks are released as they arrive.
+        frame_seconds: Max length of one released piece.
+    """
+
+    def __init__(self, sub: RingSubscriber, encoding: str, report: PlaybackReport,
+                 lead: float = AUDIO_PACE_LEAD, frame_seconds: float = AUDIO_PACE_FRAME_MS / 1000.0):
+        self._sub = sub
+        self._encoding = encoding
+        self._report = report
+        self._lead = lead
+        # Without pacing, chunks go out whole
+        self._frame_seconds = frame_seconds if lead > 0 else 3600.0
+        self._pieces: deque[tuple[bytes, float, int]] = deque()  # data, seconds, offset
+        self._cycle: Optional[int] = None  # cycle of the queued pieces
+        self._frame_ts = 0.0  # frame timestamp of the queued pieces
+        self._last_cycle: Optional[int] = None  # cycle of the last released piece
+        self._play_end = 0.0
+        self._seq = 0
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[AudioFrame]:
+        """Next piece, released when due. None on the stop signal.
+
+        Raises:
+            asyncio.TimeoutError: if no audio was published within timeout.
+        """
+        while not self._pieces:
+            event = await self._sub.get(timeout)
+            self._report.dropped = self._sub.dropped
+            if event.data is None:
+                return None
+            data = event.data.get(self._encoding)
+            if data:
+                self._cycle = event.cycle
+                self._frame_ts = event.data.frame_ts
+                offset = event.data.offsets.get(self._encoding, 0)
+                for piece, seconds in split_frames(self._encoding, data, self._frame_seconds):
+                    self._pieces.append((piece, seconds, offset))
+                    offset += audio_samples(self._encoding, piece)
+
+        data, seconds, offset = self._pieces.popleft()
+        now = time.time()
+        if self._play_end < now:
+            # Listener has played everything: it ran dry if mid-utterance
+            if self._cycle == self._last_cycle:
+                self._report.underruns += 1
+            self._play_end = now
+        elif self._lead > 0 and self._play_end - now > self._lead:
+            await asyncio.sleep(self._play_end - now - self._lead)
+
+        self._seq += 1
+        frame = AudioFrame(self._seq, self._play_end, seconds, data,
+                           self._cycle, offset, self._frame_ts)
+        self._play_end += seconds
+        self._last_cycle = self._cycle
+        self._report.record_sent(seconds)
+        return frame
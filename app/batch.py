@@ -0,0 +1,289 @@
+"""Offline batch mode: commentate a video file faster than real time.
+
+Usage:
+    python -m app.batch --source match.mp4 --instruction "Commentate this match" --out output/match
+    python -m app.batch --source match.mp4 --out output/match --audio --profile sports
+
+Live capture paces video files to real time, so a 90-minute match takes 90
+minutes. This walks the file by timestamp instead: frames are grabbed at
+CAPTURE_FPS positions and pushed into a SlidingWindow with their video time,
+and MonitorLoop.step() builds windows and prompts exactly as the live path
+does. Inference runs back to back, so throughput is GPU-bound.
+
+Between cycles, the video clock advances by what the live loop would have
+spent (inference time + audio playback + TTS_PAUSE_AFTER + INFERENCE_INTERVAL),
+so the commentary density matches a live session. Use --hop for a fixed step.
+
+Writes:
+    <out>.jsonl  one record per cycle (video times, text, timing)
+    <out>.srt    subtitle track aligned to the video
+    <out>.wav    commentary audio aligned to the video (--audio only)
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+import wave
+from pathlib import Path
+from typing import Optional
+
+import cv2
+from PIL import Image
+
+from app.audio_manager import AudioChunk, AudioManager
+from app.broadcast import RingSubscriber
+from app.config import (
+    CAPTURE_FPS,
+    INFERENCE_INTERVAL,
+    PROMPT_PROFILES,
+    TTS_PAUSE_AFTER,
+)
+from app.monitor_loop import MonitorLoop
+from app.sliding_window import SlidingWindow
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+logger = logging.getLogger(__name__)
+
+# Seek instead of grabbing when the next wanted frame is further ahead than this.
+_SEEK_MIN_GAP_SEC = 2.0
+
+
+class VideoFileReader:
+    """Random-ish access to a video file by timestamp.
+
+    Short forward gaps are covered with grab() (no colour conversion), longer
+    or backward jumps with a seek. Sequential reads at CAPTURE_FPS mostly grab.
+    """
+
+    def __init__(self, path: str):
+        self._capture = cv2.VideoCapture(path)
+        if not self._capture.isOpened():
+            raise RuntimeError(f"Failed to open video file: {path}")
+        self.fps = self._capture.get(cv2.CAP_PROP_FPS) or 25.0
+        frame_count = self._capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0
+        # Some containers don't report a frame count: read until EOF instead
+        self.duration = frame_count / self.fps if frame_count > 0 else float("inf")
+        self._next_index = 0  # index of the frame the next read() returns
+
+    def read_at(self, position: float) -> Optional[Image.Image]:
+        """Return the frame at `position` seconds, or None past the end."""
+        target = int(round(position * self.fps))
+        gap = target - self._next_index
+        if gap < 0 or gap > _SEEK_MIN_GAP_SEC * self.fps:
+            self._capture.set(cv2.CAP_PROP_POS_FRAMES, target)
+        else:
+            for _ in range(gap):
+                if not self._capture.grab():
+                    return None
+        self._next_index = target + 1
+        ret, frame = self._capture.read()
+        if not ret:
+            return None
+        return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+    def close(self) -> None:
+        self._capture.release()
+
+
+class BatchRunner:
+    """Drives MonitorLoop over a video file and writes the transcript."""
+
+    def __init__(self, model, audio: bool = False, hop: Optional[float] = None):
+        self._model = model
+        self._audio = audio
+        self._hop = hop
+
+    async def run(self, source: str, instruction: str, prompt: Optional[str],
+                  out: Path) -> list[dict]:
+        reader = VideoFileReader(source)
+        window = SlidingWindow()
+        audio_manager = AudioManager() if self._audio else None
+        if audio_manager is not None:
+            audio_manager.start()
+        monitor = MonitorLoop(self._model, window, audio_manager=audio_manager, live=False)
+        if prompt is not None:
+            monitor.set_commentator_prompt(prompt)
+        monitor.set_instruction(instruction)
+
+        events: list = []
+        audio_chunks: list[AudioChunk] = []
+        drains = [asyncio.create_task(_drain(monitor.subscribe(), events))]
+        if audio_manager is not None:
+            drains.append(asyncio.create_task(_drain(audio_manager.subscribe(), audio_chunks)))
+
+        logger.info(
+            f"Batch: {source} ({reader.duration:.0f}s @ {reader.fps:.1f} FPS), "
+            f"sampling at {CAPTURE_FPS} FPS"
+        )
+        records: list[dict] = []
+        audio_track = bytearray()
+        capture_step = 1.0 / CAPTURE_FPS
+        next_frame_at = 0.0  # video time of the next frame to push
+        clock = 0.0  # simulated "now" in video time
+        eof = False
+        t_start = time.monotonic()
+        try:
+            # duration is inf when the container has no frame count: then
+            # only the end of file (read_at() returning None) stops the run
+            while clock <= reader.duration:
+                while next_frame_at <= clock:
+                    image = reader.read_at(next_frame_at)
+                    if image is None:
+                        eof = True
+                        break
+                    window.push(image, timestamp=next_frame_at, pts=next_frame_at)
+                    next_frame_at += capture_step
+                if eof:
+                    break
+
+                if not await monitor.step():
+                    clock += INFERENCE_INTERVAL
+                    continue
+
+                await _wait_cycle_end(events)
+                record, pcm = _split_cycle(events, audio_chunks)
+                records.append(record)
+                if pcm:
+                    _place_audio(audio_track, pcm, record["video_end"])
+                logger.info(
+                    f"[{_fmt_time(record['video_end'])}] "
+                    f"{'(skip)' if record['skipped'] else record['text']}"
+                )
+                clock += self._hop if self._hop is not None else _live_hop(record)
+        finally:
+            reader.close()
+            for task in drains:
+                task.cancel()
+
+        elapsed = time.monotonic() - t_start
+        logger.info(
+            f"Batch done: {len(records)} cycles, {next_frame_at:.0f}s of video "
+            f"in {elapsed:.0f}s ({next_frame_at / max(elapsed, 1e-6):.1f}x real time)"
+        )
+        _write_outputs(out, records, audio_track if self._audio else None)
+        return records
+
+
+async def _drain(sub: RingSubscriber, sink: list) -> None:
+    """Move every subscriber event into `sink` until the stop signal."""
+    while True:
+        item = (await sub.get()).data
+        if item is None:
+            return
+        sink.append(item)
+
+
+async def _wait_cycle_end(events: list, timeout: float = 1.0) -> None:
+    """Give the drain tasks time to pick up the cycle_end metadata."""
+    deadline = time.monotonic() + timeout
+    while not any(isinstance(e, dict) for e in events) and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+
+
+def _split_cycle(events: list, audio_chunks: list[AudioChunk]) -> tuple[dict, bytes]:
+    """Consume one cycle's text chunks + cycle_end metadata (and its audio)."""
+    text = []
+    meta: dict = {}
+    while events:
+        item = events.pop(0)
+        if isinstance(item, dict):
+            meta = item
+            break
+        text.append(item)
+    pcm = b"".join(chunk.pcm for chunk in audio_chunks)
+    audio_chunks.clear()
+    record = {
+        "cycle": meta.get("cycle"),
+        "video_start": round(meta.get("oldest_frame_at", 0.0), 2),
+        "video_end": round(meta.get("newest_frame_at", 0.0), 2),
+        "text": "".join(text).strip(),
+        "skipped": meta.get("skipped", False),
+        "repeat": "repeat" in meta,
+        "inference_sec": meta.get("inference_sec", 0.0),
+        "audio_sec": round(
+            len(pcm) / (AudioManager.SAMPLE_RATE * AudioManager.BYTES_PER_SAMPLE), 2
+        ),
+    }
+    return record, pcm
+
+
+def _live_hop(record: dict) -> float:
+    """Video seconds the live loop would have spent on this cycle."""
+    hop = record["inference_sec"] + INFERENCE_INTERVAL
+    if record["audio_sec"] > 0:
+        hop += max(0.0, record["audio_sec"] - record["inference_sec"]) + TTS_PAUSE_AFTER
+    return hop
+
+
+def _place_audio(track: bytearray, pcm: bytes, at: float) -> None:
+    """Write a cycle's PCM at video time `at`, or right after the previous one."""
+    bytes_per_sec = AudioManager.SAMPLE_RATE * AudioManager.BYTES_PER_SAMPLE
+    offset = int(at * bytes_per_sec) & ~1  # keep int16 alignment
+    if offset > len(track):
+        track.extend(bytes(offset - len(track)))
+    track.extend(pcm)
+
+
+def _fmt_time(seconds: float, srt: bool = False) -> str:
+    ms = int(round(seconds * 1000))
+    h, rest = divmod(ms, 3_600_000)
+    m, rest = divmod(rest, 60_000)
+    s, ms = divmod(rest, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}" if srt else f"{h:02d}:{m:02d}:{s:02d}"
+
+
+def _write_outputs(out: Path, records: list[dict], audio_track: Optional[bytearray]) -> None:
+    out.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(out.with_suffix(".jsonl"), "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+    spoken = [r for r in records if not r["skipped"] and not r["repeat"] and r["text"]]
+    with open(out.with_suffix(".srt"), "w", encoding="utf-8") as f:
+        for i, record in enumerate(spoken):
+            start = record["video_end"]
+            end = start + max(2.0, record["audio_sec"])
+            if i + 1 < len(spoken):
+                end = min(end, spoken[i + 1]["video_end"])
+            f.write(f"{i + 1}\n{_fmt_time(start, srt=True)} --> "
+                    f"{_fmt_time(end, srt=True)}\n{record['text']}\n\n")
+
+    if audio_track is not None:
+        with wave.open(str(out.with_suffix(".wav")), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(AudioManager.BYTES_PER_SAMPLE)
+            wav.setframerate(AudioManager.SAMPLE_RATE)
+            wav.writeframes(bytes(audio_track))
+
+    logger.info(f"Wrote {out.with_suffix('.jsonl')}, {out.with_suffix('.srt')}"
+                + (f", {out.with_suffix('.wav')}" if audio_track is not None else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline batch commentary for video files")
+    parser.add_argument("--source", required=True, help="Video file path")
+    parser.add_argument("--out", required=True, help="Output path prefix (no extension)")
+    parser.add_argument("--instruction", default=None,
+                        help="Instruction. Default: the profile's suggestion")
+    parser.add_argument("--profile", default="default", choices=sorted(PROMPT_PROFILES),
+                        help="Prompt profile (system prompt). Default: default")
+    parser.add_argument("--audio", action="store_true",
+                        help="Generate TTS audio and write <out>.wav (loads the vocoder)")
+    parser.add_argument("--hop", type=float, default=None,
+                        help="Fixed video seconds between cycles. Default: simulate live pacing")
+    args = parser.parse_args()
+
+    from app.model_server import ModelServer
+
+    profile = PROMPT_PROFILES[args.profile]
+    instruction = args.instruction or profile["suggestion"]
+    model = ModelServer(enable_tts=args.audio)
+    runner = BatchRunner(model, audio=args.audio, hop=args.hop)
+    asyncio.run(runner.run(args.source, instruction, profile["prompt"], Path(args.out)))
+
+
+if __name__ == "__main__":
+    main()
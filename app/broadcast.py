@@ -0,0 +1,222 @@
+"""Broadcast ring: one append-only buffer shared by all subscribers.
+
+Replaces per-subscriber bounded queues. Publishing is O(1) regardless of the
+number of subscribers: the event is written once into a fixed-size ring and
+waiting readers are woken through a single shared future. Each subscriber
+only keeps a read cursor (a sequence number).
+
+New subscribers can start in the past: after a given sequence number (e.g.
+an SSE Last-Event-ID on reconnect) or at one of the most recent boundaries
+(late joiners replay the current cycle and some history).
+
+A subscriber that falls so far behind that its next event was overwritten is
+resynced to the oldest cycle boundary still in the ring (e.g. the start of a
+cycle's text or audio), so it never resumes mid-sentence. Skipped events are
+counted per subscriber and in total.
+
+All methods must be called from the event loop thread (producers in other
+threads use loop.call_soon_threadsafe, as before).
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+
+class BroadcastEvent:
+    """One published item with its sequence number, cycle id and publish time."""
+
+    __slots__ = ("seq", "cycle", "data", "boundary", "ts")
+
+    def __init__(self, seq: int, cycle: int, data: Any, boundary: bool, ts: float):
+        self.seq = seq
+        self.cycle = cycle
+        self.data = data
+        self.boundary = boundary
+        self.ts = ts  # wall-clock time of publish()
+
+
+class RingSubscriber:
+    """Read cursor into a BroadcastRing."""
+
+    def __init__(self, ring: "BroadcastRing", cursor: int):
+        self._ring = ring
+        self.cursor = cursor  # seq of the next event to read
+        self.dropped = 0  # events skipped because they were overwritten
+        self.resyncs = 0
+
+    @property
+    def lag(self) -> int:
+        """Events published but not yet read."""
+        return self._ring.next_seq - self.cursor
+
+    @property
+    def pending(self) -> bool:
+        return self.cursor < self._ring.next_seq
+
+    def get_nowait(self) -> Optional[BroadcastEvent]:
+        """Next event, or None if the subscriber is caught up."""
+        ring = self._ring
+        if self.cursor < ring.oldest_seq:
+            resume = ring.first_boundary_from(ring.oldest_seq)
+            self.dropped += resume - self.cursor
+            self.resyncs += 1
+            ring.dropped += resume - self.cursor
+            ring.resyncs += 1
+            self.cursor = resume
+        if self.cursor >= ring.next_seq:
+            return None
+        event = ring.at(self.cursor)
+        self.cursor += 1
+        return event
+
+    async def get(self, timeout: Optional[float] = None) -> BroadcastEvent:
+        """Wait for the next event.
+
+        Raises:
+            asyncio.TimeoutError: if nothing was published within timeout.
+        """
+        while True:
+            event = self.get_nowait()
+            if event is not None:
+                return event
+            await asyncio.wait_for(asyncio.shield(self._ring.changed()), timeout)
+
+
+class BroadcastRing:
+    """Fixed-capacity append-only event log with per-subscriber cursors."""
+
+    def __init__(self, capacity: int):
+        self._capacity = capacity
+        self._entries: list[Optional[BroadcastEvent]] = [None] * capacity
+        self.next_seq = 1  # seq the next published event gets
+        self._boundaries: deque[int] = deque(maxlen=capacity)
+        self._changed: Optional[asyncio.Future] = None
+        self._subscribers: set[RingSubscriber] = set()
+        self.dropped = 0  # total events skipped by lagging subscribers
+        self.resyncs = 0
+
+    @property
+    def oldest_seq(self) -> int:
+        """Oldest sequence number still held in the ring."""
+        return max(1, self.next_seq - self._capacity)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def at(self, seq: int) -> BroadcastEvent:
+        return self._entries[seq % self._capacity]
+
+    def _prune_boundaries(self) -> None:
+        oldest = self.oldest_seq
+        while self._boundaries and self._boundaries[0] < oldest:
+            self._boundaries.popleft()
+
+    def first_boundary_from(self, seq: int) -> int:
+        """First boundary at or after seq; next_seq if none is buffered."""
+        self._prune_boundaries()
+        for boundary in self._boundaries:
+            if boundary >= seq:
+                return boundary
+        return self.next_seq
+
+    def publish(self, data: Any, cycle: int = 0, boundary: bool = False) -> int:
+        """Append one event and wake waiting subscribers. Returns its seq."""
+        seq = self.next_seq
+        self._entries[seq % self._capacity] = BroadcastEvent(seq, cycle, data, boundary, time.time())
+        self.next_seq += 1
+        if boundary:
+            self._boundaries.append(seq)
+        if self._changed is not None and not self._changed.done():
+            self._changed.set_result(None)
+        self._changed = None
+        return seq
+
+    def changed(self) -> asyncio.Future:
+        """Future resolved by the next publish (shared by all waiters)."""
+        if self._changed is None:
+            self._changed = asyncio.get_running_loop().create_future()
+        return self._changed
+
+    def subscribe(self, after: Optional[int] = None,
+                  replay_boundaries: int = 0) -> RingSubscriber:
+        """New subscriber. By default it receives events published from now on.
+
+        Args:
+            after: Resume right after this seq (e.g. SSE Last-Event-ID). If
+                it is no longer buffered, the subscriber resyncs to the oldest
+                boundary. Ignored if it is not a seq this ring has published.
+            replay_boundaries: Start at the k-th most recent buffered boundary
+                (1 = latest). Falls back to the oldest one if fewer exist.
+        """
+        cursor = self.next_seq
+        if after is not None and 0 <= after < self.next_seq:
+            cursor = after + 1
+        elif replay_boundaries > 0:
+            self._prune_boundaries()
+            if self._boundaries:
+                cursor = self._boundaries[-min(replay_boundaries, len(self._boundaries))]
+        sub = RingSubscriber(self, cursor)
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: RingSubscriber) -> None:
+        self._subscribers.discard(sub)
+
+    def stats(self) -> dict:
+        """Counters for monitoring (published, dropped, subscriber lag)."""
+        lags = [sub.lag for sub in self._subscribers]
+        return {
+            "published": self.next_seq - 1,
+            "subscribers": len(self._subscribers),
+            "dropped": self.dropped,
+            "resyncs": self.resyncs,
+            "max_lag": max(lags, default=0),
+            "capacity": self._capacity,
+        }
+
+
+class TokenCoalescer:
+    """Batches text chunks from a producer thread before they reach the loop.
+
+    The first chunk of a batch schedules a single flush on the event loop
+    `window` seconds later; chunks arriving in the meantime join that batch.
+    A batch of `max_chunks` is flushed right away. This turns one loop wakeup
+    (and one published event) per token into one per batch.
+
+    add() and close() are called from the producer thread, flush() runs on
+    the loop. close() schedules a final flush; since call_soon_threadsafe
+    callbacks run in order, anything the producer schedules after close()
+    (e.g. cycle metadata) is published after the last text.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, publish: Callable[[str], None],
+                 window: float, max_chunks: int):
+        self._loop = loop
+        self._publish = publish
+        self._window = window
+        self._max_chunks = max(1, max_chunks)
+        self._lock = threading.Lock()
+        self._pending: list[str] = []
+
+    def add(self, text: str) -> None:
+        with self._lock:
+            self._pending.append(text)
+            count = len(self._pending)
+        if count >= self._max_chunks or self._window <= 0:
+            self._loop.call_soon_threadsafe(self.flush)
+        elif count == 1:
+            self._loop.call_soon_threadsafe(self._loop.call_later, self._window, self.flush)
+
+    def close(self) -> None:
+        self._loop.call_soon_threadsafe(self.flush)
+
+    def flush(self) -> None:
+        with self._lock:
+            text = "".join(self._pending)
+            self._pending.clear()
+        if text:
+            self._publish(text)
@@ -206,6 +206,46 @@ TTS_PAUSE_AFTER = float(os.getenv("TTS_PAUSE_AFTER", "0.5"))
 # TTS_MAX_NEW_TOKENS = int(os.getenv("TTS_MAX_NEW_TOKENS", "96"))
 # TTS_PAUSE_AFTER = float(os.getenv("TTS_PAUSE_AFTER", "0.3"))
 
+# ---- FRAME SELECTION STRATEGY (works with any preset above) ----
+#
+#   FRAME_SELECTION  How the selected frames are sent to the AI.
+#                      stride = every frame is its own image (default).
+#                      mosaic = consecutive frames are tiled into one composite
+#                               image (MOSAIC_GRID x MOSAIC_GRID), with a
+#                               timestamp burned into each tile's corner.
+#                    Mosaic trades per-frame detail for time coverage: a 2x2
+#                    grid packs 4 frames into the token cost of 1.
+#
+#   MOSAIC_GRID      Tiles per side of a composite. 2 = 2x2 (4 frames/image).
+#                    3 = 3x3 (9 frames/image, each tile very small).
+#
+# Image tokens with mosaic = ceil(FRAMES_PER_INFERENCE / MOSAIC_GRID^2)
+#                            * 64 * MAX_SLICE_NUMS
+# Example: Preset D + mosaic 2x2 = 3 images * 128 = 384 instead of 1280.
+FRAME_SELECTION = os.getenv("FRAME_SELECTION", "stride").lower()
+MOSAIC_GRID = int(os.getenv("MOSAIC_GRID", "2"))
+
+# ---- REGIONS OF INTEREST (ROI) — high-detail crops, e.g. a scoreboard ----
+# Instead of raising MAX_SLICE_NUMS for every frame just to read small text,
+# crop the region from the newest frame and send it as one extra image.
+# The model upscales the small crop, so it gets far more detail than the
+# same area inside a full frame.
+#
+#   ROI_REGIONS            Startup ROIs, "name:x,y,w,h" separated by ";".
+#                          Coordinates are fractions of the frame (0-1).
+#                          Example: "scoreboard:0.02,0.03,0.25,0.08"
+#                          Also editable live via /api/rois (no restart).
+#
+#   ROI_FRAME_SLICE_NUMS   Detail level for the full frames while ROIs are
+#                          active. 1 = cheapest; the crops carry the detail.
+#
+#   ROI_GLOBAL_SLICE_NUMS  The slice count you would otherwise need globally
+#                          to read the ROI. Only used to report token savings
+#                          in the cycle metadata.
+ROI_REGIONS = os.getenv("ROI_REGIONS", "")
+ROI_FRAME_SLICE_NUMS = int(os.getenv("ROI_FRAME_SLICE_NUMS", "1"))
+ROI_GLOBAL_SLICE_NUMS = int(os.getenv("ROI_GLOBAL_SLICE_NUMS", "3"))
+
 # ===========================================================================
 # 4. PROMPT PROFILES — AI personality (switchable live from web UI)
 # ===========================================================================
@@ -282,6 +322,23 @@ PROMPT_PROFILES = {
     },
 }
 
+# Repeat detection (app/repetition.py). While a response streams, its word
+# n-grams are compared with the last REPEAT_HISTORY responses. A clear repeat
+# stops generation early and its audio is suppressed, like a "..." response.
+#
+#   REPEAT_HISTORY     Earlier responses to compare with. 0 = off.
+#   REPEAT_NGRAM       Words per n-gram. 3 catches rephrased repeats without
+#                      flagging responses that merely share a few words.
+#   REPEAT_THRESHOLD   Share of the response's n-grams found in one earlier
+#                      response that makes it a repeat (0-1).
+#   REPEAT_MIN_NGRAMS  Decide only after this many n-grams (with n=3, 5 n-grams
+#                      = 7 words), so a common opening doesn't trigger it.
+#                      Short responses are never flagged.
+REPEAT_HISTORY = int(os.getenv("REPEAT_HISTORY", "3"))
+REPEAT_NGRAM = int(os.getenv("REPEAT_NGRAM", "3"))
+REPEAT_THRESHOLD = float(os.getenv("REPEAT_THRESHOLD", "0.6"))
+REPEAT_MIN_NGRAMS = int(os.getenv("REPEAT_MIN_NGRAMS", "5"))
+
 # ===========================================================================
 # 5. SERVER & STREAMING — network, display, sync
 # ===========================================================================
@@ -291,14 +348,38 @@ PROMPT_PROFILES = {
 SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
 SERVER_PORT = int(os.getenv("SERVER_PORT", "8199"))
 
-# JPEG quality for /api/frame snapshot endpoint (1-100).
+# JPEG quality of display frames (/api/frame, full-size /api/mjpeg), 1-100.
 FRAME_JPEG_QUALITY = int(os.getenv("FRAME_JPEG_QUALITY", "80"))
 
+# JPEG encoder for display frames (encoded for EVERY source frame):
+# "auto" benchmarks the available engines on the first frame and picks the
+# fastest; or force "turbojpeg" (needs PyTurboJPEG + libturbojpeg), "cv2"
+# or "pil". HTTP MJPEG sources are passed through without re-encoding.
+JPEG_ENCODER = os.getenv("JPEG_ENCODER", "auto")
+# Chroma subsampling: "420" (smallest/fastest), "422", "444" (sharpest text)
+JPEG_SUBSAMPLING = os.getenv("JPEG_SUBSAMPLING", "420")
+
+# Max seconds /api/frame?after=<frame_id> waits for a newer frame (long-poll).
+FRAME_LONGPOLL_TIMEOUT = float(os.getenv("FRAME_LONGPOLL_TIMEOUT", "25.0"))
+
 # Display frame rate for the /api/mjpeg browser stream.
 # This is the DISPLAY rate, not the AI capture rate (that's CAPTURE_FPS above).
 # 10 = smooth enough for a preview. Higher = smoother but more bandwidth.
 MJPEG_FPS = int(os.getenv("MJPEG_FPS", "10"))
 
+# MJPEG quality ladder: name -> (max height in pixels, JPEG quality).
+# Height 0 = source resolution at FRAME_JPEG_QUALITY (the display buffer
+# JPEG as-is). Smaller variants are encoded at most once per frame, and only
+# while a client is watching that variant. Clients pick one with
+# /api/mjpeg?quality=720p, or "auto" to follow their measured throughput.
+MJPEG_VARIANTS = {
+    "full": (0, FRAME_JPEG_QUALITY),
+    "720p": (720, 75),
+    "360p": (360, 65),
+}
+# Variant for clients that don't pass ?quality= ("auto" or a ladder name)
+MJPEG_DEFAULT_QUALITY = os.getenv("MJPEG_DEFAULT_QUALITY", "auto")
+
 # Adaptive sync: delays the video stream so commentary matches what you see.
 # 5.0 = video is 5 seconds behind real-time (initial, adapts after first cycle).
 # 0   = no delay, real-time video (commentary will lag behind what you see).
@@ -308,6 +389,105 @@ STREAM_DELAY_INIT = float(os.getenv("STREAM_DELAY_INIT", "5.0"))
 # Higher = reacts faster but jittery. Lower = smoother but slow to adapt.
 STREAM_DELAY_EMA_ALPHA = float(os.getenv("STREAM_DELAY_EMA_ALPHA", "0.2"))
 
+# How the delay is predicted.
+#   rls = online regression on cycle features (image tokens, prompt
+#         length, expected response length, TTS). Sets the delay at
+#         cycle START for that cycle, so long and short responses are both
+#         matched. Uses the EMA until it has seen a few cycles.
+#   ema = smoothed average of past latency only (previous behavior).
+STREAM_DELAY_MODEL = os.getenv("STREAM_DELAY_MODEL", "rls").lower()
+
+# RLS forgetting factor. 0.95 = remembers roughly the last 20 cycles.
+# Lower = adapts faster to changes (new prompt, other GPU load), noisier.
+STREAM_DELAY_RLS_FORGETTING = float(os.getenv("STREAM_DELAY_RLS_FORGETTING", "0.95"))
+
+# Extra seconds added to the predicted delay. cycle_end reports the
+# prediction error, so you can size this from real data. 0 = no margin.
+STREAM_DELAY_MARGIN = float(os.getenv("STREAM_DELAY_MARGIN", "0.0"))
+
+# Max change of the delay per cycle (seconds), RLS model. A bigger jump
+# would make the delayed video visibly skip or repeat at cycle start; the
+# delay walks toward the prediction over several cycles instead. 0 = no limit.
+STREAM_DELAY_MAX_STEP = float(os.getenv("STREAM_DELAY_MAX_STEP", "0.5"))
+
+# Broadcast ring sizes (events kept for all subscribers). A client that falls
+# further behind than this skips ahead to the next cycle boundary; skipped
+# events are counted in /api/stats.
+# Text ring: one event per token chunk. 4096 = many cycles of commentary.
+STREAM_RING_SIZE = int(os.getenv("STREAM_RING_SIZE", "4096"))
+# Audio ring: one event per TTS chunk (~0.1-1s of audio each).
+AUDIO_RING_SIZE = int(os.getenv("AUDIO_RING_SIZE", "512"))
+
+# TTS post-processing (GPU->CPU copy, resampling, int16 conversion) runs on
+# its own thread so token generation never waits on it. The inference thread
+# only blocks when that thread is AUDIO_QUEUE_SIZE generation results behind
+# (counted as "waits" in /api/stats).
+AUDIO_QUEUE_SIZE = int(os.getenv("AUDIO_QUEUE_SIZE", "256"))
+
+# /api/audio-stream?format= picks pcm48 (default), pcm24, adpcm or opus
+# (see app/audio_codecs.py). Each format is encoded once per chunk, only while
+# someone listens to it. Opus needs opuslib + libopus; this is its bitrate in
+# bit/s (24000 is plenty for speech).
+AUDIO_OPUS_BITRATE = int(os.getenv("AUDIO_OPUS_BITRATE", "24000"))
+
+# Audio gate clock. Players of /api/audio-stream report how much audio they
+# have played (POST /api/audio-ack, the web UI does this), and the next cycle
+# waits until the reporting players are done instead of guessing from the
+# time audio was sent. Without reports (or with AUDIO_CLOCK=estimate) the
+# gate falls back to that guess.
+#   AUDIO_ACK_POLICY   first  = go on when the most advanced player is done
+#                      quorum = when AUDIO_ACK_QUORUM of the players are done
+#   AUDIO_ACK_TIMEOUT  Players that haven't reported for this many seconds
+#                      (tab in background, muted, gone) are ignored.
+AUDIO_CLOCK = os.getenv("AUDIO_CLOCK", "ack").lower()
+AUDIO_ACK_POLICY = os.getenv("AUDIO_ACK_POLICY", "first").lower()
+AUDIO_ACK_QUORUM = float(os.getenv("AUDIO_ACK_QUORUM", "0.5"))
+AUDIO_ACK_TIMEOUT = float(os.getenv("AUDIO_ACK_TIMEOUT", "3.0"))
+
+# Audio pacing: /api/audio-stream releases audio at real-time rate, in
+# pieces of AUDIO_PACE_FRAME_MS, keeping each player at most AUDIO_PACE_LEAD
+# seconds ahead of playback (its jitter buffer). Larger lead = more
+# tolerance for network hiccups, more audio buffered in the player.
+# 0 = no pacing, audio is sent as fast as the vocoder produces it.
+# Underruns and drops per player are shown in /api/stats.
+AUDIO_PACE_LEAD = float(os.getenv("AUDIO_PACE_LEAD", "1.0"))
+AUDIO_PACE_FRAME_MS = float(os.getenv("AUDIO_PACE_FRAME_MS", "100"))
+
+# Token coalescing: the inference thread batches text chunks for up to
+# STREAM_COALESCE_MS (or STREAM_COALESCE_TOKENS chunks) before handing them
+# to the event loop, so each SSE client gets a few events per second instead
+# of one per token. 30-50ms is below what the typing effect shows.
+# 0 = publish every token individually.
+STREAM_COALESCE_MS = float(os.getenv("STREAM_COALESCE_MS", "40"))
+STREAM_COALESCE_TOKENS = int(os.getenv("STREAM_COALESCE_TOKENS", "8"))
+
+# MJPEG only sends a frame when it changed (a paused or slow source sends
+# nothing). Some proxies close connections that stay silent, so the last
+# frame is re-sent every MJPEG_KEEPALIVE seconds while idle. 0 = never.
+MJPEG_KEEPALIVE = float(os.getenv("MJPEG_KEEPALIVE", "5.0"))
+
+# Event-loop hygiene: CPU-bound image work reachable from the event loop
+# (frame preparation, MJPEG quality variants) runs on a dedicated pool of
+# IMAGE_WORKERS threads with at most IMAGE_QUEUE_LIMIT jobs in flight.
+# A watchdog logs every event-loop stall longer than LOOP_STALL_THRESHOLD_MS
+# (counted in /api/stats). 0 = watchdog off.
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+IMAGE_QUEUE_LIMIT = int(os.getenv("IMAGE_QUEUE_LIMIT", "16"))
+LOOP_STALL_THRESHOLD_MS = float(os.getenv("LOOP_STALL_THRESHOLD_MS", "100"))
+
+# WebSocket (/api/ws): a client whose socket does not accept a message within
+# WS_SEND_TIMEOUT seconds is disconnected. Status is pushed every
+# WS_STATUS_INTERVAL seconds instead of being polled.
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "10.0"))
+WS_STATUS_INTERVAL = float(os.getenv("WS_STATUS_INTERVAL", "2.0"))
+
+# Late joiners: a client connecting to /api/stream mid-cycle first gets the
+# current cycle from its start, plus this many completed cycles before it
+# (as long as they are still in the ring). 0 = current cycle only.
+# Reconnecting clients send Last-Event-ID and resume exactly where they left.
+# /api/audio-stream likewise joins at the start of the current utterance.
+STREAM_REPLAY_CYCLES = int(os.getenv("STREAM_REPLAY_CYCLES", "3"))
+
 # ===========================================================================
 # 6. TTS PATHS — model files for text-to-speech (rarely change)
 # ===========================================================================
@@ -323,3 +503,36 @@ REF_AUDIO_PATH = os.getenv("REF_AUDIO_PATH", os.path.join(MODEL_PATH, "assets",
 
 # Float16 vocoder: saves VRAM but currently crashes. Keep false.
 TTS_FLOAT16 = os.getenv("TTS_FLOAT16", "false").lower() == "true"
+
+# Voices selectable at runtime (GET/POST /api/voices): the .wav files in this
+# directory. Default: the folder of REF_AUDIO_PATH.
+TTS_VOICES_DIR = os.getenv("TTS_VOICES_DIR", os.path.dirname(REF_AUDIO_PATH))
+
+# The vocoder's prompt cache for a voice (speaker embedding, prompt tokens)
+# takes a while to compute from the reference audio. It is saved here, one
+# file per voice, reference file and vocoder, and loaded on the next start or
+# switch. Empty = always compute.
+TTS_VOICE_CACHE_DIR = os.getenv(
+    "TTS_VOICE_CACHE_DIR", os.path.join(os.path.dirname(MODEL_PATH), ".tts_voices")
+)
+
+# Phrase cache (app/phrase_cache.py): keep the audio of short, complete
+# responses ("What a save!") and play it again when the model repeats the
+# phrase: generation stops at the sentence end that completes a cached phrase,
+# which saves vocoding the rest of it. Costs: a response that would have gone
+# on after such a phrase ends there (unless a longer cached phrase starts
+# with it), and a repeat sounds identical to the first time. Off by default.
+TTS_CACHE = os.getenv("TTS_CACHE", "false").lower() == "true"
+
+# Where cached phrases persist across restarts (one .npy per phrase + index).
+# Empty = memory only.
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(os.path.dirname(MODEL_PATH), ".tts_cache"))
+
+# Max size of the cache; least recently used phrases are evicted. At 24 kHz
+# int16, 1 MB holds ~22 s of speech, so 64 MB is a few thousand phrases.
+TTS_CACHE_MAX_MB = float(os.getenv("TTS_CACHE_MAX_MB", "64"))
+
+# Only responses up to this many characters are cached. Longer responses
+# rarely repeat word for word, and a longer cached phrase is more likely to
+# be the start of a response that would have gone on.
+TTS_CACHE_MAX_CHARS = int(os.getenv("TTS_CACHE_MAX_CHARS", "60"))
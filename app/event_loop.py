@@ -0,0 +1,81 @@
+"""Keeping the asyncio event loop responsive.
+
+Every SSE token, audio chunk and MJPEG frame is written from the event loop,
+so any CPU-bound work on it (JPEG encoding, resizing) shows up as token
+bursts and video stutter. Two tools:
+
+- image_executor: a small dedicated thread pool for image work reachable
+  from the event loop (frame preparation, MJPEG variants). Bounded: at most
+  IMAGE_QUEUE_LIMIT jobs are queued or running; further callers wait.
+- LoopWatchdog: a task that measures how late the loop wakes it up and logs
+  stalls above LOOP_STALL_THRESHOLD_MS.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.config import IMAGE_QUEUE_LIMIT, IMAGE_WORKERS, LOOP_STALL_THRESHOLD_MS
+
+logger = logging.getLogger(__name__)
+
+
+class ImageExecutor:
+    """Bounded thread pool for CPU-bound image work."""
+
+    def __init__(self, workers: int, queue_limit: int):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image")
+        self._queue_limit = max(workers, queue_limit)
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """Run fn(*args) in the pool; waits for a slot if the queue is full."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._queue_limit)
+        async with self._slots:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+image_executor = ImageExecutor(IMAGE_WORKERS, IMAGE_QUEUE_LIMIT)
+
+
+class LoopWatchdog:
+    """Logs event-loop stalls: wakeups later than the threshold."""
+
+    def __init__(self, threshold_ms: float = LOOP_STALL_THRESHOLD_MS, interval: float = 0.05):
+        self._threshold = threshold_ms / 1000.0
+        self._interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.stalls = 0
+        self.max_stall = 0.0
+
+    def start(self) -> None:
+        if self._threshold > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "stalls": self.stalls,
+            "max_stall_ms": round(self.max_stall * 1000, 1),
+            "threshold_ms": round(self._threshold * 1000, 1),
+        }
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.monotonic() + self._interval
+            await asyncio.sleep(self._interval)
+            lag = time.monotonic() - expected
+            if lag > self._threshold:
+                self.stalls += 1
+                self.max_stall = max(self.max_stall, lag)
+                logger.warning(f"Event loop stalled for {lag * 1000:.0f}ms")
@@ -1,3 +1,4 @@
+import functools
 import io
 import logging
 import threading
@@ -7,9 +8,15 @@ from collections import deque
 from typing import Callable, Optional, Tuple
 
 import cv2
+import numpy as np
 from PIL import Image
 
-from app.config import CAPTURE_FPS, FRAME_JPEG_QUALITY
+from app.config import CAPTURE_FPS, FRAME_JPEG_QUALITY, JPEG_ENCODER, JPEG_SUBSAMPLING
+
+try:
+    from turbojpeg import TJPF_BGR, TJSAMP_420, TJSAMP_422, TJSAMP_444, TurboJPEG
+except ImportError:  # optional: pip install PyTurboJPEG (needs libturbojpeg)
+    TurboJPEG = None
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +25,173 @@ logger = logging.getLogger(__name__)
 _DISPLAY_BUFFER_SECONDS = 15
 
 
+@functools.lru_cache(maxsize=None)
+def _turbojpeg_loads() -> bool:
+    """Whether TurboJPEG works here. Probed once: loading the library is slow."""
+    if TurboJPEG is None:
+        return False
+    try:
+        TurboJPEG()  # raises if the libturbojpeg shared library is missing
+        return True
+    except Exception:
+        return False
+
+
+class JpegEncoder:
+    """Encodes BGR frames (OpenCV layout) to JPEG with one engine.
+
+    Engines:
+        turbojpeg: libjpeg-turbo via PyTurboJPEG, if installed.
+        cv2: cv2.imencode, directly on the BGR array.
+        pil: Pillow; needs a BGR->RGB conversion first.
+
+    subsampling is the chroma subsampling: "420" (smallest, default),
+    "422" or "444" (sharpest colour edges, e.g. for on-screen text).
+    """
+
+    _PIL_SUBSAMPLING = {"444": 0, "422": 1, "420": 2}
+
+    def __init__(self, engine: str, quality: int = FRAME_JPEG_QUALITY,
+                 subsampling: str = JPEG_SUBSAMPLING):
+        if engine not in self.available():
+            raise ValueError(f"JPEG engine not available: {engine}")
+        if subsampling not in self._PIL_SUBSAMPLING:
+            raise ValueError(f"Invalid chroma subsampling: {subsampling} (420, 422 or 444)")
+        self.engine = engine
+        self._quality = quality
+        self._subsampling = subsampling
+        if engine == "turbojpeg":
+            self._turbo = TurboJPEG()
+            self._turbo_sampling = {"420": TJSAMP_420, "422": TJSAMP_422, "444": TJSAMP_444}[subsampling]
+        elif engine == "cv2":
+            self._cv2_params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+            factor = getattr(cv2, f"IMWRITE_JPEG_SAMPLING_FACTOR_{subsampling}", None)
+            if factor is not None:  # OpenCV >= 4.5.5
+                self._cv2_params += [cv2.IMWRITE_JPEG_SAMPLING_FACTOR, factor]
+
+    @staticmethod
+    def available() -> list[str]:
+        engines = ["cv2", "pil"]
+        if _turbojpeg_loads():
+            engines.insert(0, "turbojpeg")
+        return engines
+
+    def encode(self, bgr: np.ndarray) -> bytes:
+        if self.engine == "turbojpeg":
+            return self._turbo.encode(bgr, quality=self._quality, pixel_format=TJPF_BGR,
+                                      jpeg_subsample=self._turbo_sampling)
+        if self.engine == "cv2":
+            ok, encoded = cv2.imencode(".jpg", bgr, self._cv2_params)
+            if not ok:
+                raise RuntimeError("cv2.imencode failed")
+            return encoded.tobytes()
+        buf = io.BytesIO()
+        Image.fromarray(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)).save(
+            buf, format="JPEG", quality=self._quality,
+            subsampling=self._PIL_SUBSAMPLING[self._subsampling],
+        )
+        return buf.getvalue()
+
+    @classmethod
+    def fastest(cls, sample: np.ndarray, rounds: int = 5, **kwargs) -> "JpegEncoder":
+        """Micro-benchmark every available engine on `sample`; return the fastest."""
+        timings = {}
+        for engine in cls.available():
+            encoder = cls(engine, **kwargs)
+            encoder.encode(sample)  # warm-up
+            t0 = time.perf_counter()
+            for _ in range(rounds):
+                encoder.encode(sample)
+            timings[engine] = (time.perf_counter() - t0) / rounds
+        best = min(timings, key=timings.get)
+        logger.info(
+            f"JPEG encoder: {best} ("
+            + ", ".join(f"{name} {sec * 1000:.1f}ms" for name, sec in timings.items())
+            + f" per {sample.shape[1]}x{sample.shape[0]} frame)"
+        )
+        return cls(best, **kwargs)
+
+    @classmethod
+    def create(cls, sample: np.ndarray) -> "JpegEncoder":
+        """Encoder per JPEG_ENCODER: a named engine, or "auto" to benchmark."""
+        if JPEG_ENCODER != "auto":
+            if JPEG_ENCODER in cls.available():
+                logger.info(f"JPEG encoder: {JPEG_ENCODER}")
+                return cls(JPEG_ENCODER)
+            logger.warning(f"JPEG_ENCODER={JPEG_ENCODER} not available, benchmarking instead")
+        return cls.fastest(sample)
+
+
+class DisplayFrame:
+    """One JPEG-encoded frame in the display buffer."""
+
+    __slots__ = ("frame_id", "timestamp", "jpeg")
+
+    def __init__(self, frame_id: int, timestamp: float, jpeg: bytes):
+        self.frame_id = frame_id  # increases across sources, never reused
+        self.timestamp = timestamp  # wall-clock capture time
+        self.jpeg = jpeg
+
+
+class SourceClock:
+    """Maps source presentation timestamps (PTS) to wall-clock time.
+
+    wall = pts + offset. The offset is anchored on the least-delayed frame
+    seen so far (smallest arrival - pts), so frames that arrive late after a
+    decode stall or network burst keep their true capture time instead of
+    the time we got around to processing them. The offset creeps up slowly
+    (DRIFT) to follow a source clock that runs slower than ours, and a PTS
+    jump (file loop, stream restart) re-anchors it.
+
+    Without a usable PTS, the arrival time is used as-is.
+    """
+
+    # Max offset increase per second of wall time (10 ms/s)
+    DRIFT = 0.01
+    # PTS vs arrival disagreement (seconds) that counts as a discontinuity
+    JUMP_THRESHOLD = 2.0
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self._offset: Optional[float] = None
+        self._last_pts: Optional[float] = None
+        self._last_arrival = 0.0
+        self._last_wall = 0.0
+
+    def to_wall(self, pts: Optional[float], arrival: float) -> float:
+        """Convert a source PTS (seconds) to wall-clock time.
+
+        Args:
+            pts: Source timestamp in seconds, or None if unavailable.
+            arrival: Wall-clock time the frame was received.
+        """
+        if pts is None:
+            wall = arrival
+        else:
+            candidate = arrival - pts
+            is_jump = (
+                self._offset is None
+                or pts <= self._last_pts
+                or abs(candidate - self._offset) > self.JUMP_THRESHOLD
+            )
+            if is_jump:
+                self._offset = candidate
+            elif candidate < self._offset:
+                self._offset = candidate  # less delayed than any frame so far
+            else:
+                allowed = self.DRIFT * max(0.0, arrival - self._last_arrival)
+                self._offset += min(candidate - self._offset, allowed)
+            self._last_pts = pts
+            # Never in the future, never before the previous frame
+            wall = min(pts + self._offset, arrival)
+        self._last_arrival = arrival
+        wall = max(wall, self._last_wall)
+        self._last_wall = wall
+        return wall
+
+
 class FrameCapture:
     """Captures frames from a video source in a background thread.
 
@@ -35,25 +209,47 @@ class FrameCapture:
     - HTTP video URLs (str, via OpenCV/FFmpeg)
     """
 
-    def __init__(self, on_frame: Optional[Callable[[Image.Image], None]] = None):
+    def __init__(self, on_frame: Optional[Callable[..., None]] = None):
+        """
+        Args:
+            on_frame: Called at CAPTURE_FPS as on_frame(image, timestamp, pts),
+                e.g. SlidingWindow.push. timestamp is the frame's capture time
+                on the wall clock (mapped from the source PTS when available),
+                pts the raw source timestamp in seconds or None.
+        """
         self._on_frame = on_frame
         self._capture: Optional[cv2.VideoCapture] = None
         self._http_response = None  # for HTTP MJPEG streams
         self._thread: Optional[threading.Thread] = None
         self._running = False
-        self._latest_frame: Optional[Image.Image] = None
+        # Newest frame as delivered (BGR array or JPEG bytes); converted to
+        # PIL only when someone asks, not for every frame.
+        self._latest_raw: Optional[Tuple[Optional[np.ndarray], Optional[bytes]]] = None
         self._lock = threading.Lock()
         self._source = None
         self._is_http_mjpeg = False
-        # Display buffer: (wall-clock timestamp, JPEG bytes)
-        self._display_buffer: deque[Tuple[float, bytes]] = deque()
+        # Display buffer: JPEG frames ordered by capture timestamp
+        self._display_buffer: deque[DisplayFrame] = deque()
         self._display_lock = threading.Lock()
+        self._display_seq = 0
         self._src_fps: float = 0
+        self._clock = SourceClock()
+        self._encoder: Optional[JpegEncoder] = None  # chosen on the first frame
 
     @property
     def latest_frame(self) -> Optional[Image.Image]:
         with self._lock:
-            return self._latest_frame
+            raw = self._latest_raw
+        return self._to_pil(*raw) if raw is not None else None
+
+    @staticmethod
+    def _to_pil(bgr: Optional[np.ndarray], jpeg: Optional[bytes]) -> Image.Image:
+        """RGB PIL image from a BGR array or JPEG bytes."""
+        if bgr is not None:
+            return Image.fromarray(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB))
+        image = Image.open(io.BytesIO(jpeg))
+        image.load()  # force decode
+        return image if image.mode == "RGB" else image.convert("RGB")
 
     @property
     def is_running(self) -> bool:
@@ -99,6 +295,7 @@ class FrameCapture:
 
         self._source = source
         self._is_http_mjpeg = False
+        self._clock.reset()
 
         # Detect HTTP MJPEG streams by probing Content-Type
         if self._is_http_url(source):
@@ -182,56 +379,83 @@ class FrameCapture:
         """Get a JPEG frame from the display buffer.
 
         Args:
-            target_time: Wall-clock timestamp to match. Returns the frame
+            target_time: Wall-clock capture timestamp to match. Returns the frame
                 closest to this time. None returns the latest frame.
 
         Returns:
             JPEG bytes, or None if buffer is empty.
         """
+        entry = self.get_display_frame(target_time)
+        return entry.jpeg if entry is not None else None
+
+    def get_display_frame(self, target_time: Optional[float] = None) -> Optional[DisplayFrame]:
+        """Like get_display_jpeg(), but returns the DisplayFrame (id, timestamp, JPEG)."""
         with self._display_lock:
             if not self._display_buffer:
                 return None
             if target_time is None:
-                return self._display_buffer[-1][1]
+                return self._display_buffer[-1]
             # Edge cases
-            if target_time <= self._display_buffer[0][0]:
-                return self._display_buffer[0][1]
-            if target_time >= self._display_buffer[-1][0]:
-                return self._display_buffer[-1][1]
+            if target_time <= self._display_buffer[0].timestamp:
+                return self._display_buffer[0]
+            if target_time >= self._display_buffer[-1].timestamp:
+                return self._display_buffer[-1]
             # Linear scan (buffer is bounded, typically < 500 items)
-            best_jpeg = self._display_buffer[0][1]
-            best_diff = abs(self._display_buffer[0][0] - target_time)
-            for ts, jpeg in self._display_buffer:
-                diff = abs(ts - target_time)
+            best = self._display_buffer[0]
+            best_diff = abs(best.timestamp - target_time)
+            for entry in self._display_buffer:
+                diff = abs(entry.timestamp - target_time)
                 if diff < best_diff:
-                    best_jpeg = jpeg
+                    best = entry
                     best_diff = diff
                 elif diff > best_diff:
                     break  # timestamps are sorted, won't get better
-            return best_jpeg
+            return best
 
-    def _process_frame(self, pil_image: Image.Image, last_inference_push: float) -> float:
+    def _process_frame(self, last_inference_push: float, arrival: float,
+                       pts: Optional[float] = None, bgr: Optional[np.ndarray] = None,
+                       jpeg: Optional[bytes] = None) -> float:
         """Shared frame processing: display buffer + inference callback.
 
+        Pass exactly one of `bgr` (OpenCV sources; encoded with the selected
+        JpegEncoder, no RGB conversion) or `jpeg` (HTTP MJPEG sources; stored
+        in the display buffer as-is, no re-encode). The RGB PIL image for
+        inference is only built at CAPTURE_FPS.
+
+        Args:
+            last_inference_push: Monotonic time of the last inference push.
+            arrival: Wall-clock time the frame was received (before decode
+                and encode work, so that work doesn't skew the timestamp).
+            pts: Source presentation timestamp in seconds, if known.
+            bgr: Decoded frame in OpenCV BGR layout.
+            jpeg: Encoded frame.
+
         Returns the updated last_inference_push timestamp.
         """
+        timestamp = self._clock.to_wall(pts, arrival)
         with self._lock:
-            self._latest_frame = pil_image
+            self._latest_raw = (bgr, jpeg)
 
-        # Display buffer: JPEG-encode every frame
-        buf = io.BytesIO()
-        pil_image.save(buf, format="JPEG", quality=FRAME_JPEG_QUALITY)
-        now = time.time()
+        # Display buffer: every frame as JPEG
+        if jpeg is None:
+            if self._encoder is None:
+                self._encoder = JpegEncoder.create(bgr)
+            jpeg = self._encoder.encode(bgr)
         with self._display_lock:
-            self._display_buffer.append((now, buf.getvalue()))
+            self._display_seq += 1
+            self._display_buffer.append(DisplayFrame(self._display_seq, timestamp, jpeg))
 
         # Inference callback: only at CAPTURE_FPS rate
         mono_now = time.monotonic()
         inference_interval = 1.0 / CAPTURE_FPS
-        if mono_now - last_inference_push >= inference_interval:
+        if mono_now - last_inference_push >= inference_interval and self._on_frame is not None:
+            try:
+                pil_image = self._to_pil(bgr, None if bgr is not None else jpeg)
+            except Exception as e:
+                logger.debug(f"Failed to decode frame for inference: {e}")
+                return last_inference_push
             last_inference_push = mono_now
-            if self._on_frame is not None:
-                self._on_frame(pil_image)
+            self._on_frame(pil_image, timestamp, pts)
 
         return last_inference_push
 
@@ -247,6 +471,7 @@ class FrameCapture:
             t0 = time.monotonic()
 
             ret, frame = self._capture.read()
+            arrival = time.time()
 
             if not ret:
                 if is_file:
@@ -258,9 +483,15 @@ class FrameCapture:
                     time.sleep(0.1)
                     continue
 
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            pil_image = Image.fromarray(rgb)
-            last_inference_push = self._process_frame(pil_image, last_inference_push)
+            # Source PTS in ms. Many webcams report 0 or a constant here;
+            # SourceClock treats a non-increasing PTS as a discontinuity and
+            # effectively falls back to the arrival time.
+            pos_msec = self._capture.get(cv2.CAP_PROP_POS_MSEC)
+            pts = pos_msec / 1000.0 if pos_msec and pos_msec > 0 else None
+
+            last_inference_push = self._process_frame(
+                last_inference_push, arrival, pts, bgr=frame
+            )
 
             # Pace video file playback to real-time
             if frame_interval > 0:
@@ -274,6 +505,10 @@ class FrameCapture:
 
         Parses multipart/x-mixed-replace boundaries, extracts JPEG data,
         and feeds frames through the same processing pipeline as OpenCV.
+
+        Frames are timestamped with the arrival time of their part header
+        (not the time decoding finished). If the server sends a per-part
+        X-Timestamp header (e.g. mjpg-streamer), it is used as the PTS.
         """
         last_inference_push = 0.0
 
@@ -297,8 +532,10 @@ class FrameCapture:
                     break
 
                 buf = b""
+                part_arrival: Optional[float] = None
                 while self._running:
                     chunk = self._http_response.read(8192)
+                    chunk_time = time.time()
                     if not chunk:
                         logger.warning("HTTP MJPEG stream ended, reconnecting...")
                         break
@@ -310,6 +547,8 @@ class FrameCapture:
                         boundary_pos = buf.find(boundary)
                         if boundary_pos < 0:
                             break
+                        if part_arrival is None:
+                            part_arrival = chunk_time
 
                         # Find the empty line that separates headers from body
                         header_end = buf.find(b"\r\n\r\n", boundary_pos)
@@ -323,12 +562,18 @@ class FrameCapture:
                             "ascii", errors="replace"
                         )
                         content_length = 0
+                        pts = None
                         for line in header_block.split("\r\n"):
                             if line.lower().startswith("content-length:"):
                                 try:
                                     content_length = int(line.split(":", 1)[1].strip())
                                 except ValueError:
                                     pass
+                            elif line.lower().startswith("x-timestamp:"):
+                                try:
+                                    pts = float(line.split(":", 1)[1].strip())
+                                except ValueError:
+                                    pass
 
                         if content_length > 0:
                             # Use Content-Length to extract exact JPEG data
@@ -346,19 +591,16 @@ class FrameCapture:
                                 break
                             jpeg_data = buf[jpeg_start:jpeg_end + 2]
                             buf = buf[jpeg_end + 2:]
+                        arrival, part_arrival = part_arrival, None
 
-                        # Decode JPEG to PIL Image
-                        try:
-                            pil_image = Image.open(io.BytesIO(jpeg_data))
-                            pil_image.load()  # force decode
-                            if pil_image.mode != "RGB":
-                                pil_image = pil_image.convert("RGB")
-                        except Exception as e:
-                            logger.debug(f"Failed to decode JPEG frame: {e}")
+                        # Pass the JPEG through to the display buffer; it is
+                        # only decoded when the inference window needs a frame
+                        if not jpeg_data.startswith(b"\xff\xd8"):
+                            logger.debug("Skipping part without JPEG data")
                             continue
 
                         last_inference_push = self._process_frame(
-                            pil_image, last_inference_push
+                            last_inference_push, arrival, pts, jpeg=jpeg_data
                         )
 
             except Exception as e:
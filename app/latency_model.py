@@ -0,0 +1,72 @@
+"""Online latency model for the adaptive video delay.
+
+Predicts the next cycle's latency (newest frame -> end of response) from
+what is known at cycle start, using recursive least squares (RLS). RLS
+updates in O(features^2) per cycle with no stored history, and the
+forgetting factor lets it follow drift (thermal throttling, prompt changes).
+"""
+
+from typing import Optional
+
+import numpy as np
+
+# The image count is not a feature of its own: it only enters through the
+# image tokens (count x slices), and the two would be collinear whenever the
+# slice count stays the same.
+FEATURES = ("bias", "image_tokens", "prompt_chars", "expected_tokens", "tts")
+
+
+def cycle_features(n_images: int, slice_nums: int, prompt_chars: int,
+                   expected_tokens: float, tts: bool) -> np.ndarray:
+    """Feature vector for one cycle, scaled to similar magnitudes (see FEATURES)."""
+    return np.array([
+        1.0,
+        n_images * 64 * slice_nums / 1000.0,
+        prompt_chars / 1000.0,
+        expected_tokens / 100.0,
+        1.0 if tts else 0.0,
+    ])
+
+
+class LatencyPredictor:
+    """Recursive least squares regression of latency on cycle features.
+
+    predict() returns None until `warmup` observations were seen, so callers
+    can fall back to a simpler estimate (the EMA) while the model settles.
+    """
+
+    _PRIOR_VAR = 100.0  # initial (and max) variance per weight
+
+    def __init__(self, forgetting: float = 0.95, warmup: int = 3):
+        n = len(FEATURES)
+        self._forgetting = forgetting
+        self._warmup = warmup
+        self._weights = np.zeros(n)
+        self._cov = np.eye(n) * self._PRIOR_VAR  # weak prior: large initial uncertainty
+        self._samples = 0
+
+    @property
+    def samples(self) -> int:
+        return self._samples
+
+    def predict(self, x: np.ndarray) -> Optional[float]:
+        """Predicted latency in seconds, or None while warming up."""
+        if self._samples < self._warmup:
+            return None
+        return max(0.0, float(self._weights @ x))
+
+    def update(self, x: np.ndarray, observed: float) -> None:
+        """Fold one observed latency into the model (standard RLS step)."""
+        lam = self._forgetting
+        px = self._cov @ x
+        gain = px / (lam + x @ px)
+        error = observed - self._weights @ x
+        self._weights = self._weights + gain * error
+        self._cov = (self._cov - np.outer(gain, px)) / lam
+        # Features that never vary (e.g. tts for a whole session) would let the
+        # covariance grow without bound under forgetting ("windup"). Cap each
+        # weight's variance on its own (D P D keeps P positive semidefinite):
+        # scaling all of P down would also freeze the weights that do learn.
+        scale = np.sqrt(np.minimum(1.0, self._PRIOR_VAR / np.maximum(np.diag(self._cov), 1e-12)))
+        self._cov *= np.outer(scale, scale)
+        self._samples += 1
@@ -1,31 +1,47 @@
 import asyncio
-import io
 import json
 import logging
+import os
 import time
 from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Optional
 
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import FileResponse, Response, StreamingResponse
+from fastapi import FastAPI, HTTPException, Request, WebSocket
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
 
+from app.audio_codecs import ADPCM_BLOCK_BYTES, AUDIO_FORMATS, available_formats
 from app.audio_manager import AudioManager
+from app.audio_pacer import AudioPacer
 from app.config import (
     ENABLE_TTS,
-    FRAME_JPEG_QUALITY,
+    FRAME_LONGPOLL_TIMEOUT,
     MJPEG_FPS,
+    MJPEG_DEFAULT_QUALITY,
+    MJPEG_KEEPALIVE,
+    MJPEG_VARIANTS,
     PROMPT_PROFILES,
+    REF_AUDIO_PATH,
     SERVER_HOST,
     SERVER_PORT,
     STREAM_DELAY_INIT,
+    STREAM_REPLAY_CYCLES,
+    TTS_CACHE,
+    TTS_VOICES_DIR,
+    WS_SEND_TIMEOUT,
+    WS_STATUS_INTERVAL,
 )
+from app.event_loop import LoopWatchdog, image_executor
 from app.frame_capture import FrameCapture
-from app.model_server import ModelServer
+from app.mjpeg import AdaptiveQuality, MjpegBroadcaster
+from app.model_loader import ModelLoader
 from app.monitor_loop import MonitorLoop
+from app.phrase_cache import PhraseCache, voice_key
+from app.roi import Roi
 from app.sliding_window import SlidingWindow
+from app.ws_stream import WsSession
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
 logger = logging.getLogger(__name__)
@@ -46,8 +62,26 @@ class ProfileRequest(BaseModel):
     profile: str
 
 
+class RoiRequest(BaseModel):
+    name: str = Field(..., max_length=32)
+    x: float = Field(..., ge=0, le=1)
+    y: float = Field(..., ge=0, le=1)
+    w: float = Field(..., gt=0, le=1)
+    h: float = Field(..., gt=0, le=1)
+
+
+class VoiceRequest(BaseModel):
+    voice: str = Field(..., max_length=255)  # file name in TTS_VOICES_DIR
+
+
+class AudioAckRequest(BaseModel):
+    stream_id: str = Field(..., max_length=64)
+    played: float = Field(..., ge=0)  # seconds of audio played since connecting
+
+
 class StatusResponse(BaseModel):
     model_loaded: bool
+    model_loading: dict  # stage, progress (0-1), elapsed_sec, error
     capture_running: bool
     monitor_mode: str
     instruction: Optional[str]
@@ -62,31 +96,54 @@ class StatusResponse(BaseModel):
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    logger.info("Loading model...")
-    model = ModelServer()
     window = SlidingWindow()
     capture = FrameCapture(on_frame=window.push)
-    audio_manager = AudioManager() if ENABLE_TTS else None
-    monitor = MonitorLoop(model, window, audio_manager=audio_manager)
-
-    app.state.model = model
+    phrase_cache = PhraseCache(voice_key(REF_AUDIO_PATH)) if ENABLE_TTS and TTS_CACHE else None
+    audio_manager = AudioManager(phrase_cache) if ENABLE_TTS else None
+    if audio_manager is not None:
+        audio_manager.start()
+    # The model loads in the background; cycles start once it is handed over
+    monitor = MonitorLoop(None, window, audio_manager=audio_manager)
+    loader = ModelLoader()
+    logger.info("Loading model in the background...")
+    loader.start(asyncio.get_running_loop(), monitor.set_model)
+
+    app.state.loader = loader
     app.state.window = window
     app.state.capture = capture
     app.state.monitor = monitor
     app.state.audio_manager = audio_manager
     app.state.active_profile = "default"
+    app.state.stream_epoch = int(time.time())  # SSE event ids: <epoch>-<seq>
+    # One shared MJPEG producer per delay target (see app/mjpeg.py)
+    def display_fps() -> float:
+        # Match source FPS for smooth playback, fall back to MJPEG_FPS
+        return capture.source_fps if capture.source_fps > 0 else MJPEG_FPS
+
+    def sync_delay() -> float:
+        return monitor.target_delay if STREAM_DELAY_INIT > 0 else 0.0
+
+    app.state.mjpeg = {
+        "synced": MjpegBroadcaster(capture, sync_delay, display_fps),
+        "live": MjpegBroadcaster(capture, lambda: 0.0, display_fps),
+    }
+    app.state.watchdog = LoopWatchdog()
+    app.state.watchdog.start()
     app.state.monitor_task = asyncio.create_task(monitor.run())
     await monitor.wait_started()
 
-    logger.info("Server ready")
+    logger.info("Server ready (model still loading, see /api/ready)")
     yield
 
     logger.info("Shutting down...")
     monitor.stop()
-    if audio_manager is not None:
-        audio_manager.stop()
     capture.stop()
+    # Let the running cycle end first: it waits on the audio thread
     await app.state.monitor_task
+    if audio_manager is not None:
+        audio_manager.stop()
+    app.state.watchdog.stop()
+    image_executor.shutdown()
 
 
 app = FastAPI(title="NerdPudding", lifespan=lifespan)
@@ -108,23 +165,47 @@ async def root():
     return {"message": "NerdPudding - API running."}
 
 
-@app.get("/api/status", response_model=StatusResponse)
-async def get_status(request: Request):
-    monitor = request.app.state.monitor
-    capture = request.app.state.capture
-    window = request.app.state.window
+def _build_status(app: FastAPI) -> StatusResponse:
+    state = app.state
     return StatusResponse(
-        model_loaded=True,
-        capture_running=capture.is_running,
-        monitor_mode=monitor.mode,
-        instruction=monitor.instruction,
-        cycle_count=monitor.cycle_count,
-        frames_buffered=window.count,
+        model_loaded=state.loader.ready,
+        model_loading=state.loader.status(),
+        capture_running=state.capture.is_running,
+        monitor_mode=state.monitor.mode,
+        instruction=state.monitor.instruction,
+        cycle_count=state.monitor.cycle_count,
+        frames_buffered=state.window.count,
         tts_enabled=ENABLE_TTS,
-        active_profile=request.app.state.active_profile,
+        active_profile=state.active_profile,
     )
 
 
+@app.get("/api/status", response_model=StatusResponse)
+async def get_status(request: Request):
+    return _build_status(request.app)
+
+
+@app.get("/api/ready")
+async def get_ready(request: Request):
+    """Readiness: 200 once the model is loaded, 503 while loading (or failed)."""
+    loader = request.app.state.loader
+    if not loader.ready:
+        return JSONResponse({"ready": False, **loader.status()}, status_code=503)
+    return {"ready": True}
+
+
+@app.get("/api/stats")
+async def get_stats(request: Request):
+    """Broadcast counters for the text and audio streams (drops, lag) and
+    event-loop stalls."""
+    audio_mgr = request.app.state.audio_manager
+    return {
+        "stream": request.app.state.monitor.stream_stats(),
+        "audio": audio_mgr.stream_stats() if audio_mgr is not None else None,
+        "event_loop": request.app.state.watchdog.stats(),
+    }
+
+
 @app.post("/api/start")
 async def start_capture(body: StartRequest, request: Request):
     capture = request.app.state.capture
@@ -175,32 +256,118 @@ async def set_profile(body: ProfileRequest, request: Request):
     return {"status": "ok", "active": body.profile}
 
 
+def _tts_model(app: FastAPI):
+    """The loaded model, if TTS is on. 404 without TTS, 503 while loading."""
+    if not ENABLE_TTS:
+        raise HTTPException(404, "TTS not enabled. Start with ENABLE_TTS=true")
+    model = app.state.loader.model
+    if model is None:
+        raise HTTPException(503, "Model is still loading")
+    return model
+
+
+@app.get("/api/voices")
+async def list_voices(request: Request):
+    from app.model_server import available_voices
+
+    model = _tts_model(request.app)
+    return {"active": os.path.basename(model.voice_path), "voices": available_voices()}
+
+
+@app.post("/api/voices")
+async def set_voice(body: VoiceRequest, request: Request):
+    """Switch the TTS voice to another reference audio in TTS_VOICES_DIR.
+    Takes effect from the next response."""
+    from app.model_server import available_voices
+
+    model = _tts_model(request.app)
+    # A plain file name from the listing: no separators, no ".."
+    if os.path.basename(body.voice) != body.voice or ".." in body.voice \
+            or body.voice not in available_voices():
+        raise HTTPException(400, f"Unknown voice. Choose one of: {', '.join(available_voices())}")
+    loop = asyncio.get_running_loop()
+    try:
+        key = await loop.run_in_executor(
+            None, model.switch_voice, os.path.join(TTS_VOICES_DIR, body.voice)
+        )
+    except Exception:
+        logger.exception(f"Voice switch to {body.voice} failed")
+        raise HTTPException(500, "Could not load the voice")
+    audio_mgr = request.app.state.audio_manager
+    if audio_mgr is not None and audio_mgr.phrase_cache is not None:
+        audio_mgr.phrase_cache.set_voice(key)
+    return {"status": "ok", "active": body.voice}
+
+
+@app.get("/api/rois")
+async def list_rois(request: Request):
+    monitor = request.app.state.monitor
+    return {"rois": [roi.to_dict() for roi in monitor.rois]}
+
+
+@app.post("/api/rois")
+async def set_roi(body: RoiRequest, request: Request):
+    """Add or replace a high-detail crop region (fractions of the frame)."""
+    monitor = request.app.state.monitor
+    try:
+        roi = Roi(body.name, body.x, body.y, body.w, body.h)
+        monitor.set_roi(roi)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return {"status": "ok", "roi": roi.to_dict()}
+
+
+@app.delete("/api/rois/{name}")
+async def delete_roi(name: str, request: Request):
+    monitor = request.app.state.monitor
+    if not monitor.remove_roi(name):
+        raise HTTPException(404, f"Unknown ROI: {name}")
+    return {"status": "ok"}
+
+
 @app.get("/api/stream")
 async def stream_sse(request: Request):
+    """Commentary as Server-Sent Events. Every event carries `id: <epoch>-<seq>`.
+
+    Text events (default "message" type) carry JSON {"cycle", "seq", "text"};
+    text is coalesced into batches of tokens by the monitor loop. `cycle_end`
+    events carry the cycle metadata plus "seq".
+
+    New clients first receive the current cycle from its start plus the last
+    STREAM_REPLAY_CYCLES cycles. Reconnecting clients (EventSource sends
+    Last-Event-ID automatically) resume right after the last event they saw.
+    The epoch changes on server restart, so stale ids are treated as new joins.
+    """
     monitor = request.app.state.monitor
+    epoch = request.app.state.stream_epoch
+    resume_after = _parse_event_id(request.headers.get("last-event-id", ""), epoch)
 
     async def event_generator():
-        q = monitor.subscribe()
+        if resume_after is not None:
+            sub = monitor.subscribe(after=resume_after)
+        else:
+            sub = monitor.subscribe(replay_cycles=STREAM_REPLAY_CYCLES)
         try:
             while True:
                 if await request.is_disconnected():
                     break
                 try:
-                    event = await asyncio.wait_for(q.get(), timeout=15.0)
-                    if event is None:
+                    event = await sub.get(timeout=15.0)
+                    data = event.data
+                    if data is None:
                         break
-                    elif isinstance(event, dict):
-                        yield f"event: cycle_end\ndata: {json.dumps(event)}\n\n"
+                    elif isinstance(data, dict):
+                        payload = json.dumps({**data, "seq": event.seq})
+                        yield f"event: cycle_end\nid: {epoch}-{event.seq}\ndata: {payload}\n\n"
                     else:
-                        # SSE data lines cannot contain newlines; split if needed
-                        for line in event.split("\n"):
-                            yield f"data: {line}\n"
-                        yield "\n"
+                        # JSON-encoded, so newlines in the text are escaped
+                        payload = json.dumps({"cycle": event.cycle, "seq": event.seq, "text": data})
+                        yield f"id: {epoch}-{event.seq}\ndata: {payload}\n\n"
                 except asyncio.TimeoutError:
                     # Keepalive comment to prevent proxy/browser timeout
                     yield ": keepalive\n\n"
         finally:
-            monitor.unsubscribe(q)
+            monitor.unsubscribe(sub)
 
     return StreamingResponse(
         event_generator(),
@@ -209,16 +376,70 @@ async def stream_sse(request: Request):
     )
 
 
+def _parse_event_id(value: str, epoch: int) -> Optional[int]:
+    """Seq from a Last-Event-ID of this server process, else None."""
+    event_epoch, _, seq = value.partition("-")
+    if event_epoch != str(epoch) or not seq.isdigit():
+        return None
+    return int(seq)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match check (RFC 9110 13.1.2): `*`, a comma-separated list,
+    weak comparison (a `W/` prefix is ignored on both sides)."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
 @app.get("/api/frame")
-async def get_frame(request: Request):
-    """Single frame snapshot (always real-time, no delay). For API consumers."""
+async def get_frame(request: Request, after: Optional[int] = None):
+    """Single frame snapshot (always real-time, no delay). For API consumers.
+
+    Serves the already-encoded latest display JPEG. The ETag is the frame
+    id: a matching If-None-Match returns 304. With `?after=<frame_id>` the
+    request waits (up to FRAME_LONGPOLL_TIMEOUT) until a newer frame exists,
+    and returns 204 if none arrived (304 if If-None-Match matches). The id
+    is also in X-Frame-Id.
+    """
     capture = request.app.state.capture
-    frame = capture.latest_frame
+    frame = capture.get_display_frame()
     if frame is None:
         raise HTTPException(404, "No frame available")
-    buf = io.BytesIO()
-    frame.save(buf, format="JPEG", quality=FRAME_JPEG_QUALITY)
-    return Response(content=buf.getvalue(), media_type="image/jpeg")
+    if after is not None and frame.frame_id <= after:
+        # The live MJPEG producer wakes waiters on every new display frame
+        broadcaster = request.app.state.mjpeg["live"]
+        broadcaster.acquire()
+        try:
+            deadline = time.monotonic() + FRAME_LONGPOLL_TIMEOUT
+            seq = 0
+            while frame.frame_id <= after:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                newer = await broadcaster.next_frame(seq, timeout=remaining)
+                seq = newer.seq
+                frame = capture.get_display_frame() or frame
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            broadcaster.release()
+
+    etag = f'"{frame.frame_id}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "X-Frame-Id": str(frame.frame_id),
+        "X-Frame-Timestamp": f"{frame.timestamp:.3f}",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    if after is not None and frame.frame_id <= after:
+        # Long-poll timeout: no newer frame, and this isn't a conditional request
+        return Response(status_code=204, headers=headers)
+    return Response(content=frame.jpeg, media_type="image/jpeg", headers=headers)
 
 
 @app.get("/api/mjpeg")
@@ -229,44 +450,53 @@ async def mjpeg_stream(request: Request):
     NOT from the inference SlidingWindow (2 FPS). This gives smooth
     playback at the source's original frame rate.
 
-    When STREAM_DELAY_INIT > 0, frames are served with an adaptive delay
-    that tracks inference latency via EMA. When STREAM_DELAY_INIT == 0,
-    frames are served in real-time (no sync).
+    When STREAM_DELAY_INIT > 0, frames are served with the adaptive sync
+    delay; `?live=1` (or STREAM_DELAY_INIT == 0) serves real-time frames.
+    All clients of a delay target share one producer; each client writes
+    the newest frame, so slow clients skip frames instead of stalling.
+    A frame is only sent when it changed, plus a keepalive every
+    MJPEG_KEEPALIVE seconds while the picture is static.
+
+    `?quality=` picks a MJPEG_VARIANTS rung (full, 720p, 360p) or "auto",
+    which steps down when the client's writes can't keep up with the frame
+    rate and back up when they can.
     """
-    capture = request.app.state.capture
-    monitor = request.app.state.monitor
-    # Match source FPS for smooth playback, fall back to MJPEG_FPS
-    display_fps = capture.source_fps if capture.source_fps > 0 else MJPEG_FPS
-    interval = 1.0 / display_fps
+    live = request.query_params.get("live") == "1" or STREAM_DELAY_INIT <= 0
+    broadcaster = request.app.state.mjpeg["live" if live else "synced"]
+    quality = request.query_params.get("quality", MJPEG_DEFAULT_QUALITY)
+    if quality != "auto" and quality not in MJPEG_VARIANTS:
+        raise HTTPException(400, f"Unknown quality. Choose auto or one of: {', '.join(MJPEG_VARIANTS)}")
+    adaptive = AdaptiveQuality() if quality == "auto" else None
 
     async def generate():
-        next_push = time.monotonic()
-        while True:
-            if await request.is_disconnected():
-                break
-
-            # Get JPEG from display buffer: delayed or real-time
-            if STREAM_DELAY_INIT > 0:
-                target_time = time.time() - monitor.target_delay
-                jpeg = capture.get_display_jpeg(target_time)
-            else:
-                jpeg = capture.get_display_jpeg()
-
-            if jpeg is not None:
-                yield (
-                    b"--frame\r\n"
-                    b"Content-Type: image/jpeg\r\n"
-                    b"Content-Length: " + str(len(jpeg)).encode() + b"\r\n"
-                    b"\r\n" + jpeg + b"\r\n"
-                )
-
-            # Consistent timing at source frame rate
-            next_push += interval
-            sleep_for = next_push - time.monotonic()
-            if sleep_for > 0:
-                await asyncio.sleep(sleep_for)
-            else:
-                next_push = time.monotonic()
+        broadcaster.acquire()
+        keepalive = MJPEG_KEEPALIVE if MJPEG_KEEPALIVE > 0 else 5.0
+        try:
+            seq = 0
+            last_frame_id = None
+            while True:
+                if await request.is_disconnected():
+                    break
+                variant = adaptive.current if adaptive is not None else quality
+                try:
+                    frame = await broadcaster.next_frame(seq, timeout=keepalive)
+                except asyncio.TimeoutError:
+                    frame = broadcaster.latest
+                    if MJPEG_KEEPALIVE > 0 and frame is not None:
+                        # Resend the current frame
+                        yield (await broadcaster.variant(frame, variant))[1]
+                    continue
+                seq = frame.seq
+                if frame.frame_id == last_frame_id:
+                    continue
+                last_frame_id = frame.frame_id
+                _, part = await broadcaster.variant(frame, variant)
+                t_write = time.monotonic()
+                yield part
+                if adaptive is not None:
+                    adaptive.record(time.monotonic() - t_write, broadcaster.frame_interval)
+        finally:
+            broadcaster.release()
 
     return StreamingResponse(
         generate(),
@@ -275,47 +505,117 @@ async def mjpeg_stream(request: Request):
     )
 
 
+@app.websocket("/api/ws")
+async def websocket_stream(websocket: WebSocket):
+    """Text, cycle metadata, audio, video and status over one WebSocket.
+
+    Binary framing and message types: see app/ws_stream.py and
+    docs/streaming_api.md. Query params: video=0 / audio=0 to opt out,
+    quality= as for /api/mjpeg.
+    """
+    state = websocket.app.state
+    video = websocket.query_params.get("video", "1") != "0"
+    audio = websocket.query_params.get("audio", "1") != "0"
+    quality = websocket.query_params.get("quality", MJPEG_DEFAULT_QUALITY)
+    if quality != "auto" and quality not in MJPEG_VARIANTS:
+        quality = "auto"
+    await websocket.accept()
+    session = WsSession(websocket, WS_SEND_TIMEOUT)
+    await session.run(
+        state.monitor,
+        state.mjpeg["synced" if STREAM_DELAY_INIT > 0 else "live"] if video else None,
+        state.audio_manager if audio else None,
+        lambda: _build_status(websocket.app).model_dump(),
+        replay_cycles=STREAM_REPLAY_CYCLES,
+        status_interval=WS_STATUS_INTERVAL,
+        video_quality=quality,
+    )
+
+
 @app.get("/api/audio-stream")
 async def audio_stream(request: Request):
-    """Raw PCM audio stream from TTS output.
-
-    Format: 48kHz, mono, int16 little-endian.
+    """Audio stream from TTS output.
+
+    ?format= selects the encoding (see app/audio_codecs.py):
+    pcm48 (default, 48kHz mono int16 LE), pcm24 (24kHz, no upsampling),
+    adpcm (IMA ADPCM blocks) or opus (length-prefixed packets, if available).
+    Audio is paced at real-time rate (AUDIO_PACE_LEAD ahead of playback).
+    ?framed=1 prefixes every piece with a header (seq, play time), see
+    app/audio_pacer.py.
     Use with: ffplay -f s16le -ar 48000 -ac 1 <url>
+    Listeners joining mid-utterance start at the utterance's first chunk.
+    Players report playback progress to /api/audio-ack using the
+    X-Audio-Stream-Id response header.
     Returns 404 if TTS is not enabled.
     """
     audio_mgr = request.app.state.audio_manager
     if audio_mgr is None:
         raise HTTPException(404, "TTS not enabled. Start with ENABLE_TTS=true")
+    encoding = request.query_params.get("format", "pcm48")
+    if encoding not in available_formats():
+        raise HTTPException(400, f"Unknown format. Choose one of: {', '.join(available_formats())}")
+
+    framed = request.query_params.get("framed") == "1"
+    # The id goes out in the headers; the player is only registered once the
+    # body is streamed, so a client gone before that leaves nothing behind
+    player_id = AudioManager.new_player_id()
 
     async def generate():
-        q = audio_mgr.subscribe()
+        sub = None
         try:
+            audio_mgr.add_player(encoding, player_id)
+            sub = audio_mgr.subscribe(join_utterance=True, encoding=encoding)
+            pacer = AudioPacer(sub, encoding, audio_mgr.get_player(player_id))
             while True:
                 if await request.is_disconnected():
                     break
                 try:
-                    data = await asyncio.wait_for(q.get(), timeout=15.0)
-                    if data is None:
+                    frame = await pacer.next(timeout=15.0)
+                    if frame is None:
                         break
-                    yield data
+                    yield frame.framed() if framed else frame.data
                 except asyncio.TimeoutError:
                     continue
         finally:
-            audio_mgr.unsubscribe(q)
-
+            if sub is not None:
+                audio_mgr.unsubscribe(sub)
+            audio_mgr.remove_player(player_id)
+
+    stream = AUDIO_FORMATS[encoding]
+    headers = {
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+        "X-Audio-Rate": str(stream["rate"]),
+        "X-Audio-Channels": "1",
+        "X-Audio-Format": stream["format"],
+        "X-Audio-Stream-Id": player_id,
+        "X-Audio-Framed": "1" if framed else "0",
+    }
+    if encoding == "adpcm":
+        headers["X-Audio-Block-Align"] = str(ADPCM_BLOCK_BYTES)
     return StreamingResponse(
         generate(),
         media_type="application/octet-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "X-Accel-Buffering": "no",
-            "X-Audio-Rate": "48000",
-            "X-Audio-Channels": "1",
-            "X-Audio-Format": "s16le",
-        },
+        headers=headers,
     )
 
 
+@app.post("/api/audio-ack")
+async def audio_ack(body: AudioAckRequest, request: Request):
+    """Playback position report from an /api/audio-stream player.
+
+    stream_id is the X-Audio-Stream-Id of the player's stream; played is the
+    seconds of audio it has played since connecting. Recent reports drive
+    the audio gate (see AUDIO_CLOCK in config.py).
+    """
+    audio_mgr = request.app.state.audio_manager
+    if audio_mgr is None:
+        raise HTTPException(404, "TTS not enabled. Start with ENABLE_TTS=true")
+    if not audio_mgr.ack(body.stream_id, body.played):
+        raise HTTPException(404, "Unknown audio stream")
+    return {"status": "ok"}
+
+
 # --- Entrypoint ---
 
 
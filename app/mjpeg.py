@@ -0,0 +1,226 @@
+"""Shared MJPEG fan-out: one producer task per delay target.
+
+Every /api/mjpeg client used to run its own timer, look up the delayed frame
+under the display lock and build the multipart header. MjpegBroadcaster does
+that once per tick and stores the result in a single "latest" slot. Clients
+wait for the slot to change and write whatever is newest, so a slow client
+skips frames instead of falling behind or holding anyone else up.
+
+A new frame is only published when the display frame actually changed
+(source FPS below the tick rate, a stalled source, or a delay target outside
+the buffer all repeat the same frame), so idle streams send nothing.
+
+Each client picks a rung of a resolution/quality ladder (MJPEG_VARIANTS).
+Variants are encoded lazily, at most once per frame and shared by every
+client on that rung, so nothing is encoded for rungs nobody watches.
+AdaptiveQuality moves "auto" clients along the ladder by how long their
+writes take.
+
+The producer only runs while at least one client is connected.
+"""
+
+import asyncio
+import io
+import logging
+import time
+from typing import Callable, Optional
+
+from PIL import Image
+
+from app.config import MJPEG_VARIANTS
+from app.event_loop import image_executor
+from app.frame_capture import DisplayFrame, FrameCapture
+
+logger = logging.getLogger(__name__)
+
+
+def multipart_part(jpeg: bytes) -> bytes:
+    """Wrap a JPEG as one part of a multipart/x-mixed-replace stream."""
+    return (
+        b"--frame\r\n"
+        b"Content-Type: image/jpeg\r\n"
+        b"Content-Length: " + str(len(jpeg)).encode() + b"\r\n"
+        b"\r\n" + jpeg + b"\r\n"
+    )
+
+
+def encode_variant(jpeg: bytes, max_height: int, quality: int) -> bytes:
+    """Re-encode a JPEG at most max_height pixels tall. CPU-bound.
+
+    Returns the input unchanged if it is already small enough.
+    """
+    image = Image.open(io.BytesIO(jpeg))
+    width, height = image.size
+    if height <= max_height:
+        return jpeg
+    size = (max(1, round(width * max_height / height)), max_height)
+    # draft() lets the JPEG decoder downscale by 1/2, 1/4 or 1/8 while
+    # decoding, which is much cheaper than decoding at full size
+    image.draft("RGB", size)
+    buf = io.BytesIO()
+    image.convert("RGB").resize(size, Image.BILINEAR).save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+
+class MjpegFrame:
+    """One produced frame: JPEG plus its ready-to-send multipart part.
+
+    Smaller ladder variants are added to `variants` on first request.
+    """
+
+    __slots__ = ("seq", "frame_id", "timestamp", "jpeg", "part", "variants")
+
+    def __init__(self, seq: int, frame: DisplayFrame):
+        self.seq = seq  # publish counter of this broadcaster
+        self.frame_id = frame.frame_id
+        self.timestamp = frame.timestamp  # capture time (wall clock)
+        self.jpeg = frame.jpeg
+        self.part = multipart_part(frame.jpeg)
+        # variant name -> future of (jpeg, multipart part)
+        self.variants: dict[str, asyncio.Future] = {}
+
+
+class MjpegBroadcaster:
+    """Produces the display frame for one delay target at the source frame rate.
+
+    Args:
+        capture: FrameCapture whose display buffer is read.
+        delay: Returns the current delay in seconds (0 = real time).
+        fps: Returns the current tick rate (e.g. the source FPS).
+    """
+
+    def __init__(self, capture: FrameCapture, delay: Callable[[], float],
+                 fps: Callable[[], float]):
+        self._capture = capture
+        self._delay = delay
+        self._fps = fps
+        self._latest: Optional[MjpegFrame] = None
+        self._seq = 0
+        self._changed: Optional[asyncio.Future] = None
+        self._clients = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def client_count(self) -> int:
+        return self._clients
+
+    @property
+    def latest(self) -> Optional[MjpegFrame]:
+        return self._latest
+
+    @property
+    def frame_interval(self) -> float:
+        """Seconds between producer ticks."""
+        return 1.0 / self._fps()
+
+    def acquire(self) -> None:
+        """Register a client; starts the producer for the first one."""
+        self._clients += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def release(self) -> None:
+        """Unregister a client; stops the producer after the last one."""
+        self._clients = max(0, self._clients - 1)
+        if self._clients == 0 and self._task is not None:
+            self._task.cancel()
+            self._task = None
+            self._latest = None
+
+    async def next_frame(self, after_seq: int, timeout: Optional[float] = None) -> MjpegFrame:
+        """Newest frame with seq > after_seq, waiting for one if needed.
+
+        Raises:
+            asyncio.TimeoutError: if no new frame was produced within timeout.
+        """
+        while self._latest is None or self._latest.seq <= after_seq:
+            if self._changed is None:
+                self._changed = asyncio.get_running_loop().create_future()
+            await asyncio.wait_for(asyncio.shield(self._changed), timeout)
+        return self._latest
+
+    async def variant(self, frame: MjpegFrame, name: str) -> tuple[bytes, bytes]:
+        """(jpeg, multipart part) of one ladder variant of frame.
+
+        Encoded on the image executor on first request; concurrent and later
+        requests for the same variant share that result.
+        """
+        max_height, quality = MJPEG_VARIANTS[name]
+        if max_height <= 0:
+            return frame.jpeg, frame.part
+        future = frame.variants.get(name)
+        if future is None:
+            future = asyncio.ensure_future(
+                image_executor.run(_encode_part, frame.jpeg, max_height, quality)
+            )
+            frame.variants[name] = future
+        return await asyncio.shield(future)
+
+    def _publish(self, frame: DisplayFrame) -> None:
+        self._seq += 1
+        self._latest = MjpegFrame(self._seq, frame)
+        if self._changed is not None and not self._changed.done():
+            self._changed.set_result(None)
+        self._changed = None
+
+    async def _run(self) -> None:
+        next_push = time.monotonic()
+        while True:
+            delay = self._delay()
+            frame = self._capture.get_display_frame(time.time() - delay if delay > 0 else None)
+            if frame is not None and (self._latest is None
+                                      or frame.frame_id != self._latest.frame_id):
+                self._publish(frame)
+
+            # Consistent timing at source frame rate
+            next_push += 1.0 / self._fps()
+            sleep_for = next_push - time.monotonic()
+            if sleep_for > 0:
+                await asyncio.sleep(sleep_for)
+            else:
+                next_push = time.monotonic()
+
+
+def _encode_part(jpeg: bytes, max_height: int, quality: int) -> tuple[bytes, bytes]:
+    small = encode_variant(jpeg, max_height, quality)
+    return small, multipart_part(small)
+
+
+class AdaptiveQuality:
+    """Chooses a ladder rung for one client from how long its writes take.
+
+    A write that takes most of a frame interval means the connection can't
+    keep up: step down a rung. Writes that stay well under it for a while:
+    try one rung up. Rungs are ordered best first (MJPEG_VARIANTS order).
+    """
+
+    _ALPHA = 0.3  # EMA weight of the newest write
+    _DOWN = 0.8  # step down above this share of the frame interval
+    _UP = 0.25  # step up below this share...
+    _UP_AFTER = 5.0  # ...sustained for this many seconds
+
+    def __init__(self, rungs: Optional[list[str]] = None):
+        self._rungs = rungs or list(MJPEG_VARIANTS)
+        self._index = 0
+        self._load = 0.0
+        self._since = time.monotonic()  # last rung change
+
+    @property
+    def current(self) -> str:
+        return self._rungs[self._index]
+
+    def record(self, write_seconds: float, frame_interval: float) -> str:
+        """Fold in one write; returns the rung to use for the next frame."""
+        load = write_seconds / max(frame_interval, 1e-3)
+        self._load = (1 - self._ALPHA) * self._load + self._ALPHA * load
+        now = time.monotonic()
+        if self._load > self._DOWN and self._index < len(self._rungs) - 1:
+            self._index += 1
+            self._load = 0.0
+            self._since = now
+        elif (self._load < self._UP and self._index > 0
+              and now - self._since >= self._UP_AFTER):
+            self._index -= 1
+            self._load = 0.0
+            self._since = now
+        return self.current
@@ -0,0 +1,84 @@
+"""Background model loading, so the server is up while the model loads.
+
+Loading the model takes most of the startup time. ModelLoader runs it in a
+daemon thread; capture, the MJPEG preview and the streams work meanwhile,
+and MonitorLoop starts cycles once the model is handed over. /api/status
+shows the stage, /api/ready answers 200 once the model is ready.
+
+app.model_server (torch, transformers) is only imported in that thread, so
+importing app.main stays cheap (see scripts/test_import_time.py).
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    from app.model_server import ModelServer
+
+logger = logging.getLogger(__name__)
+
+
+class ModelLoader:
+    """Loads the ModelServer in a daemon thread and reports progress.
+
+    `progress` is coarse (fraction of the usual load time per stage, see
+    ModelServer); the weights stage takes most of it.
+    """
+
+    def __init__(self):
+        self.model: Optional["ModelServer"] = None
+        self.stage = "waiting"
+        self.progress = 0.0
+        self.error: Optional[str] = None
+        self._started_at = 0.0
+        self._ready_at = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self.model is not None
+
+    def start(self, loop: asyncio.AbstractEventLoop,
+              on_ready: Callable[["ModelServer"], None]) -> None:
+        """Start loading. on_ready(model) is called on the event loop.
+
+        A daemon thread, so a shutdown during loading doesn't wait for it.
+        """
+        self._started_at = time.time()
+        threading.Thread(target=self._load, args=(loop, on_ready),
+                         name="model-loader", daemon=True).start()
+
+    def status(self) -> dict:
+        elapsed = (self._ready_at or time.time()) - self._started_at if self._started_at else 0.0
+        return {
+            "stage": self.stage,
+            "progress": round(self.progress, 2),
+            "elapsed_sec": round(elapsed, 1),
+            "error": self.error,
+        }
+
+    def _set_progress(self, stage: str, fraction: float) -> None:
+        self.stage = stage
+        self.progress = fraction
+
+    def _load(self, loop: asyncio.AbstractEventLoop,
+              on_ready: Callable[["ModelServer"], None]) -> None:
+        try:
+            from app.model_server import ModelServer
+
+            model = ModelServer(on_progress=self._set_progress)
+        except Exception:
+            logger.exception("Model loading failed")
+            self.stage = "failed"
+            self.error = "Model loading failed, see the server log"
+            return
+        loop.call_soon_threadsafe(self._finish, model, on_ready)
+
+    def _finish(self, model: "ModelServer", on_ready: Callable[["ModelServer"], None]) -> None:
+        self._ready_at = time.time()
+        self.model = model
+        self._set_progress("ready", 1.0)
+        logger.info(f"Model ready after {self._ready_at - self._started_at:.1f}s")
+        on_ready(model)
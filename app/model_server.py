@@ -1,8 +1,10 @@
 import os
 import logging
+import threading
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Generator, Optional
+from typing import Callable, Generator, Optional
 
 # Environment must be set BEFORE importing transformers/torch
 from app.config import CUDA_VISIBLE_DEVICES, MODEL_PATH
@@ -12,7 +14,13 @@ os.environ["HF_HOME"] = str(Path(MODEL_PATH).parent / ".hf_cache")
 
 import torch  # noqa: E402
 from PIL import Image  # noqa: E402
-from transformers import AutoConfig, AutoModel, AutoTokenizer  # noqa: E402
+from transformers import (  # noqa: E402
+    AutoConfig,
+    AutoModel,
+    AutoTokenizer,
+    StoppingCriteria,
+    StoppingCriteriaList,
+)
 
 from app.config import (  # noqa: E402
     ENABLE_TTS,
@@ -24,7 +32,11 @@ from app.config import (  # noqa: E402
     TTS_FLOAT16,
     TTS_MAX_NEW_TOKENS,
     TTS_MODEL_DIR,
+    TTS_VOICE_CACHE_DIR,
+    TTS_VOICES_DIR,
 )
+from app.phrase_cache import voice_key  # noqa: E402
+from app.voice_cache import load_voice_cache, save_voice_cache  # noqa: E402
 
 logger = logging.getLogger(__name__)
 
@@ -38,10 +50,43 @@ class InferenceResult:
     is_last: bool
 
 
+def available_voices() -> list[str]:
+    """Reference audio files in TTS_VOICES_DIR (file names)."""
+    if not os.path.isdir(TTS_VOICES_DIR):
+        return []
+    return sorted(
+        name for name in os.listdir(TTS_VOICES_DIR)
+        if name.lower().endswith(".wav") and os.path.isfile(os.path.join(TTS_VOICES_DIR, name))
+    )
+
+
+class _StopOnEvent(StoppingCriteria):
+    """Ends generate() once the event is set.
+
+    Streaming chat() runs generate() in a background thread, so a caller
+    that stops reading the stream doesn't stop generation by itself.
+    """
+
+    def __init__(self, event: threading.Event):
+        self._event = event
+
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        return self._event.is_set()
+
+
 class ModelServer:
     """Loads MiniCPM-o 4.5 and provides text and text+audio inference."""
 
-    def __init__(self, model_path: str = MODEL_PATH, enable_tts: bool = ENABLE_TTS):
+    def __init__(self, model_path: str = MODEL_PATH, enable_tts: bool = ENABLE_TTS,
+                 on_progress: Optional[Callable[[str, float], None]] = None):
+        """Load the model (and TTS). Takes a while.
+
+        Args:
+            on_progress: Called with (stage, fraction of the usual load time)
+                as loading proceeds, e.g. for /api/status.
+        """
+        progress = on_progress or (lambda stage, fraction: None)
+        progress("config", 0.0)
         hf_cache = os.environ["HF_HOME"]
         os.makedirs(hf_cache, exist_ok=True)
         logger.info(f"CUDA_VISIBLE_DEVICES={CUDA_VISIBLE_DEVICES}, HF_HOME={hf_cache}")
@@ -56,6 +101,7 @@ class ModelServer:
         dtype = torch.float16 if is_awq else torch.bfloat16
         logger.info(f"Model type: {'AWQ INT4' if is_awq else 'BF16'}, dtype: {dtype}")
 
+        progress("weights", 0.05)
         self.model = AutoModel.from_pretrained(
             model_path,
             config=config,
@@ -63,15 +109,22 @@ class ModelServer:
             attn_implementation="sdpa",
             torch_dtype=dtype,
         )
+        progress("gpu", 0.6)
         self.model.eval().cuda()
         self.is_awq = is_awq
         self.tts_enabled = enable_tts
+        self.voice: Optional[str] = None  # voice_key() of the active voice
+        self.voice_path: Optional[str] = None
+        # Held while the vocoder generates; a voice switch waits for it
+        self._tts_lock = threading.Lock()
 
+        progress("tokenizer", 0.7)
         self.tokenizer = AutoTokenizer.from_pretrained(
             model_path, trust_remote_code=True
         )
 
         if enable_tts:
+            progress("tts", 0.75)
             self._init_tts()
 
         self._session_counter = 0
@@ -79,8 +132,6 @@ class ModelServer:
 
     def _init_tts(self) -> None:
         """Initialize TTS vocoder and reference audio cache."""
-        import librosa
-
         logger.info(f"Initializing TTS vocoder from {TTS_MODEL_DIR}")
 
         # AWQ model's init_tts() defaults to CosyVoice2 (incompatible with
@@ -95,19 +146,76 @@ class ModelServer:
 
         self.model.init_tts(**tts_kwargs)
         self.model.reset_session(reset_token2wav_cache=True)
-
-        # Load reference audio and prime the vocoder cache
-        logger.info(f"Loading reference audio from {REF_AUDIO_PATH}")
-        ref_audio, _ = librosa.load(REF_AUDIO_PATH, sr=16000, mono=True)
-        self.model.init_token2wav_cache(prompt_speech_16k=ref_audio)
+        self._load_voice(REF_AUDIO_PATH)
 
         logger.info("TTS initialized successfully")
 
+    def switch_voice(self, path: str) -> str:
+        """Make the reference audio at path the TTS voice. Waits for a running
+        generation to finish. Returns the new voice key.
+
+        On failure the previous voice is restored and the error re-raised.
+        """
+        with self._tts_lock:
+            previous = self.voice_path
+            self.model.reset_session(reset_token2wav_cache=True)
+            try:
+                self._load_voice(path)
+            except Exception:
+                if previous is not None:
+                    try:
+                        self._load_voice(previous)
+                    except Exception:
+                        logger.exception(f"Could not restore voice {os.path.basename(previous)}, "
+                                         "TTS has no voice until the next switch")
+                raise
+            return self.voice
+
+    def _load_voice(self, path: str) -> None:
+        """Prime the vocoder's prompt cache for a voice, from disk if saved.
+
+        init_token2wav_cache() leaves the computed cache (speaker embedding,
+        prompt tokens and flow/hift state) in model.token2wav_cache. It is
+        saved as a flat dict of tensors and loaded with weights_only (see
+        app/voice_cache.py), so a cache file can't run code. A file that
+        doesn't load falls back to computing; a failed save only logs.
+        """
+        key = voice_key(path)
+        cache_path = os.path.join(TTS_VOICE_CACHE_DIR, f"{key}.pt") if TTS_VOICE_CACHE_DIR else None
+        if cache_path and os.path.isfile(cache_path):
+            try:
+                self.model.token2wav_cache = load_voice_cache(cache_path, "cuda")
+                self.voice, self.voice_path = key, path
+                logger.info(f"Voice {os.path.basename(path)}: vocoder cache loaded from {cache_path}")
+                return
+            except Exception as e:
+                logger.warning(f"Voice cache {cache_path} unusable, recomputing: {e}")
+
+        import librosa
+
+        t0 = time.perf_counter()
+        logger.info(f"Loading reference audio from {path}")
+        ref_audio, _ = librosa.load(path, sr=16000, mono=True)
+        self.model.init_token2wav_cache(prompt_speech_16k=ref_audio)
+        self.voice, self.voice_path = key, path
+        logger.info(f"Voice {os.path.basename(path)}: vocoder cache computed "
+                    f"in {time.perf_counter() - t0:.1f}s")
+
+        cache = getattr(self.model, "token2wav_cache", None)
+        if cache_path and cache is not None:
+            try:
+                save_voice_cache(cache, cache_path)
+            except Exception as e:
+                # Never fail a model load or voice switch over the cache file
+                logger.warning(f"Could not save voice cache to {cache_path}: {e}")
+
     def infer(
         self,
         frames: list[Image.Image],
         instruction: str,
         stream: bool = True,
+        max_slice_nums: Optional[int] = None,
+        stop: Optional[threading.Event] = None,
     ) -> Generator[str, None, None]:
         """Run inference on a list of frames with an instruction.
 
@@ -115,6 +223,8 @@ class ModelServer:
             frames: List of PIL Images (RGB) to analyze.
             instruction: User instruction, e.g. "describe what's happening".
             stream: If True, yield text chunks. If False, yield a single result.
+            max_slice_nums: Per-call detail override. None uses MAX_SLICE_NUMS.
+            stop: Streaming only: set it to end generation early.
 
         Yields:
             Text chunks from the model.
@@ -126,7 +236,7 @@ class ModelServer:
             "msgs": msgs,
             "tokenizer": self.tokenizer,
             "use_image_id": False,
-            "max_slice_nums": MAX_SLICE_NUMS,
+            "max_slice_nums": max_slice_nums or MAX_SLICE_NUMS,
             "max_inp_length": MAX_INP_LENGTH,
             "max_new_tokens": MAX_NEW_TOKENS,
             "suppress_tokens": SUPPRESS_TOKENS,
@@ -136,6 +246,8 @@ class ModelServer:
             params["stream"] = True
             params["num_beams"] = 1
             params["do_sample"] = True
+            if stop is not None:
+                params["stopping_criteria"] = StoppingCriteriaList([_StopOnEvent(stop)])
 
             streamer = self.model.chat(**params)
             for chunk in streamer:
@@ -150,6 +262,7 @@ class ModelServer:
         self,
         frames: list[Image.Image],
         instruction: str,
+        max_slice_nums: Optional[int] = None,
     ) -> Generator[InferenceResult, None, None]:
         """Streaming inference with TTS audio output.
 
@@ -158,41 +271,44 @@ class ModelServer:
         Args:
             frames: List of PIL Images (RGB) to analyze.
             instruction: User instruction text.
+            max_slice_nums: Per-call detail override. None uses MAX_SLICE_NUMS.
 
         Yields:
             InferenceResult with text chunks and optional audio waveform.
         """
         if not self.tts_enabled:
-            for chunk in self.infer(frames, instruction, stream=True):
+            for chunk in self.infer(frames, instruction, stream=True,
+                                    max_slice_nums=max_slice_nums):
                 yield InferenceResult(text=chunk, audio=None, is_last=False)
             yield InferenceResult(text="", audio=None, is_last=True)
             return
 
-        self._session_counter += 1
-        sid = str(self._session_counter)
-        effective_max_tokens = TTS_MAX_NEW_TOKENS if TTS_MAX_NEW_TOKENS > 0 else MAX_NEW_TOKENS
-
-        msg = {"role": "user", "content": frames + [instruction]}
-        self.model.streaming_prefill(
-            session_id=sid,
-            msgs=[msg],
-            max_slice_nums=MAX_SLICE_NUMS,
-            use_tts_template=True,
-            is_last_chunk=True,
-        )
-
-        for wav_chunk, text_chunk in self.model.streaming_generate(
-            session_id=sid,
-            generate_audio=True,
-            use_tts_template=True,
-            max_new_tokens=effective_max_tokens,
-            do_sample=True,
-        ):
-            if wav_chunk is None and text_chunk is None:
-                break
-            yield InferenceResult(
-                text=text_chunk or "",
-                audio=wav_chunk,
-                is_last=False,
+        with self._tts_lock:
+            self._session_counter += 1
+            sid = str(self._session_counter)
+            effective_max_tokens = TTS_MAX_NEW_TOKENS if TTS_MAX_NEW_TOKENS > 0 else MAX_NEW_TOKENS
+
+            msg = {"role": "user", "content": frames + [instruction]}
+            self.model.streaming_prefill(
+                session_id=sid,
+                msgs=[msg],
+                max_slice_nums=max_slice_nums or MAX_SLICE_NUMS,
+                use_tts_template=True,
+                is_last_chunk=True,
             )
-        yield InferenceResult(text="", audio=None, is_last=True)
+
+            for wav_chunk, text_chunk in self.model.streaming_generate(
+                session_id=sid,
+                generate_audio=True,
+                use_tts_template=True,
+                max_new_tokens=effective_max_tokens,
+                do_sample=True,
+            ):
+                if wav_chunk is None and text_chunk is None:
+                    break
+                yield InferenceResult(
+                    text=text_chunk or "",
+                    audio=wav_chunk,
+                    is_last=False,
+                )
+            yield InferenceResult(text="", audio=None, is_last=True)
@@ -1,25 +1,50 @@
 import asyncio
+import functools
 import logging
+import threading
 import time
-from typing import AsyncGenerator, Optional, Union
+from typing import TYPE_CHECKING, AsyncGenerator, Optional, Union
 
 import numpy as np
 from PIL import Image
 
 from app.audio_manager import AudioManager
+from app.broadcast import BroadcastRing, RingSubscriber, TokenCoalescer
 from app.config import (
     CHANGE_THRESHOLD,
     COMMENTATOR_PROMPT,
     ENABLE_TTS,
+    FRAME_SELECTION,
     FRAME_STRIDE,
     FRAMES_PER_INFERENCE,
     INFERENCE_INTERVAL,
+    MAX_NEW_TOKENS,
+    MAX_SLICE_NUMS,
+    MOSAIC_GRID,
+    ROI_FRAME_SLICE_NUMS,
+    ROI_GLOBAL_SLICE_NUMS,
+    ROI_REGIONS,
+    STREAM_COALESCE_MS,
+    STREAM_COALESCE_TOKENS,
+    STREAM_RING_SIZE,
     STREAM_DELAY_EMA_ALPHA,
     STREAM_DELAY_INIT,
+    STREAM_DELAY_MARGIN,
+    STREAM_DELAY_MAX_STEP,
+    STREAM_DELAY_MODEL,
+    STREAM_DELAY_RLS_FORGETTING,
+    TTS_MAX_NEW_TOKENS,
     TTS_PAUSE_AFTER,
 )
-from app.model_server import ModelServer
-from app.sliding_window import SlidingWindow
+from app.event_loop import image_executor
+from app.latency_model import LatencyPredictor, cycle_features
+from app.mosaic import pack_mosaics
+from app.repetition import RepeatDetector
+from app.roi import MAX_ROIS, Roi, parse_roi_regions
+from app.sliding_window import FrameMeta, SlidingWindow
+
+if TYPE_CHECKING:
+    from app.model_server import ModelServer  # imports torch; loaded in the background
 
 logger = logging.getLogger(__name__)
 
@@ -32,12 +57,22 @@ class MonitorLoop:
     - ACTIVE: periodic inference with current instruction
 
     Uses pub/sub for output: multiple consumers (SSE, WebSocket, test scripts)
-    can each subscribe and independently receive all events.
+    can each subscribe and independently receive all events. Events go into
+    one shared BroadcastRing; each subscriber reads with its own cursor.
+
+    live=False is for the offline batch runner: frame timestamps are then
+    video positions, not wall-clock times, so there is no frame latency to
+    measure and the sync delay model is left alone. latency_sec reports the
+    cycle's processing time instead.
     """
 
-    def __init__(self, model: ModelServer, window: SlidingWindow,
-                 audio_manager: Optional[AudioManager] = None):
+    # Seconds between audio-gate checks while waiting for playback to end
+    _AUDIO_GATE_POLL = 0.25
+
+    def __init__(self, model: Optional["ModelServer"], window: SlidingWindow,
+                 audio_manager: Optional[AudioManager] = None, live: bool = True):
         self._model = model
+        self._live = live
         self._window = window
         self._audio_manager = audio_manager
         self._instruction: Optional[str] = None
@@ -48,13 +83,36 @@ class MonitorLoop:
         self._started = asyncio.Event()
         self._cycle_event = asyncio.Event()
         # Events: str = text chunk, dict = cycle metadata, None = stop
-        self._subscribers: set[asyncio.Queue[Union[str, dict, None]]] = set()
+        self._ring = BroadcastRing(STREAM_RING_SIZE)
+        self._at_cycle_start = True  # next published event opens a cycle
         self._cycle_count = 0
         self._last_response: str = ""
+        self._repeats = RepeatDetector()
+        # The repeat history is cleared at the next cycle start, not while
+        # the inference thread may be reading it
+        self._repeats_reset = False
         self._last_instruction: Optional[str] = None
-        self._last_inference_frame: Optional[Image.Image] = None
-        # Adaptive sync: EMA-smoothed delay for MJPEG stream
+        self._last_inference_thumb: Optional[np.ndarray] = None
+        # Adaptive sync: delay for MJPEG stream, predicted per cycle (RLS)
+        # or EMA-smoothed. RLS falls back to the EMA while warming up.
         self._target_delay: float = STREAM_DELAY_INIT
+        self._latency_model: Optional[LatencyPredictor] = (
+            LatencyPredictor(forgetting=STREAM_DELAY_RLS_FORGETTING)
+            if STREAM_DELAY_MODEL == "rls" else None
+        )
+        self._cycle_features: Optional[np.ndarray] = None
+        self._predicted_latency: Optional[float] = None
+        # High-detail crops of the newest frame, keyed by name
+        self._rois: dict[str, Roi] = {r.name: r for r in parse_roi_regions(ROI_REGIONS)}
+
+    def set_model(self, model: "ModelServer") -> None:
+        """Hand over the model once it has loaded (constructed with None).
+
+        Until then no cycle runs; an instruction set meanwhile starts the
+        first cycle right away.
+        """
+        self._model = model
+        self._cycle_event.set()
 
     @property
     def mode(self) -> str:
@@ -81,6 +139,28 @@ class MonitorLoop:
         """Current adaptive delay for MJPEG sync (seconds)."""
         return self._target_delay
 
+    @property
+    def rois(self) -> list[Roi]:
+        return list(self._rois.values())
+
+    def set_roi(self, roi: Roi) -> None:
+        """Add or replace a region of interest. Applies from the next cycle.
+
+        Raises:
+            ValueError: if adding a new ROI would exceed MAX_ROIS.
+        """
+        if roi.name not in self._rois and len(self._rois) >= MAX_ROIS:
+            raise ValueError(f"At most {MAX_ROIS} ROIs are supported")
+        self._rois[roi.name] = roi
+        logger.info(f"ROI set: {roi.name} ({roi.x}, {roi.y}, {roi.w}, {roi.h})")
+
+    def remove_roi(self, name: str) -> bool:
+        """Remove a region of interest. Returns False if it did not exist."""
+        removed = self._rois.pop(name, None) is not None
+        if removed:
+            logger.info(f"ROI removed: {name}")
+        return removed
+
     def set_instruction(self, instruction: Optional[str]) -> None:
         """Set or clear the current instruction.
 
@@ -92,7 +172,8 @@ class MonitorLoop:
         self._instruction = instruction
         if instruction and instruction != old:
             self._last_response = ""
-            self._last_inference_frame = None
+            self._repeats_reset = True
+            self._last_inference_thumb = None
             if not self._generating:
                 self._cycle_event.set()
         logger.info(f"Instruction {'set' if instruction else 'cleared'}: {instruction}")
@@ -101,46 +182,65 @@ class MonitorLoop:
         """Switch the system prompt (e.g. when user selects a different profile)."""
         self._commentator_prompt = prompt
         self._last_response = ""
-        self._last_inference_frame = None
+        self._repeats_reset = True
+        self._last_inference_thumb = None
         logger.info(f"Commentator prompt changed ({len(prompt)} chars)")
 
-    def subscribe(self) -> asyncio.Queue[Union[str, dict, None]]:
-        """Subscribe to output events. Returns a queue that receives:
+    def subscribe(self, after: Optional[int] = None,
+                  replay_cycles: Optional[int] = None) -> RingSubscriber:
+        """Subscribe to output events. Returns a cursor whose get() yields a
+        BroadcastEvent (seq, cycle, data) where data is:
 
         - str: text chunk from model
         - dict: cycle metadata (type="cycle_end", timing, frame IDs)
         - None: stop signal
+
+        Args:
+            after: Resume after this seq (SSE Last-Event-ID on reconnect).
+            replay_cycles: Late join: start at the current cycle's first event
+                plus this many completed cycles before it. None = live only.
         """
-        q: asyncio.Queue[Union[str, dict, None]] = asyncio.Queue(maxsize=500)
-        self._subscribers.add(q)
-        logger.debug(f"Subscriber added (total: {len(self._subscribers)})")
-        return q
-
-    def unsubscribe(self, q: asyncio.Queue) -> None:
-        """Remove a subscriber queue."""
-        self._subscribers.discard(q)
-        logger.debug(f"Subscriber removed (total: {len(self._subscribers)})")
-
-    def _publish(self, item) -> None:
-        """Send an item to all subscribers. Called from the event loop thread."""
-        for q in self._subscribers:
-            try:
-                q.put_nowait(item)
-            except asyncio.QueueFull:
-                pass  # Drop data for slow consumers
+        if after is not None:
+            sub = self._ring.subscribe(after=after)
+        elif replay_cycles is not None:
+            in_cycle = 0 if self._at_cycle_start else 1
+            sub = self._ring.subscribe(replay_boundaries=replay_cycles + in_cycle)
+        else:
+            sub = self._ring.subscribe()
+        logger.debug(f"Subscriber added (total: {self._ring.subscriber_count})")
+        return sub
+
+    def unsubscribe(self, sub: RingSubscriber) -> None:
+        """Remove a subscriber."""
+        self._ring.unsubscribe(sub)
+        logger.debug(f"Subscriber removed (total: {self._ring.subscriber_count})")
+
+    def stream_stats(self) -> dict:
+        """Broadcast counters: published, dropped, resyncs, subscriber lag."""
+        return self._ring.stats()
+
+    def _publish(self, item, cycle: int = 0) -> None:
+        """Send an item to all subscribers. Called from the event loop thread.
 
-    def _scene_diff(self, current_frame: Image.Image) -> float:
+        The first event of each cycle is marked as a boundary: lagging
+        subscribers resync there instead of mid-sentence.
+        """
+        self._ring.publish(item, cycle=cycle, boundary=self._at_cycle_start)
+        self._at_cycle_start = not isinstance(item, str)
+
+    def _scene_diff(self, current: FrameMeta) -> float:
         """Compute mean pixel difference from last inference frame.
 
+        Compares the 64x64 thumbnails precomputed by SlidingWindow.push, so
+        this is cheap enough to run on the event loop.
+
         Returns 255.0 if no previous frame (first cycle).
         Returns float in range 0-255.
         """
-        if self._last_inference_frame is None:
+        if self._last_inference_thumb is None or current.thumbnail is None:
             return 255.0
         try:
-            old = np.array(self._last_inference_frame.resize((64, 64)), dtype=np.float32)
-            new = np.array(current_frame.resize((64, 64)), dtype=np.float32)
-            diff = float(np.mean(np.abs(old - new)))
+            diff = float(np.mean(np.abs(self._last_inference_thumb - current.thumbnail)))
             logger.debug(f"Scene diff: {diff:.1f} (threshold: {CHANGE_THRESHOLD})")
             return diff
         except Exception:
@@ -166,7 +266,8 @@ class MonitorLoop:
         else:
             return "normal"
 
-    def _build_prompt(self, instruction: str, scene_diff: float = 255.0) -> str:
+    def _build_prompt(self, instruction: str, scene_diff: float = 255.0,
+                      roi_names: Optional[list[str]] = None) -> str:
         """Build the full prompt with commentator system message and context."""
         parts = [self._commentator_prompt]
         if self._last_response and self._last_response.strip() != "...":
@@ -180,6 +281,18 @@ class MonitorLoop:
                 parts.append("\nVery little changed. Be extremely brief — one short phrase at most.")
             elif intensity == "brief":
                 parts.append("\nSome things changed. Keep it to one sentence.")
+        if FRAME_SELECTION == "mosaic" and MOSAIC_GRID > 1:
+            parts.append(
+                f"\nEach image is a {MOSAIC_GRID}x{MOSAIC_GRID} grid of consecutive video "
+                "frames, read left-to-right, top-to-bottom. The label in each tile's "
+                "corner is seconds since the first frame."
+            )
+        if roi_names:
+            parts.append(
+                f"\nThe last {len(roi_names)} image(s) are close-up crops of the newest "
+                f"frame: {', '.join(roi_names)}. Read small text (scores, clocks, "
+                "signs) from these crops."
+            )
         parts.append(f"\nFocus: {instruction}")
         return "\n".join(parts)
 
@@ -208,58 +321,81 @@ class MonitorLoop:
             if not self._running:
                 break
 
-            if not self._instruction:
-                continue
-
-            if self._generating:
-                continue
-
-            frame_metas = self._window.get_frames_with_meta(FRAMES_PER_INFERENCE, stride=FRAME_STRIDE)
-            if not frame_metas:
-                logger.debug("No frames available, skipping cycle")
-                continue
-
-            # Change detection: skip if scene hasn't changed enough
-            newest_frame = frame_metas[-1].image
-            instruction_changed = self._instruction != self._last_instruction
-            scene_diff = self._scene_diff(newest_frame)
-            if not instruction_changed and scene_diff < CHANGE_THRESHOLD:
-                logger.info(f"Scene unchanged (diff={scene_diff:.1f}), skipping cycle")
+            if not await self.step():
                 continue
 
-            self._last_instruction = self._instruction
-            await self._run_cycle(frame_metas, self._instruction, scene_diff)
-
-            # Audio gate: wait for browser to finish playing + breathing pause
+            # Audio gate: wait for browser to finish playing + breathing pause.
+            # Re-checked while waiting: players' playback reports refine the end.
             if self._audio_manager is not None:
-                playback_end = self._audio_manager.estimated_playback_end
-                remaining = playback_end - time.time() + TTS_PAUSE_AFTER
+                gate_start = time.time()
+                remaining = self._audio_manager.estimated_playback_end - gate_start + TTS_PAUSE_AFTER
                 if remaining > 0:
-                    logger.info(f"Audio gate: waiting {remaining:.1f}s (playback + pause)")
-                    await asyncio.sleep(remaining)
+                    logger.info(f"Audio gate: waiting ~{remaining:.1f}s (playback + pause)")
+                while remaining > 0 and self._running:
+                    await asyncio.sleep(min(remaining, self._AUDIO_GATE_POLL))
+                    remaining = (self._audio_manager.estimated_playback_end
+                                 - time.time() + TTS_PAUSE_AFTER)
 
         self._running = False
         self._started.clear()
         logger.info("Monitor loop stopped")
 
+    async def step(self) -> bool:
+        """Run one inference cycle on the current window, if one is due.
+
+        A cycle is due when an instruction is set, no generation is running,
+        frames are available and the scene changed enough. Shared by the live
+        loop (run) and the offline batch runner (app.batch).
+
+        Returns True if a cycle ran.
+        """
+        if self._model is None or not self._instruction or self._generating:
+            return False
+
+        frame_metas = self._window.get_frames_with_meta(FRAMES_PER_INFERENCE, stride=FRAME_STRIDE)
+        if not frame_metas:
+            logger.debug("No frames available, skipping cycle")
+            return False
+
+        # Change detection: skip if scene hasn't changed enough
+        instruction_changed = self._instruction != self._last_instruction
+        scene_diff = self._scene_diff(frame_metas[-1])
+        if not instruction_changed and scene_diff < CHANGE_THRESHOLD:
+            logger.info(f"Scene unchanged (diff={scene_diff:.1f}), skipping cycle")
+            return False
+
+        self._last_instruction = self._instruction
+        await self._run_cycle(frame_metas, self._instruction, scene_diff)
+        return True
+
     async def _run_cycle(self, frame_metas: list, instruction: str,
                          scene_diff: float = 255.0) -> None:
         """Run one inference cycle in a thread pool."""
         self._generating = True
         self._cycle_count += 1
-        if self._audio_manager is not None:
-            self._audio_manager.reset_clock()
+        if self._repeats_reset:
+            self._repeats_reset = False
+            self._repeats.clear()
         cycle_num = self._cycle_count
+        if self._audio_manager is not None:
+            self._audio_manager.reset_clock(frame_metas[-1].timestamp, cycle_num)
         frame_ids = [m.frame_id for m in frame_metas]
         frame_timestamps = [m.timestamp for m in frame_metas]
-        images = [m.image for m in frame_metas]
-        prompt = self._build_prompt(instruction, scene_diff)
+        rois = self.rois
+        prompt = self._build_prompt(instruction, scene_diff, [r.name for r in rois])
         label = instruction[:50] + "..." if len(instruction) > 50 else instruction
-        logger.info(f"Cycle {cycle_num}: {len(images)} frames (#{frame_ids[0]}-#{frame_ids[-1]}), instruction='{label}'")
+        logger.info(f"Cycle {cycle_num}: {len(frame_metas)} frames (#{frame_ids[0]}-#{frame_ids[-1]}), instruction='{label}'")
 
-        t0 = time.time()
+        t0 = time.monotonic()
         try:
             loop = asyncio.get_running_loop()
+            images = await image_executor.run(self._prepare_images, frame_metas, rois)
+            if FRAME_SELECTION == "mosaic" or rois:
+                logger.info(
+                    f"Cycle {cycle_num}: {len(images) - len(rois)} frame image(s) "
+                    f"+ {len(rois)} ROI crop(s)"
+                )
+            self._predict_delay(len(images), len(rois), prompt, scene_diff)
             full_response = await loop.run_in_executor(
                 None,
                 self._inference_worker,
@@ -270,88 +406,196 @@ class MonitorLoop:
                 frame_ids,
                 frame_timestamps,
                 t0,
+                len(rois),
             )
-            self._last_response = full_response.strip()
-            self._last_inference_frame = images[-1]
+            if not self._repeats.repeat and not self._repeats_reset:
+                # A repeat cut short says nothing new: keep the previous context.
+                # After an instruction/prompt change, the response is stale.
+                self._last_response = full_response.strip()
+                self._repeats.remember(full_response)
+            self._last_inference_thumb = frame_metas[-1].thumbnail
         except Exception:
             logger.exception(f"Cycle {cycle_num} failed")
         finally:
-            elapsed = time.time() - t0
+            elapsed = time.monotonic() - t0
             logger.info(f"Cycle {cycle_num} done in {elapsed:.1f}s")
             self._generating = False
 
+    def _predict_delay(self, n_images: int, n_crops: int, prompt: str,
+                       scene_diff: float) -> None:
+        """Predict this cycle's latency and set the video delay to match.
+
+        No-op for the EMA model and while the RLS model is warming up (the
+        EMA update at cycle end still applies then), and in batch mode.
+        """
+        self._cycle_features = None
+        self._predicted_latency = None
+        if self._latency_model is None or STREAM_DELAY_INIT <= 0 or not self._live:
+            return
+        tts = self._model.tts_enabled
+        max_tokens = TTS_MAX_NEW_TOKENS if tts and TTS_MAX_NEW_TOKENS > 0 else MAX_NEW_TOKENS
+        # The prompt's length hint is the best guess of response length
+        scale = {"minimal": 0.25, "brief": 0.5, "normal": 1.0}
+        expected = max_tokens * scale[self._commentary_intensity(scene_diff)]
+        slice_nums = ROI_FRAME_SLICE_NUMS if n_crops else MAX_SLICE_NUMS
+        self._cycle_features = cycle_features(n_images, slice_nums, len(prompt), expected, tts)
+        self._predicted_latency = self._latency_model.predict(self._cycle_features)
+        if self._predicted_latency is not None:
+            old_delay = self._target_delay
+            target = self._predicted_latency + STREAM_DELAY_MARGIN
+            if STREAM_DELAY_MAX_STEP > 0:
+                # Walk toward the prediction: a jump would skip/rewind the video
+                step = max(-STREAM_DELAY_MAX_STEP, min(STREAM_DELAY_MAX_STEP, target - old_delay))
+                target = old_delay + step
+            self._target_delay = target
+            logger.info(
+                f"Sync delay: predicted={self._predicted_latency:.2f}s, "
+                f"target={old_delay:.2f}s -> {self._target_delay:.2f}s"
+            )
+
+    def _prepare_images(self, frame_metas: list, rois: list[Roi]) -> list[Image.Image]:
+        """Build the image list for the model: frames (or mosaics), then ROI crops.
+
+        CPU-bound (resize/crop), so it runs on the image executor.
+        """
+        if FRAME_SELECTION == "mosaic":
+            images = pack_mosaics(frame_metas, MOSAIC_GRID)
+        else:
+            images = [m.image for m in frame_metas]
+        newest = frame_metas[-1].image
+        return images + [roi.crop(newest) for roi in rois]
+
+    @staticmethod
+    def _roi_token_report(n_frame_images: int, n_crops: int) -> dict:
+        """Estimated image tokens with ROI crops vs. raising slices globally."""
+        used = (n_frame_images + n_crops) * 64 * ROI_FRAME_SLICE_NUMS
+        global_equiv = n_frame_images * 64 * ROI_GLOBAL_SLICE_NUMS
+        return {
+            "crops": n_crops,
+            "image_tokens": used,
+            "global_slice_tokens": global_equiv,
+            "tokens_saved": global_equiv - used,
+        }
+
     def _inference_worker(self, frames, prompt, loop,
-                          cycle_num, frame_ids, frame_timestamps, t0) -> str:
-        """Runs in thread pool. Streams chunks to all subscribers. Returns full response."""
+                          cycle_num, frame_ids, frame_timestamps, t0,
+                          n_crops: int = 0) -> str:
+        """Runs in thread pool. Streams chunks to all subscribers. Returns full response.
+
+        t0 is the cycle start on the monotonic clock.
+        """
         chunks = []
+        tts_cached = False
+        repeats = self._repeats
+        repeats.begin()
+        text_out = TokenCoalescer(
+            loop, functools.partial(self._publish, cycle=cycle_num),
+            STREAM_COALESCE_MS / 1000.0, STREAM_COALESCE_TOKENS,
+        )
+        # ROI crops carry the detail, so full frames drop to ROI_FRAME_SLICE_NUMS
+        slice_nums = ROI_FRAME_SLICE_NUMS if n_crops else None
         if self._model.tts_enabled:
-            # Buffer audio until we know the response is not "..." (skip signal).
-            # The Token2wav vocoder produces Chinese speech artifacts on "...",
-            # so we suppress audio for skip responses entirely.
-            audio_buffer = []
-            streaming_audio = False
-            for result in self._model.infer_with_audio(frames, prompt):
-                if result.text:
-                    chunks.append(result.text)
-                    loop.call_soon_threadsafe(self._publish, result.text)
-                    # Once accumulated text exceeds skip signal, flush audio buffer
-                    if not streaming_audio and len("".join(chunks).strip()) > 5:
-                        streaming_audio = True
-                        if self._audio_manager is not None:
-                            for buffered in audio_buffer:
-                                pcm = AudioManager.resample_to_48k_int16(buffered)
-                                loop.call_soon_threadsafe(self._audio_manager.publish, pcm)
-                        audio_buffer.clear()
-                if result.audio is not None:
-                    if streaming_audio and self._audio_manager is not None:
-                        pcm = AudioManager.resample_to_48k_int16(result.audio)
-                        loop.call_soon_threadsafe(self._audio_manager.publish, pcm)
-                    elif not streaming_audio:
-                        audio_buffer.append(result.audio)
-                if result.is_last:
-                    break
-            # Flush remaining buffer if response was real (not "...")
-            full_text = "".join(chunks).strip()
-            if full_text != "..." and audio_buffer and self._audio_manager is not None:
-                for buffered in audio_buffer:
-                    pcm = AudioManager.resample_to_48k_int16(buffered)
-                    loop.call_soon_threadsafe(self._audio_manager.publish, pcm)
-            if full_text == "...":
-                logger.debug("Skip response '...' — audio suppressed")
+            # Audio goes to the AudioManager's own thread, which resamples and
+            # publishes it and suppresses it for "..." skip responses, so this
+            # thread only ever waits on the model.
+            audio_out = self._audio_manager
+            cache = audio_out.phrase_cache if audio_out is not None else None
+            try:
+                for result in self._model.infer_with_audio(frames, prompt, max_slice_nums=slice_nums):
+                    if result.text:
+                        chunks.append(result.text)
+                        text_out.add(result.text)
+                        # A repeat: leaving the loop closes the generator,
+                        # which ends generation; its audio is not fed
+                        if repeats.update("".join(chunks)):
+                            break
+                    if audio_out is not None and (result.text or result.audio is not None):
+                        audio_out.feed(result.text, result.audio)
+                    if self._stop_requested:
+                        break  # shutting down: closing the generator ends generation
+                    if result.is_last:
+                        break
+                    if cache is not None and result.text:
+                        # A repeated phrase (get() needs a sentence end): play
+                        # the rest from the cache and skip vocoding it
+                        so_far = "".join(chunks)
+                        pcm = None if cache.continues(so_far) else cache.get(so_far)
+                        if pcm is not None:
+                            audio_out.play_cached(pcm)
+                            tts_cached = True
+                            break
+            finally:
+                if audio_out is not None:
+                    # Generation is over; wait so the audio is published before cycle_end
+                    try:
+                        audio_out.end_utterance(suppress=repeats.repeat).result()
+                    except RuntimeError as e:
+                        logger.warning(f"Cycle {cycle_num}: audio not published: {e}")
         else:
-            for chunk in self._model.infer(frames, prompt, stream=True):
+            stop = threading.Event()
+            for chunk in self._model.infer(frames, prompt, stream=True,
+                                           max_slice_nums=slice_nums, stop=stop):
                 chunks.append(chunk)
-                loop.call_soon_threadsafe(self._publish, chunk)
+                text_out.add(chunk)
+                if repeats.update("".join(chunks)) or self._stop_requested:
+                    stop.set()
+                    break
+        text_out.close()
         full_response = "".join(chunks)
+        elapsed = time.monotonic() - t0
         t_end = time.time()
         meta = {
             "type": "cycle_end",
             "cycle": cycle_num,
             "frame_ids": frame_ids,
+            "images": len(frames),
             "oldest_frame_at": frame_timestamps[0],
             "newest_frame_at": frame_timestamps[-1],
-            "inference_start": t0,
+            "inference_start": t_end - elapsed,
             "inference_end": t_end,
-            "inference_sec": round(t_end - t0, 2),
-            "latency_sec": round(t_end - frame_timestamps[0], 2),
+            "inference_sec": round(elapsed, 2),
+            # Batch: frame times are video seconds, only processing time is known
+            "latency_sec": round(t_end - frame_timestamps[0] if self._live else elapsed, 2),
             "skipped": full_response.strip() == "...",
         }
-        # Update adaptive delay via EMA on observed latency.
-        # Skip "..." responses — they have artificially low latency that
-        # would pull the EMA down and desync real commentary cycles.
-        if STREAM_DELAY_INIT > 0 and not meta["skipped"]:
+        if n_crops:
+            meta["roi"] = self._roi_token_report(len(frames) - n_crops, n_crops)
+        if tts_cached:
+            meta["tts_cached"] = True
+        if repeats.repeat:
+            meta["repeat"] = round(repeats.score, 2)
+            logger.info(f"Cycle {cycle_num}: repeat of a recent response "
+                        f"(overlap {repeats.score:.0%}), stopped after {len(full_response)} chars")
+        # Update adaptive delay on observed latency.
+        # Skip "..." responses and repeats cut short — they have artificially
+        # low latency that would pull the estimate down and desync real
+        # commentary cycles. Batch mode has no wall-clock frame times.
+        sync = STREAM_DELAY_INIT > 0 and self._live
+        if sync and not meta["skipped"] and not repeats.repeat:
             observed = t_end - frame_timestamps[-1]
-            alpha = STREAM_DELAY_EMA_ALPHA
-            old_delay = self._target_delay
-            self._target_delay = (1 - alpha) * old_delay + alpha * observed
-            logger.info(
-                f"Sync delay: observed={observed:.2f}s, "
-                f"target={old_delay:.2f}s -> {self._target_delay:.2f}s"
-            )
-        if STREAM_DELAY_INIT > 0:
+            predicted = self._predicted_latency
+            if self._cycle_features is not None:
+                self._latency_model.update(self._cycle_features, observed)
+            if predicted is not None:
+                meta["predicted_latency"] = round(predicted, 2)
+                meta["prediction_error"] = round(observed - predicted, 2)
+                logger.info(
+                    f"Sync delay: observed={observed:.2f}s, "
+                    f"predicted={predicted:.2f}s (error {observed - predicted:+.2f}s)"
+                )
+            else:
+                # EMA model, or RLS still warming up
+                alpha = STREAM_DELAY_EMA_ALPHA
+                old_delay = self._target_delay
+                self._target_delay = (1 - alpha) * old_delay + alpha * observed
+                logger.info(
+                    f"Sync delay: observed={observed:.2f}s, "
+                    f"target={old_delay:.2f}s -> {self._target_delay:.2f}s"
+                )
+        if sync:
             meta["target_delay"] = round(self._target_delay, 2)
 
-        loop.call_soon_threadsafe(self._publish, meta)
+        loop.call_soon_threadsafe(self._publish, meta, cycle_num)
         return full_response
 
     async def stream(self) -> AsyncGenerator[Union[str, dict, None], None]:
@@ -364,18 +608,18 @@ class MonitorLoop:
         Each call creates an independent subscriber -- safe for multiple
         concurrent consumers (SSE connections, WebSocket clients, etc.).
         """
-        q = self.subscribe()
+        sub = self.subscribe()
         try:
-            while self._running or not q.empty():
+            while self._running or sub.pending:
                 try:
-                    event = await asyncio.wait_for(q.get(), timeout=1.0)
-                    if event is None:
+                    event = await sub.get(timeout=1.0)
+                    if event.data is None:
                         return
-                    yield event
+                    yield event.data
                 except asyncio.TimeoutError:
                     continue
         finally:
-            self.unsubscribe(q)
+            self.unsubscribe(sub)
 
     def stop(self) -> None:
         """Stop the monitor loop. Must be called from the async context."""
@@ -0,0 +1,59 @@
+"""Mosaic packing: tile consecutive frames into composite images.
+
+Each image sent to the model costs 64 * MAX_SLICE_NUMS tokens regardless of
+what is in it. Packing a 2x2 grid of low-detail frames into one composite
+covers four moments in time for the token cost of one image.
+"""
+
+from PIL import Image, ImageDraw, ImageFont
+
+from app.sliding_window import FrameMeta
+
+
+def pack_mosaics(frame_metas: list[FrameMeta], grid: int = 2) -> list[Image.Image]:
+    """Tile frames into grid x grid composites, oldest first.
+
+    Tiles are filled in reading order (left-to-right, top-to-bottom). Each
+    tile gets a "+X.Xs" label in its top-left corner: seconds since the
+    oldest frame of the cycle. A partially filled last composite is padded
+    with black tiles.
+
+    Args:
+        frame_metas: Frames in chronological order (from SlidingWindow).
+        grid: Tiles per side. 1 disables packing (frames returned as-is).
+
+    Returns:
+        List of composite RGB images, the size of the first frame.
+    """
+    if not frame_metas:
+        return []
+    if grid <= 1:
+        return [m.image for m in frame_metas]
+
+    width, height = frame_metas[0].image.size
+    tile_w, tile_h = width // grid, height // grid
+    per_image = grid * grid
+    t0 = frame_metas[0].timestamp
+    font = _label_font(tile_h)
+
+    composites = []
+    for start in range(0, len(frame_metas), per_image):
+        canvas = Image.new("RGB", (tile_w * grid, tile_h * grid))
+        draw = ImageDraw.Draw(canvas)
+        for i, meta in enumerate(frame_metas[start:start + per_image]):
+            x, y = (i % grid) * tile_w, (i // grid) * tile_h
+            canvas.paste(meta.image.resize((tile_w, tile_h)), (x, y))
+            label = f"+{meta.timestamp - t0:.1f}s"
+            box = draw.textbbox((x, y), label, font=font)
+            pad = max(2, tile_h // 100)
+            draw.rectangle(
+                (box[0], box[1], box[2] + 2 * pad, box[3] + 2 * pad), fill=(0, 0, 0)
+            )
+            draw.text((x + pad, y + pad), label, fill=(255, 255, 0), font=font)
+        composites.append(canvas)
+    return composites
+
+
+def _label_font(tile_h: int) -> ImageFont.FreeTypeFont:
+    """Timestamp font scaled to the tile (readable after model resize)."""
+    return ImageFont.load_default(size=max(12, tile_h // 12))
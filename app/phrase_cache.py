@@ -0,0 +1,195 @@
+"""Phrase-level cache of synthesized TTS audio.
+
+Sports and security commentary repeats many short phrases ("What a save!",
+"Corner kick."). PhraseCache keeps the 24 kHz PCM of short, complete
+responses, keyed by voice and normalized text, so a repeat can be served
+from the cache instead of being rendered by the vocoder again.
+
+Text comes out of the model ahead of its audio, so MonitorLoop checks for a
+hit whenever the text so far ends a sentence. On a hit it stops generation,
+which skips the vocoding of the rest of the phrase, and the audio thread
+plays the cached phrase from where the already rendered audio got to. Audio
+is never held back for the cache. A hit is not served while a longer cached
+phrase starts with the text (see continues()): with "Goal!" and "Goal! Team B
+scores." both cached, generation doesn't stop at "Goal!". A response that
+would have gone on after a phrase cached on its own does end there.
+
+Entries are evicted least-recently-used once TTS_CACHE_MAX_MB is exceeded.
+They persist in TTS_CACHE_DIR: one .npy file per entry (named by hash, so
+no text ever reaches a path) plus index.json with text, voice and LRU order.
+"""
+
+import bisect
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from app.config import (
+    TTS_CACHE_DIR,
+    TTS_CACHE_MAX_CHARS,
+    TTS_CACHE_MAX_MB,
+    TTS_FLOAT16,
+    TTS_MODEL_DIR,
+)
+
+logger = logging.getLogger(__name__)
+
+_TERMINAL = (".", "!", "?")
+
+
+def normalize(text: str) -> str:
+    """Cache key form of a response: lowercase, single spaces, trimmed."""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def voice_key(ref_audio_path: str) -> str:
+    """Short id of a voice: hash of the reference audio and vocoder settings."""
+    digest = hashlib.sha1()
+    if os.path.isfile(ref_audio_path):
+        with open(ref_audio_path, "rb") as f:
+            digest.update(f.read())
+    else:
+        digest.update(ref_audio_path.encode())
+    digest.update(f"\0{TTS_MODEL_DIR}\0{TTS_FLOAT16}".encode())
+    return digest.hexdigest()[:16]
+
+
+class PhraseCache:
+    """LRU cache of int16 24 kHz PCM per (voice, normalized text).
+
+    Thread-safe: looked up from the inference thread, filled from the audio
+    thread.
+    """
+
+    def __init__(self, voice: str, directory: Optional[str] = TTS_CACHE_DIR,
+                 max_bytes: int = int(TTS_CACHE_MAX_MB * 1024 * 1024),
+                 max_chars: int = TTS_CACHE_MAX_CHARS):
+        self.voice = voice
+        self._dir = directory
+        self._max_bytes = max_bytes
+        self._max_chars = max_chars
+        self._entries: OrderedDict[tuple[str, str], np.ndarray] = OrderedDict()
+        self._texts: list[str] = []  # sorted normalized texts of the current voice
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stores = 0
+        if self._dir:
+            self._load()
+
+    def cacheable(self, text: str) -> bool:
+        """A short, complete phrase: ends like a sentence, not just "..."."""
+        stripped = text.strip()
+        return (len(stripped) <= self._max_chars and stripped.endswith(_TERMINAL)
+                and stripped.strip(".") != "")
+
+    def continues(self, text: str) -> bool:
+        """Whether a longer cached phrase starts with text."""
+        key = normalize(text)
+        with self._lock:
+            i = bisect.bisect_right(self._texts, key)
+            return i < len(self._texts) and self._texts[i].startswith(key)
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Cached PCM for a complete phrase, or None."""
+        if not self.cacheable(text):
+            return None
+        with self._lock:
+            key = (self.voice, normalize(text))
+            pcm = self._entries.get(key)
+            if pcm is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return pcm
+
+    def put(self, text: str, pcm: np.ndarray) -> None:
+        """Store a phrase's int16 PCM (ignored if not cacheable or too big)."""
+        if not self.cacheable(text) or pcm.nbytes > self._max_bytes or len(pcm) == 0:
+            return
+        key = (self.voice, normalize(text))
+        with self._lock:
+            if key in self._entries:
+                return
+            self._insert(key, pcm)
+            self.stores += 1
+            evicted = self._evict()
+        if self._dir:
+            self._save(key, pcm, evicted)
+
+    def set_voice(self, voice: str) -> None:
+        """Switch to another voice's phrases (entries of all voices are kept)."""
+        with self._lock:
+            self.voice = voice
+            self._texts = sorted(t for v, t in self._entries if v == voice)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "mb": round(self._bytes / (1024 * 1024), 1),
+            "hits": self.hits,
+            "stores": self.stores,
+        }
+
+    def _insert(self, key: tuple[str, str], pcm: np.ndarray) -> None:
+        self._entries[key] = pcm
+        self._bytes += pcm.nbytes
+        if key[0] == self.voice:
+            bisect.insort(self._texts, key[1])
+
+    def _evict(self) -> list[tuple[str, str]]:
+        evicted = []
+        while self._bytes > self._max_bytes and self._entries:
+            key, pcm = self._entries.popitem(last=False)
+            self._bytes -= pcm.nbytes
+            if key[0] == self.voice:
+                self._texts.remove(key[1])
+            evicted.append(key)
+        return evicted
+
+    @staticmethod
+    def _file_name(key: tuple[str, str]) -> str:
+        return hashlib.sha1("\0".join(key).encode()).hexdigest() + ".npy"
+
+    def _load(self) -> None:
+        index_path = os.path.join(self._dir, "index.json")
+        if not os.path.isfile(index_path):
+            return
+        try:
+            with open(index_path) as f:
+                index = json.load(f)
+            for voice, text in index:
+                path = os.path.join(self._dir, self._file_name((voice, text)))
+                if os.path.isfile(path):
+                    self._insert((voice, text), np.load(path, allow_pickle=False))
+            for key in self._evict():
+                os.remove(os.path.join(self._dir, self._file_name(key)))
+        except (OSError, ValueError) as e:
+            logger.warning(f"TTS phrase cache at {self._dir} unreadable, starting empty: {e}")
+            return
+        logger.info(f"TTS phrase cache: {len(self._entries)} phrases loaded "
+                    f"({self._bytes / (1024 * 1024):.1f} MB)")
+
+    def _save(self, key: tuple[str, str], pcm: np.ndarray,
+              evicted: list[tuple[str, str]]) -> None:
+        try:
+            os.makedirs(self._dir, exist_ok=True)
+            np.save(os.path.join(self._dir, self._file_name(key)), pcm, allow_pickle=False)
+            for old in evicted:
+                path = os.path.join(self._dir, self._file_name(old))
+                if os.path.isfile(path):
+                    os.remove(path)
+            with self._lock:
+                index = list(self._entries)  # LRU order, oldest first
+            tmp = os.path.join(self._dir, "index.json.tmp")
+            with open(tmp, "w") as f:
+                json.dump(index, f)
+            os.replace(tmp, os.path.join(self._dir, "index.json"))
+        except OSError as e:
+            logger.warning(f"TTS phrase cache: could not save to {self._dir}: {e}")
@@ -0,0 +1,86 @@
+"""Early detection of responses that repeat a recent one.
+
+The prompt tells the model not to repeat itself, but it sometimes does, and
+a repeat used to run to the end (and through the vocoder) before anyone could
+tell. RepeatDetector compares the response while it streams: every complete
+word n-gram is looked up in the n-grams of the last REPEAT_HISTORY responses.
+Once at least REPEAT_MIN_NGRAMS n-grams are in and REPEAT_THRESHOLD of them
+occur in one earlier response, the response is a repeat; MonitorLoop then
+stops generation and suppresses its audio, as for "..." responses.
+
+Only new n-grams are looked up on each update, so the cost per chunk is
+independent of the response length.
+"""
+
+import re
+from collections import deque
+
+from app.config import REPEAT_HISTORY, REPEAT_MIN_NGRAMS, REPEAT_NGRAM, REPEAT_THRESHOLD
+
+_WORD = re.compile(r"\w+")
+
+
+def _words(text: str) -> list[str]:
+    return _WORD.findall(text.lower())
+
+
+class RepeatDetector:
+    """Word n-gram overlap of the current response with recent responses.
+
+    Usage, per response: begin(), update(text so far) after every chunk,
+    and remember(full text) once it is done (unless it was a repeat).
+    """
+
+    def __init__(self, history: int = REPEAT_HISTORY, n: int = REPEAT_NGRAM,
+                 threshold: float = REPEAT_THRESHOLD, min_ngrams: int = REPEAT_MIN_NGRAMS):
+        self._n = n
+        self._threshold = threshold
+        self._min_ngrams = min_ngrams
+        self._history: deque[set[tuple[str, ...]]] = deque(maxlen=max(history, 0))
+        self.repeat = False  # current response was found to be a repeat
+        self.score = 0.0  # its highest overlap with an earlier response
+        self._done = 0  # n-grams of the current response looked up so far
+        self._hits: list[int] = []  # per earlier response
+
+    @property
+    def enabled(self) -> bool:
+        return self._history.maxlen > 0
+
+    def begin(self) -> None:
+        """Start checking a new response."""
+        self.repeat = False
+        self.score = 0.0
+        self._done = 0
+        self._hits = [0] * len(self._history)
+
+    def update(self, text: str) -> bool:
+        """Check the response so far. True once it is clearly a repeat."""
+        if self.repeat or not self._history:
+            return self.repeat
+        words = _words(text)
+        if words and text[-1:].isalnum():
+            words.pop()  # last word may still be growing
+        n = self._n
+        for i in range(self._done, len(words) - n + 1):
+            gram = tuple(words[i:i + n])
+            for j, grams in enumerate(self._history):
+                if gram in grams:
+                    self._hits[j] += 1
+            self._done = i + 1
+        if self._done:
+            self.score = max(self._hits) / self._done
+        self.repeat = self._done >= self._min_ngrams and self.score >= self._threshold
+        return self.repeat
+
+    def remember(self, text: str) -> None:
+        """Add a finished response to the history ("..." is ignored)."""
+        if not self.enabled or text.strip() == "...":
+            return
+        words = _words(text)
+        grams = {tuple(words[i:i + self._n]) for i in range(len(words) - self._n + 1)}
+        if grams:
+            self._history.append(grams)
+
+    def clear(self) -> None:
+        """Forget the history (the instruction or prompt changed)."""
+        self._history.clear()
@@ -0,0 +1,74 @@
+"""Streaming polyphase upsampler for TTS audio (24 kHz -> 48 kHz).
+
+resample_poly() on each chunk treats every chunk as a separate signal: the
+FIR filter starts from silence at each chunk start and is cut off at each
+end, which leaves small clicks at chunk boundaries. StreamingResampler keeps
+the filter state (the last input samples of the previous chunk) across
+chunks, so a cycle's chunks resample as one continuous signal.
+
+Upsampling by an integer factor L is done in polyphase form: output sample
+n*L + p is input filtered with every L-th filter tap starting at p. Each of
+the L phase filters runs with its own lfilter state (zi). The filter is the
+one resample_poly designs (Kaiser-windowed sinc, 10 zero crossings per
+side), so quality matches whole-signal resample_poly apart from a fixed
+delay of half the filter length (about 0.4 ms at 48 kHz). The last `delay`
+output samples of a signal are still in the filter state when its last chunk
+has been processed; flush() pushes them out.
+"""
+
+import numpy as np
+
+
+class StreamingResampler:
+    """Upsample float audio chunks by an integer factor, keeping filter state.
+
+    Output is int16 PCM bytes. Intermediate buffers are preallocated and only
+    grow when a chunk larger than any before arrives. Not thread-safe: use
+    one instance per stream, and flush() + reset() between independent
+    signals.
+    """
+
+    def __init__(self, up: int = 2, half_len: int = 10):
+        # scipy.signal is slow to import; only load it when audio is used
+        from scipy.signal import firwin, lfilter
+
+        self._lfilter = lfilter
+        self._up = up
+        # Same design as scipy.signal.resample_poly(x, up, 1)
+        taps = firwin(2 * half_len * up + 1, 1.0 / up, window=("kaiser", 5.0)) * up
+        taps = np.concatenate([taps, np.zeros(-len(taps) % up)])
+        self._phases = [taps[p::up] for p in range(up)]
+        self.delay = half_len * up  # output samples of filter delay
+        self._state = [np.zeros(len(h) - 1) for h in self._phases]
+        self._silence = np.zeros(half_len)  # input samples covering the delay
+        self._out = np.empty(0, dtype=np.float64)
+        self._pcm = np.empty(0, dtype=np.int16)
+
+    def flush(self) -> bytes:
+        """The signal's last `delay` output samples, still held in the filter.
+
+        Feeds silence through the filter. Call at the end of an utterance,
+        before reset(); the output then holds the whole signal (after the
+        `delay` samples of silence the filter starts with).
+        """
+        return self.process(self._silence)
+
+    def reset(self) -> None:
+        """Forget the previous signal (call at the start of a new utterance)."""
+        for zi in self._state:
+            zi.fill(0.0)
+
+    def process(self, chunk: np.ndarray) -> bytes:
+        """Resample one chunk of float audio in [-1, 1] to int16 PCM bytes."""
+        n = len(chunk) * self._up
+        if len(self._out) < n:
+            self._out = np.empty(n, dtype=np.float64)
+            self._pcm = np.empty(n, dtype=np.int16)
+        out = self._out[:n]
+        for p, h in enumerate(self._phases):
+            out[p::self._up], self._state[p] = self._lfilter(h, 1.0, chunk, zi=self._state[p])
+        out *= 32767
+        np.clip(out, -32768, 32767, out=out)
+        pcm = self._pcm[:n]
+        pcm[:] = out  # truncating cast, like astype(np.int16)
+        return pcm.tobytes()
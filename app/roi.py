@@ -0,0 +1,60 @@
+"""Regions of interest: named crops of the newest frame sent at high detail."""
+
+import re
+from dataclasses import dataclass
+
+from PIL import Image
+
+# Names end up in the prompt, so keep them short and plain.
+ROI_NAME_PATTERN = re.compile(r"^[A-Za-z0-9 _-]{1,32}$")
+MAX_ROIS = 4
+
+
+@dataclass
+class Roi:
+    """A named rectangle in fractional frame coordinates (0-1)."""
+
+    name: str
+    x: float
+    y: float
+    w: float
+    h: float
+
+    def __post_init__(self):
+        if not ROI_NAME_PATTERN.match(self.name):
+            raise ValueError(f"Invalid ROI name: {self.name!r}")
+        if not (0 <= self.x < 1 and 0 <= self.y < 1 and self.w > 0 and self.h > 0
+                and self.x + self.w <= 1 + 1e-9 and self.y + self.h <= 1 + 1e-9):
+            raise ValueError(f"ROI '{self.name}' must lie inside the frame (0-1)")
+
+    def crop(self, image: Image.Image) -> Image.Image:
+        """Cut this region out of a frame at full source resolution."""
+        width, height = image.size
+        box = (
+            int(self.x * width),
+            int(self.y * height),
+            min(width, max(int((self.x + self.w) * width), int(self.x * width) + 1)),
+            min(height, max(int((self.y + self.h) * height), int(self.y * height) + 1)),
+        )
+        return image.crop(box)
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "x": self.x, "y": self.y, "w": self.w, "h": self.h}
+
+
+def parse_roi_regions(spec: str) -> list[Roi]:
+    """Parse "name:x,y,w,h;name2:x,y,w,h" (the ROI_REGIONS format).
+
+    Raises:
+        ValueError: on malformed entries or more than MAX_ROIS regions.
+    """
+    rois = []
+    for entry in filter(None, (e.strip() for e in spec.split(";"))):
+        name, sep, coords = entry.partition(":")
+        values = coords.split(",")
+        if not sep or len(values) != 4:
+            raise ValueError(f"Invalid ROI entry (expected name:x,y,w,h): {entry!r}")
+        rois.append(Roi(name.strip(), *(float(v) for v in values)))
+    if len(rois) > MAX_ROIS:
+        raise ValueError(f"At most {MAX_ROIS} ROIs are supported")
+    return rois
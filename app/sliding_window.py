@@ -3,20 +3,39 @@ import time
 from collections import deque
 from typing import Optional
 
+import numpy as np
 from PIL import Image
 
 from app.config import WINDOW_SIZE
 
+# Side of the downscaled copy used for scene-change detection
+THUMBNAIL_SIZE = 64
+
+
+def scene_thumbnail(image: Image.Image) -> np.ndarray:
+    """Small float32 copy of a frame for scene-change detection."""
+    return np.asarray(image.resize((THUMBNAIL_SIZE, THUMBNAIL_SIZE)), dtype=np.float32)
+
 
 class FrameMeta:
-    """Metadata for a captured frame."""
+    """Metadata for a captured frame.
+
+    timestamp is the capture time on the wall clock (mapped from the source
+    PTS by FrameCapture when available). pts is the raw source presentation
+    timestamp in seconds, or None if the source doesn't provide one.
+    thumbnail is precomputed at push time (in the capture thread), so scene
+    change detection never resizes full frames on the event loop.
+    """
 
-    __slots__ = ("frame_id", "timestamp", "image")
+    __slots__ = ("frame_id", "timestamp", "image", "pts", "thumbnail")
 
-    def __init__(self, frame_id: int, timestamp: float, image: Image.Image):
+    def __init__(self, frame_id: int, timestamp: float, image: Image.Image,
+                 pts: Optional[float] = None, thumbnail: Optional[np.ndarray] = None):
         self.frame_id = frame_id
         self.timestamp = timestamp
         self.image = image
+        self.pts = pts
+        self.thumbnail = thumbnail
 
 
 class SlidingWindow:
@@ -31,13 +50,27 @@ class SlidingWindow:
         self._lock = threading.Lock()
         self._frame_counter = 0
 
-    def push(self, frame: Image.Image) -> None:
-        """Add a frame with an auto-incrementing ID and wall-clock timestamp."""
+    def push(self, frame: Image.Image, timestamp: Optional[float] = None,
+             pts: Optional[float] = None) -> None:
+        """Add a frame with an auto-incrementing ID and a timestamp.
+
+        Args:
+            frame: RGB image.
+            timestamp: Capture time in seconds. None uses the wall clock now.
+                FrameCapture passes the PTS-mapped capture time; the offline
+                batch runner passes the video position.
+            pts: Raw source presentation timestamp (seconds), if known.
+        """
+        thumbnail = scene_thumbnail(frame)  # outside the lock, in the caller's thread
         with self._lock:
             self._frame_counter += 1
-            self._buffer.append(
-                FrameMeta(self._frame_counter, time.time(), frame)
-            )
+            self._buffer.append(FrameMeta(
+                self._frame_counter,
+                time.time() if timestamp is None else timestamp,
+                frame,
+                pts,
+                thumbnail,
+            ))
 
     def get_frames(
         self, n: Optional[int] = None, stride: int = 1
@@ -0,0 +1,105 @@
+"""Vocoder voice cache files (TTS_VOICE_CACHE_DIR).
+
+The vocoder's prompt cache for a voice (model.token2wav_cache) is nested
+dicts, lists and tuples of tensors. It is written as a flat dict of tensors
+keyed by path ("/dspeaker_embedding", "/dflow_cache/l0", ...) and read back
+with torch.load(weights_only=True), so a cache file can only hold tensors
+and can't run code. A cache with anything else in it (numbers, arrays,
+objects) is not saved: the voice is then recomputed on every load.
+"""
+
+import logging
+import os
+from typing import Any, Optional
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+_SEP = "/"
+# Path component: kind + name. d = dict key, l = list index, t = tuple index.
+# An upper-case kind alone marks an empty container of that kind.
+_KINDS = {dict: "d", list: "l", tuple: "t"}
+
+
+def flatten_tensors(obj: Any) -> Optional[dict[str, torch.Tensor]]:
+    """{path: tensor} for nested dicts/lists/tuples of tensors, or None if
+    there is anything else in obj (or a dict key that isn't a plain str)."""
+    flat: dict[str, torch.Tensor] = {}
+
+    def visit(node: Any, path: str) -> bool:
+        if isinstance(node, torch.Tensor):
+            flat[path] = node.detach().cpu()
+            return True
+        kind = _KINDS.get(type(node))
+        if kind is None:
+            return False
+        items = node.items() if kind == "d" else enumerate(node)
+        if not node:
+            flat[f"{path}{_SEP}{kind.upper()}"] = torch.empty(0)
+        for name, child in items:
+            if kind == "d" and (not isinstance(name, str) or _SEP in name):
+                return False
+            if not visit(child, f"{path}{_SEP}{kind}{name}"):
+                return False
+        return True
+
+    return flat if visit(obj, "") else None
+
+
+def unflatten_tensors(flat: dict[str, torch.Tensor]) -> Any:
+    """Rebuild the nested structure flatten_tensors() came from."""
+    if "" in flat:
+        return flat[""]
+    root: list = [None, {}]  # node: [kind, {name: node or tensor}]
+    for path, tensor in flat.items():
+        node = root
+        parts = path.split(_SEP)[1:]
+        for i, part in enumerate(parts):
+            kind, name = part[0], part[1:]
+            if kind.isupper():  # empty container
+                node[0] = kind.lower()
+                break
+            node[0] = kind
+            if i == len(parts) - 1:
+                node[1][name] = tensor
+            else:
+                node = node[1].setdefault(name, [None, {}])
+
+    def build(node: list) -> Any:
+        kind, children = node
+        values = {name: build(child) if isinstance(child, list) else child
+                  for name, child in children.items()}
+        if kind == "d":
+            return values
+        items = [values[name] for name in sorted(values, key=int)]
+        return items if kind == "l" else tuple(items)
+
+    return build(root)
+
+
+def save_voice_cache(cache: Any, path: str) -> bool:
+    """Write cache to path (atomically). False if it isn't all tensors."""
+    flat = flatten_tensors(cache)
+    if flat is None:
+        logger.warning(f"Voice cache holds values other than tensors, not saved to {path}")
+        return False
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    torch.save(flat, tmp)
+    os.replace(tmp, path)
+    return True
+
+
+def load_voice_cache(path: str, device: str) -> Any:
+    """Read a cache written by save_voice_cache() onto device.
+
+    Raises:
+        ValueError: the file is not a flat dict of tensors.
+        Exception: from torch.load (unreadable file, non-tensor content).
+    """
+    flat = torch.load(path, map_location=device, weights_only=True)
+    if not isinstance(flat, dict) or not all(
+            isinstance(k, str) and isinstance(v, torch.Tensor) for k, v in flat.items()):
+        raise ValueError("not a flat dict of tensors")
+    return unflatten_tensors(flat)
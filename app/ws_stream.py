@@ -0,0 +1,190 @@
+"""One WebSocket per viewer, multiplexing text, cycle metadata, audio, video and status.
+
+Every message is a single binary WebSocket frame:
+
+    offset  size  field
+    0       1     type (MSG_*)
+    1       4     seq (uint32 LE): broadcast seq for text/cycle_end,
+                  audio piece number (from 1 per connection) for audio,
+                  display frame id for video, 0 for status
+    5       8     timestamp (float64 LE): server wall-clock seconds
+    13      ...   payload
+
+Audio payloads start with alignment data (AUDIO_HEADER), as in the framed
+/api/audio-stream: the cycle id, the offset of the first sample within the
+cycle's utterance (48 kHz samples) and the capture time of the newest frame
+the utterance comments on. Audio is paced per connection by an AudioPacer,
+as for /api/audio-stream, and the connection is listed as a player in the
+audio stats.
+
+All timestamps share one base (the server's time.time(), the same clock as
+frame timestamps and cycle metadata). Text carries its publish time, audio
+its scheduled play time, video frames their capture time.
+
+Payloads:
+    MSG_TEXT       UTF-8 JSON {"cycle", "text"}
+    MSG_CYCLE_END  UTF-8 JSON cycle metadata (as the SSE cycle_end event)
+    MSG_AUDIO      AUDIO_HEADER + PCM, 48 kHz mono int16 LE (as /api/audio-stream)
+    MSG_VIDEO      JPEG, from the same shared producer as /api/mjpeg
+    MSG_STATUS     UTF-8 JSON (as /api/status)
+
+Backpressure is enforced in one place, WsSession.send(): sends are serialized,
+and a client that does not accept a message within the send timeout is
+disconnected. While a send is pending, text and audio wait in the broadcast
+rings (a client too far behind resyncs to a cycle boundary) and video skips
+to the newest frame.
+"""
+
+import asyncio
+import json
+import logging
+import struct
+import time
+from typing import Callable, Optional
+
+from app.audio_manager import AudioManager
+from app.audio_pacer import AudioPacer
+from app.mjpeg import AdaptiveQuality, MjpegBroadcaster
+from app.monitor_loop import MonitorLoop
+
+logger = logging.getLogger(__name__)
+
+MSG_TEXT = 1
+MSG_CYCLE_END = 2
+MSG_AUDIO = 3
+MSG_VIDEO = 4
+MSG_STATUS = 5
+
+HEADER = struct.Struct("<BId")
+# MSG_AUDIO payload header: cycle id, sample offset, frame timestamp
+AUDIO_HEADER = struct.Struct("<IId")
+
+
+def pack_message(msg_type: int, seq: int, timestamp: float, payload: bytes) -> bytes:
+    """Frame one message (header + payload)."""
+    return HEADER.pack(msg_type, seq & 0xFFFFFFFF, timestamp) + payload
+
+
+class WsSession:
+    """Streams everything a viewer needs over one WebSocket connection."""
+
+    def __init__(self, websocket, send_timeout: float):
+        self._ws = websocket
+        self._send_timeout = send_timeout
+        self._lock = asyncio.Lock()
+        self.messages_sent = 0
+        self.bytes_sent = 0
+
+    async def send(self, msg_type: int, seq: int, timestamp: float, payload: bytes) -> None:
+        """Send one message. Raises asyncio.TimeoutError if the client stalls."""
+        message = pack_message(msg_type, seq, timestamp, payload)
+        async with self._lock:
+            await asyncio.wait_for(self._ws.send_bytes(message), self._send_timeout)
+        self.messages_sent += 1
+        self.bytes_sent += len(message)
+
+    async def run(self, monitor: MonitorLoop, video: Optional[MjpegBroadcaster],
+                  audio_manager: Optional[AudioManager], status: Callable[[], dict],
+                  *, replay_cycles: int, status_interval: float,
+                  video_quality: str = "auto") -> None:
+        """Run until the client disconnects, stalls, or the monitor stops.
+
+        Pass video=None or audio_manager=None to leave that stream out.
+        video_quality is a MJPEG_VARIANTS name or "auto" (as for /api/mjpeg).
+        """
+        tasks = [
+            asyncio.create_task(self._receive()),
+            asyncio.create_task(self._pump_text(monitor, replay_cycles)),
+            asyncio.create_task(self._pump_status(status, status_interval)),
+        ]
+        if video is not None:
+            tasks.append(asyncio.create_task(self._pump_video(video, video_quality)))
+        if audio_manager is not None:
+            tasks.append(asyncio.create_task(self._pump_audio(audio_manager)))
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception() is not None:
+                    logger.info(f"WebSocket session ended: {type(task.exception()).__name__}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            logger.debug(
+                f"WebSocket closed after {self.messages_sent} messages, "
+                f"{self.bytes_sent / 1e6:.1f} MB"
+            )
+
+    async def _receive(self) -> None:
+        """Drain client messages; returns when the client disconnects."""
+        while True:
+            message = await self._ws.receive()
+            if message.get("type") == "websocket.disconnect":
+                return
+
+    async def _pump_text(self, monitor: MonitorLoop, replay_cycles: int) -> None:
+        sub = monitor.subscribe(replay_cycles=replay_cycles)
+        try:
+            while True:
+                try:
+                    event = await sub.get(timeout=15.0)
+                except asyncio.TimeoutError:
+                    continue
+                if event.data is None:
+                    return
+                if isinstance(event.data, dict):
+                    await self.send(MSG_CYCLE_END, event.seq, event.ts,
+                                    json.dumps(event.data).encode())
+                else:
+                    payload = json.dumps({"cycle": event.cycle, "text": event.data})
+                    await self.send(MSG_TEXT, event.seq, event.ts, payload.encode())
+        finally:
+            monitor.unsubscribe(sub)
+
+    async def _pump_audio(self, audio_manager: AudioManager) -> None:
+        player_id = audio_manager.add_player()
+        sub = audio_manager.subscribe(join_utterance=True)
+        pacer = AudioPacer(sub, "pcm48", audio_manager.get_player(player_id))
+        try:
+            while True:
+                try:
+                    frame = await pacer.next(timeout=15.0)
+                except asyncio.TimeoutError:
+                    continue
+                if frame is None:
+                    return
+                header = AUDIO_HEADER.pack(frame.cycle, frame.offset, frame.frame_ts)
+                await self.send(MSG_AUDIO, frame.seq, frame.play_at, header + frame.data)
+        finally:
+            audio_manager.unsubscribe(sub)
+            audio_manager.remove_player(player_id)
+
+    async def _pump_video(self, broadcaster: MjpegBroadcaster, quality: str) -> None:
+        """Send the newest display frame whenever the shared producer has one."""
+        adaptive = AdaptiveQuality() if quality == "auto" else None
+        broadcaster.acquire()
+        try:
+            seq = 0
+            last_frame_id = None
+            while True:
+                try:
+                    frame = await broadcaster.next_frame(seq, timeout=5.0)
+                except asyncio.TimeoutError:
+                    continue
+                seq = frame.seq
+                if frame.frame_id == last_frame_id:
+                    continue
+                last_frame_id = frame.frame_id
+                variant = adaptive.current if adaptive is not None else quality
+                jpeg, _ = await broadcaster.variant(frame, variant)
+                t_write = time.monotonic()
+                await self.send(MSG_VIDEO, frame.frame_id, frame.timestamp, jpeg)
+                if adaptive is not None:
+                    adaptive.record(time.monotonic() - t_write, broadcaster.frame_interval)
+        finally:
+            broadcaster.release()
+
+    async def _pump_status(self, status: Callable[[], dict], interval: float) -> None:
+        while True:
+            await self.send(MSG_STATUS, 0, time.time(), json.dumps(status()).encode())
+            await asyncio.sleep(interval)
@@ -0,0 +1,114 @@
+"""Standalone test: compressed audio encodings for /api/audio-stream.
+
+Usage:
+    cd video_chat
+    python -m scripts.test_audio_codecs
+    python -m scripts.test_audio_codecs --chunk-ms 40 --seconds 10
+
+No model or GPU needed. A speech-like test signal is fed to the streaming
+encoders in TTS-sized chunks, as the audio thread does. For each format:
+
+1. Bitrate: bytes produced per second of audio.
+2. Quality: ADPCM is decoded again (reference IMA decoder below) and
+   compared with the input (SNR). Opus is only checked for output size,
+   since decoding it needs the same library.
+3. Speed: encode time as a fraction of real time.
+"""
+
+import argparse
+import logging
+import struct
+import time
+
+import numpy as np
+
+from app.audio_codecs import (
+    ADPCM_BLOCK_BYTES,
+    ADPCM_BLOCK_SAMPLES,
+    SOURCE_RATE,
+    _INDEX_TABLE,
+    _STEP_TABLE,
+    available_formats,
+    create_encoder,
+    to_int16,
+)
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def test_signal(seconds: float) -> np.ndarray:
+    """Speech-like test signal: a few harmonics with a slow amplitude envelope."""
+    t = np.arange(int(seconds * SOURCE_RATE)) / SOURCE_RATE
+    envelope = 0.5 + 0.4 * np.sin(2 * np.pi * 3 * t)
+    tone = sum(np.sin(2 * np.pi * f * t) / (i + 1) for i, f in enumerate((180, 360, 1100, 3400)))
+    return (0.3 * envelope * tone).astype(np.float32)
+
+
+def adpcm_decode(data: bytes) -> np.ndarray:
+    """Decode a stream of IMA ADPCM blocks (reference decoder)."""
+    out = []
+    for start in range(0, len(data), ADPCM_BLOCK_BYTES):
+        predictor, index, _ = struct.unpack_from("<hBB", data, start)
+        out.append(predictor)
+        for i in range(ADPCM_BLOCK_SAMPLES - 1):
+            byte = data[start + 4 + (i >> 1)]
+            code = byte >> 4 if i & 1 else byte & 0x0F
+            step = _STEP_TABLE[index]
+            delta = step >> 3
+            if code & 4:
+                delta += step
+            if code & 2:
+                delta += step >> 1
+            if code & 1:
+                delta += step >> 2
+            predictor = predictor - delta if code & 8 else predictor + delta
+            predictor = max(-32768, min(32767, predictor))
+            index = max(0, min(88, index + _INDEX_TABLE[code & 7]))
+            out.append(predictor)
+    return np.array(out, dtype=np.int16)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test the compressed audio encodings")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Test signal length. Default: 5")
+    parser.add_argument("--chunk-ms", type=float, default=80.0,
+                        help="Chunk length in ms (TTS chunks are ~40-1000 ms). Default: 80")
+    args = parser.parse_args()
+
+    signal = to_int16(test_signal(args.seconds))
+    chunk_len = int(SOURCE_RATE * args.chunk_ms / 1000)
+    chunks = [signal[i:i + chunk_len] for i in range(0, len(signal), chunk_len)]
+    logger.info(f"{len(chunks)} chunks of {args.chunk_ms:.0f} ms, {args.seconds:.1f}s of audio")
+    logger.info(f"pcm48: {48000 * 16 / 1000:6.1f} kbit/s")
+    logger.info(f"pcm24: {SOURCE_RATE * 16 / 1000:6.1f} kbit/s")
+
+    failed = False
+    for name in ("adpcm", "opus"):
+        if name not in available_formats():
+            logger.info(f"{name}: not available (install opuslib and libopus)")
+            continue
+        encoder = create_encoder(name)
+        t0 = time.perf_counter()
+        data = b"".join(encoder.encode(c) for c in chunks) + encoder.flush()
+        encode_sec = time.perf_counter() - t0
+        kbits = len(data) * 8 / args.seconds / 1000
+        line = (f"{name}: {kbits:6.1f} kbit/s, encoding at "
+                f"{encode_sec / args.seconds * 100:.1f}% of real time")
+        if name == "adpcm":
+            decoded = adpcm_decode(data)[:len(signal)].astype(np.float64)
+            error = decoded - signal
+            snr = 10 * np.log10(np.sum(signal.astype(np.float64) ** 2) / np.sum(error ** 2))
+            line += f", SNR {snr:.1f} dB"
+            if len(decoded) != len(signal) or snr < 20:
+                failed = True
+        logger.info(line)
+
+    if failed:
+        logger.error("FAIL: ADPCM round trip does not reproduce the input")
+        raise SystemExit(1)
+    logger.info("PASS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Standalone test: batch mode ends at EOF when the file has no frame count.
+
+Usage:
+    cd video_chat
+    python -m scripts.test_batch_eof
+    python -m scripts.test_batch_eof --frames 50
+
+No model or GPU needed. Some containers don't report a frame count, so
+VideoFileReader.duration is infinite and only the end of file can stop
+BatchRunner.run(). A fake capture (frame count 0, --frames readable frames)
+stands in for cv2.VideoCapture and a fake model answers every cycle. The run
+must finish, and every cycle must comment on frames that exist.
+"""
+
+import argparse
+import asyncio
+import logging
+import math
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from app import batch
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+logger = logging.getLogger(__name__)
+
+FPS = 25.0
+
+
+class FakeCapture:
+    """cv2.VideoCapture stand-in: `frames` noise frames, no frame count."""
+
+    def __init__(self, frames: int):
+        self._frames = frames
+        self._pos = 0
+        self._rng = np.random.default_rng(0)
+
+    def isOpened(self) -> bool:
+        return True
+
+    def get(self, prop: int) -> float:
+        return FPS if prop == cv2.CAP_PROP_FPS else 0.0
+
+    def set(self, prop: int, value: float) -> bool:
+        self._pos = int(value)
+        return True
+
+    def grab(self) -> bool:
+        self._pos += 1
+        return self._pos <= self._frames
+
+    def read(self):
+        if self._pos >= self._frames:
+            return False, None
+        self._pos += 1
+        return True, self._rng.integers(0, 255, (90, 160, 3), dtype=np.uint8)
+
+    def release(self) -> None:
+        pass
+
+
+class FakeCv2:
+    """The cv2 module as app.batch sees it, with FakeCapture as VideoCapture."""
+
+    def __init__(self, frames: int):
+        self._frames = frames
+
+    def VideoCapture(self, path: str) -> FakeCapture:
+        return FakeCapture(self._frames)
+
+    def __getattr__(self, name):
+        return getattr(cv2, name)
+
+
+class FakeModel:
+    """Text-only model that answers every cycle at once."""
+
+    tts_enabled = False
+
+    def infer(self, frames, prompt, stream=True, max_slice_nums=None, stop=None):
+        yield "Something happens."
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test batch mode EOF without a frame count")
+    parser.add_argument("--frames", type=int, default=100, help="Frames in the fake file. Default: 100")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds before FAIL. Default: 60")
+    args = parser.parse_args()
+
+    batch.cv2 = FakeCv2(args.frames)
+    reader = batch.VideoFileReader("fake.mp4")
+    logger.info(f"Reader duration: {reader.duration}")
+    if not math.isinf(reader.duration):
+        logger.error("FAIL: fake capture should have no frame count")
+        raise SystemExit(1)
+
+    runner = batch.BatchRunner(FakeModel(), hop=1.0)
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            records = asyncio.run(asyncio.wait_for(
+                runner.run("fake.mp4", "Describe", None, Path(tmp) / "out"), args.timeout))
+        except asyncio.TimeoutError:
+            logger.error(f"FAIL: batch run did not end at EOF within {args.timeout:.0f}s")
+            raise SystemExit(1)
+
+    video_len = args.frames / FPS
+    last = max((r["video_end"] for r in records), default=0.0)
+    logger.info(f"{len(records)} cycles, last at {last:.1f}s of {video_len:.1f}s of video")
+    if not records or last > video_len:
+        logger.error("FAIL: expected cycles within the video only")
+        raise SystemExit(1)
+    logger.info("PASS")
+
+
+if __name__ == "__main__":
+    main()
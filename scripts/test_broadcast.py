@@ -0,0 +1,138 @@
+"""Standalone test: BroadcastRing / RingSubscriber.
+
+Usage:
+    cd video_chat
+    python -m scripts.test_broadcast
+    python -m scripts.test_broadcast --capacity 64 --cycles 50
+
+No model or GPU needed. Cycles of events (the first of each a boundary, as
+MonitorLoop publishes them) go through a small ring. Checks:
+
+1. Wraparound: a reader that keeps up gets every event in order, however
+   many times the ring wraps.
+2. Resync: a reader that falls behind by more than the capacity resumes at
+   the oldest cycle boundary still buffered (never mid-cycle), then reads
+   on without gaps.
+3. Drop counters: dropped/resyncs per subscriber and in total match the
+   events actually skipped; stats() reports them and the lag.
+4. subscribe(after=...) and replay_boundaries, and get() waking on publish
+   and timing out when nothing is published.
+"""
+
+import argparse
+import asyncio
+import logging
+
+from app.broadcast import BroadcastRing
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def publish_cycle(ring: BroadcastRing, cycle: int, events: int) -> list[int]:
+    """Publish one cycle: a boundary event followed by events - 1 chunks."""
+    return [ring.publish(f"c{cycle}e{i}", cycle=cycle, boundary=i == 0) for i in range(events)]
+
+
+def drain(sub) -> list:
+    events = []
+    while (event := sub.get_nowait()) is not None:
+        events.append(event)
+    return events
+
+
+def check(ok: bool, message: str) -> bool:
+    if not ok:
+        logger.error(f"FAIL {message}")
+    return ok
+
+
+async def check_async(ring: BroadcastRing) -> bool:
+    """get() wakes on publish and times out when nothing is published."""
+    ok = True
+    sub = ring.subscribe()
+    loop = asyncio.get_running_loop()
+    loop.call_later(0.05, ring.publish, "late", 999, True)
+    event = await sub.get(timeout=1.0)
+    ok &= check(event.data == "late", "get() did not return the published event")
+    try:
+        await sub.get(timeout=0.05)
+        ok &= check(False, "get() returned with nothing published")
+    except asyncio.TimeoutError:
+        pass
+    ring.unsubscribe(sub)
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test the broadcast ring")
+    parser.add_argument("--capacity", type=int, default=32, help="Ring capacity. Default: 32")
+    parser.add_argument("--cycles", type=int, default=40, help="Cycles to publish. Default: 40")
+    parser.add_argument("--events", type=int, default=7, help="Events per cycle. Default: 7")
+    args = parser.parse_args()
+    ok = True
+
+    # 1. Wraparound: read after every cycle, nothing is lost
+    ring = BroadcastRing(args.capacity)
+    reader = ring.subscribe()
+    seen = []
+    for cycle in range(args.cycles):
+        publish_cycle(ring, cycle, args.events)
+        seen.extend(event.seq for event in drain(reader))
+    total = args.cycles * args.events
+    logger.info(f"Wraparound: {len(seen)}/{total} events read, ring wrapped "
+                f"{total // args.capacity} times")
+    ok &= check(seen == list(range(1, total + 1)), "wraparound: events lost or out of order")
+    ok &= check(reader.dropped == 0 and reader.resyncs == 0, "wraparound: drops counted")
+
+    # 2./3. A lagging reader resyncs to the oldest buffered boundary
+    ring = BroadcastRing(args.capacity)
+    fast, slow = ring.subscribe(), ring.subscribe()
+    publish_cycle(ring, 0, args.events)
+    first = slow.get_nowait()  # the slow reader reads one event, then stalls
+    for cycle in range(1, args.cycles):
+        publish_cycle(ring, cycle, args.events)
+        drain(fast)
+    oldest = ring.oldest_seq
+    expected_resume = ring.first_boundary_from(oldest)
+    events = drain(slow)
+    resumed = events[0]
+    logger.info(f"Resync: slow reader at seq {first.seq + 1}, oldest buffered {oldest}, "
+                f"resumed at seq {resumed.seq} (cycle {resumed.cycle}), "
+                f"dropped {slow.dropped}")
+    ok &= check(resumed.boundary, "resync: resumed mid-cycle")
+    ok &= check(resumed.seq == expected_resume and resumed.seq >= oldest,
+                "resync: did not resume at the oldest buffered boundary")
+    ok &= check([e.seq for e in events] == list(range(resumed.seq, ring.next_seq)),
+                "resync: gaps after resuming")
+    skipped = resumed.seq - (first.seq + 1)
+    ok &= check(slow.dropped == skipped and slow.resyncs == 1,
+                f"drop counters: subscriber dropped {slow.dropped}, expected {skipped}")
+    ok &= check(fast.dropped == 0, "drop counters: a reader that kept up counted drops")
+    stats = ring.stats()
+    ok &= check(stats["dropped"] == skipped and stats["resyncs"] == 1,
+                f"drop counters: ring stats {stats}")
+    ok &= check(stats["max_lag"] == 0 and stats["subscribers"] == 2, f"stats: {stats}")
+    publish_cycle(ring, args.cycles, 3)
+    ok &= check(ring.stats()["max_lag"] == 3, "stats: lag not reported")
+
+    # 4. Late joiners: after a seq, replay of recent boundaries
+    boundaries = [seq for seq in range(ring.oldest_seq, ring.next_seq) if ring.at(seq).boundary]
+    sub = ring.subscribe(after=boundaries[-1])
+    ok &= check(sub.cursor == boundaries[-1] + 1, "subscribe(after): wrong start")
+    sub = ring.subscribe(replay_boundaries=2)
+    ok &= check(sub.cursor == boundaries[-2], "replay_boundaries: wrong start")
+    sub = ring.subscribe(after=1)  # long gone: resyncs on the first read
+    ok &= check(sub.get_nowait().seq == boundaries[0], "subscribe(after) stale seq: no resync")
+    sub = ring.subscribe(after=ring.next_seq + 10)  # never published: from now on
+    ok &= check(sub.cursor == ring.next_seq, "subscribe(after) future seq: wrong start")
+
+    ok &= asyncio.run(check_async(ring))
+
+    if not ok:
+        raise SystemExit(1)
+    logger.info("PASS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Standalone test: import-time budget of the server module.
+
+Usage:
+    cd video_chat
+    python -m scripts.test_import_time
+    python -m scripts.test_import_time --budget 2.0 --runs 5
+
+No model or GPU needed. The server starts accepting connections right after
+`import app.main`, and loads the model in the background (app/model_loader.py).
+That only helps while importing app.main stays cheap, so this checks:
+
+1. Heavy modules (torch, transformers, scipy, librosa, app.model_server) are
+   not imported by `import app.main`.
+2. The import takes less than --budget seconds (best of --runs, each in a
+   fresh interpreter).
+
+On failure, the slowest imports are listed (python -X importtime).
+"""
+
+import argparse
+import logging
+import subprocess
+import sys
+import time
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+logger = logging.getLogger(__name__)
+
+HEAVY_MODULES = ("torch", "transformers", "scipy", "librosa", "app.model_server")
+
+_CHECK = (
+    "import sys, app.main; "
+    f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+)
+
+
+def import_once() -> tuple[float, list[str]]:
+    """Seconds to import app.main in a fresh interpreter, and heavy modules loaded."""
+    t0 = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", _CHECK], capture_output=True, text=True, check=True)
+    elapsed = time.perf_counter() - t0
+    loaded = out.stdout.strip()
+    return elapsed, loaded.split(",") if loaded else []
+
+
+def slowest_imports(count: int = 10) -> list[tuple[int, str]]:
+    """(cumulative microseconds, module) of the slowest imports."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"],
+                         capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        rows.append((int(parts[1]), parts[2].strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import time of app.main")
+    parser.add_argument("--budget", type=float, default=1.5,
+                        help="Max seconds for 'import app.main' (incl. interpreter start). Default: 1.5")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to time. Default: 3")
+    args = parser.parse_args()
+
+    # The first run also warms the OS file cache and .pyc files
+    results = [import_once() for _ in range(args.runs)]
+    best = min(elapsed for elapsed, _ in results)
+    loaded = results[-1][1]
+    logger.info(f"import app.main: best {best:.2f}s of {args.runs} runs (budget {args.budget:.2f}s)")
+
+    failed = False
+    if loaded:
+        logger.error(f"FAIL: heavy modules imported at startup: {', '.join(loaded)}")
+        failed = True
+    if best > args.budget:
+        logger.error(f"FAIL: import takes {best:.2f}s, over the {args.budget:.2f}s budget")
+        failed = True
+    if failed:
+        logger.info("Slowest imports (cumulative):")
+        for us, name in slowest_imports():
+            logger.info(f"  {us / 1e6:6.2f}s  {name}")
+        raise SystemExit(1)
+    logger.info("PASS")
+
+
+if __name__ == "__main__":
+    main()
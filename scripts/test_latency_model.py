@@ -0,0 +1,80 @@
+"""Standalone test: LatencyPredictor converges on synthetic cycles.
+
+Usage:
+    cd video_chat
+    python -m scripts.test_latency_model
+    python -m scripts.test_latency_model --cycles 400 --noise 0.3 --seed 2
+
+No model or GPU needed. Cycles with random image counts, slice counts,
+prompt lengths and expected response lengths get a latency from a known
+linear model plus noise. Checks:
+
+1. Convergence: after warmup, the RLS prediction error drops to about the
+   noise level, below that of the EMA the live loop falls back to.
+2. Drift: when the true cost changes mid-run (e.g. the GPU throttles), the
+   forgetting factor lets the model follow within a few dozen cycles.
+"""
+
+import argparse
+import logging
+
+import numpy as np
+
+from app.latency_model import LatencyPredictor, cycle_features
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+logger = logging.getLogger(__name__)
+
+# True cost model: seconds = base + per 1000 image tokens + per 100 response tokens
+BASE, PER_KTOKENS, PER_100_OUT = 0.6, 0.9, 0.8
+
+
+def synthetic_cycle(rng: np.random.Generator, slowdown: float) -> tuple[np.ndarray, float]:
+    n_images = int(rng.integers(1, 11))
+    slice_nums = int(rng.integers(1, 4))
+    prompt_chars = int(rng.integers(300, 900))
+    expected = float(rng.choice([24, 48, 96]))  # minimal / brief / normal
+    x = cycle_features(n_images, slice_nums, prompt_chars, expected, tts=False)
+    latency = slowdown * (BASE + PER_KTOKENS * n_images * 64 * slice_nums / 1000
+                          + PER_100_OUT * expected / 100)
+    return x, latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test the RLS latency model")
+    parser.add_argument("--cycles", type=int, default=300, help="Cycles per phase. Default: 300")
+    parser.add_argument("--noise", type=float, default=0.2, help="Latency noise (s, std). Default: 0.2")
+    parser.add_argument("--forgetting", type=float, default=0.95, help="RLS forgetting. Default: 0.95")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed. Default: 0")
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    model = LatencyPredictor(forgetting=args.forgetting)
+    ema, alpha = 5.0, 0.2  # STREAM_DELAY_INIT, STREAM_DELAY_EMA_ALPHA
+    failed = False
+    for phase, slowdown in (("steady", 1.0), ("GPU 30% slower", 1.3)):
+        rls_err, ema_err = [], []
+        for _ in range(args.cycles):
+            x, latency = synthetic_cycle(rng, slowdown)
+            observed = latency + rng.normal(0, args.noise)
+            predicted = model.predict(x)
+            if predicted is not None:
+                rls_err.append(abs(predicted - latency))
+                ema_err.append(abs(ema - latency))
+            model.update(x, observed)
+            ema = (1 - alpha) * ema + alpha * observed
+        # Skip the first 50 cycles of each phase: warmup / re-convergence
+        rls_late, ema_late = np.mean(rls_err[50:]), np.mean(ema_err[50:])
+        logger.info(f"{phase}: mean error after 50 cycles: RLS {rls_late:.2f}s, "
+                    f"EMA {ema_late:.2f}s (noise {args.noise:.2f}s)")
+        if rls_late > 2 * args.noise or rls_late >= ema_late:
+            logger.error(f"FAIL {phase}: RLS did not converge")
+            failed = True
+
+    if failed:
+        raise SystemExit(1)
+    logger.info("PASS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Standalone test: TTS phrase cache (app/phrase_cache.py).
+
+Usage:
+    cd video_chat
+    python -m scripts.test_phrase_cache
+
+No model or GPU needed. Checks:
+
+1. put/get: complete short phrases are stored and found under their
+   normalized text; "...", unfinished and overlong responses are not.
+2. LRU eviction: past max_bytes the least recently used phrase goes first,
+   and get() counts as a use.
+3. Persistence: a new cache on the same directory reloads the phrases in
+   LRU order (as of the last put: lookups aren't written to disk), and
+   evicted phrases are removed from disk.
+4. Voices: phrases of another voice are not served, and are again after
+   set_voice() back.
+5. Hits in MonitorLoop (fake model, real AudioManager): at the sentence end
+   that completes a cached phrase, generation stops and the cached audio
+   plays the rest of the phrase, after the audio already published and
+   without repeating it. No hit while a longer cached phrase starts with the
+   text, so "Goal! Team A equalises." goes on past a cached "Goal!".
+"""
+
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from app.audio_manager import AudioManager
+from app.monitor_loop import MonitorLoop
+from app.phrase_cache import PhraseCache
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+logger = logging.getLogger(__name__)
+
+CHUNK = 2400  # 24 kHz samples per fake TTS chunk (100 ms)
+
+
+def phrase_pcm(seconds: float, value: int = 1000) -> np.ndarray:
+    return np.full(int(24000 * seconds), value, dtype=np.int16)
+
+
+def check(ok: bool, message: str) -> bool:
+    if not ok:
+        logger.error(f"FAIL {message}")
+    return ok
+
+
+def check_cache(tmp: str) -> bool:
+    ok = True
+
+    # 1. put/get and what counts as a phrase
+    cache = PhraseCache("voice-a", directory=None, max_bytes=10 ** 6, max_chars=30)
+    pcm = phrase_pcm(0.5)
+    cache.put("What a save!", pcm)
+    ok &= check(cache.get("  what a   SAVE! ") is pcm, "get: normalized text not found")
+    ok &= check(cache.continues("What a") and not cache.continues("What a save!")
+                and not cache.continues("What a goal"), "continues: wrong answer")
+    for text in ("...", "What a", "This response is far too long to be a phrase."):
+        cache.put(text, pcm)
+        ok &= check(cache.get(text) is None, f"put: {text!r} should not be cached")
+    ok &= check(cache.stats()["entries"] == 1 and cache.stats()["hits"] == 1,
+                f"stats: {cache.stats()}")
+
+    # 2./3. LRU eviction, persisted and reloaded
+    one = phrase_pcm(1.0)  # 48000 bytes
+    cache = PhraseCache("voice-a", directory=tmp, max_bytes=3 * one.nbytes)
+    for text in ("Corner kick.", "Free kick.", "Throw in."):
+        cache.put(text, one)
+    cache.get("Corner kick.")  # now the most recently used
+    cache.put("Offside.", one)  # evicts "Free kick."
+    ok &= check(cache.get("Free kick.") is None, "LRU: least recently used phrase kept")
+    ok &= check(all(cache.get(t) is not None for t in ("Corner kick.", "Throw in.", "Offside.")),
+                "LRU: a recently used phrase was evicted")
+    files = sorted(f for f in os.listdir(tmp) if f.endswith(".npy"))
+    ok &= check(len(files) == 3, f"persistence: {len(files)} phrase files on disk, expected 3")
+
+    reloaded = PhraseCache("voice-a", directory=tmp, max_bytes=3 * one.nbytes)
+    ok &= check(reloaded.stats()["entries"] == 3, "persistence: phrases not reloaded")
+    ok &= check(np.array_equal(reloaded.get("Offside."), one), "persistence: audio differs")
+    # Saved order at the last put: "Throw in.", "Corner kick.", "Offside."
+    reloaded.put("Penalty!", one)
+    ok &= check(reloaded.get("Throw in.") is None and reloaded.get("Corner kick.") is not None,
+                "persistence: LRU order lost on reload")
+
+    # 4. Voices
+    reloaded.set_voice("voice-b")
+    ok &= check(reloaded.get("Offside.") is None and not reloaded.continues("Off"),
+                "voices: another voice's phrase served")
+    reloaded.set_voice("voice-a")
+    ok &= check(reloaded.get("Offside.") is not None, "voices: phrase lost after switching back")
+    return ok
+
+
+class FakeResult(NamedTuple):
+    text: str
+    audio: Optional["FakeTensor"]
+    is_last: bool
+
+
+class FakeTensor:
+    """What AudioManager needs of a torch tensor."""
+
+    def __init__(self, audio: np.ndarray):
+        self._audio = audio
+
+    def cpu(self) -> "FakeTensor":
+        return self
+
+    def numpy(self) -> np.ndarray:
+        return self._audio
+
+
+class FakeModel:
+    """Streams the given text chunks, one 100 ms audio chunk each."""
+
+    tts_enabled = True
+
+    def __init__(self, chunks: list[str]):
+        self._chunks = chunks
+        self.generated = 0  # chunks generated before the caller stopped
+
+    def infer_with_audio(self, frames, prompt, max_slice_nums=None):
+        for text in self._chunks:
+            self.generated += 1
+            yield FakeResult(text, FakeTensor(np.full(CHUNK, 0.1, dtype=np.float32)), False)
+        yield FakeResult("", None, True)
+
+
+async def run_response(cache: PhraseCache, chunks: list[str]) -> tuple[str, dict, int, int]:
+    """One cycle through MonitorLoop: (response, cycle_end, 24 kHz samples
+    played, chunks generated)."""
+    audio = AudioManager(phrase_cache=cache)
+    audio.start()
+    listener = audio.subscribe()
+    model = FakeModel(chunks)
+    monitor = MonitorLoop(model, None, audio_manager=audio)
+    events = monitor.subscribe()
+    loop = asyncio.get_running_loop()
+    response = await loop.run_in_executor(
+        None, monitor._inference_worker, [], "prompt", loop, 1, [1], [time.time()],
+        time.monotonic())
+    await asyncio.sleep(0.1)  # let the published events through
+    meta = {}
+    while (event := events.get_nowait()) is not None:
+        if isinstance(event.data, dict):
+            meta = event.data
+    pcm48 = 0
+    while (event := listener.get_nowait()) is not None:
+        pcm48 += len(event.data.pcm) // 2
+    audio.stop()
+    # pcm48 holds the resampler's filter delay on top of the 2x upsampled audio
+    return response, meta, (pcm48 - audio._resampler.delay) // 2, model.generated
+
+
+async def check_hits() -> bool:
+    ok = True
+    cache = PhraseCache("voice-a", directory=None)
+    goal = phrase_pcm(0.25)
+    save = phrase_pcm(0.5)
+    cache.put("Goal!", goal)
+    cache.put("Brilliant save!", save)
+
+    cases = (
+        # name, chunks, expected response, cached, samples played, chunks generated
+        ("hit, audio held", ["Goal", "!", " More", " text."], "Goal!", True, len(goal), 2),
+        ("hit, audio published", ["Brilliant", " save!", " The", " keeper."],
+         "Brilliant save!", True, len(save), 2),
+        ("no hit", ["What", " a", " goal", " by", " Team", " A!"],
+         "What a goal by Team A!", False, 6 * CHUNK, 6),
+    )
+    for name, chunks, expected, cached, samples, generated in cases:
+        response, meta, played, made = await run_response(cache, chunks)
+        logger.info(f"{name}: {response!r}, {played} samples played, {made} chunks "
+                    f"generated, tts_cached={meta.get('tts_cached', False)}")
+        ok &= check(response == expected and bool(meta.get("tts_cached")) == cached
+                    and played == samples and made == generated, f"{name}: wrong result")
+
+    # A longer cached phrase starts with "Goal!": no stop there
+    cache.put("Goal! Team B scores.", phrase_pcm(1.0))
+    chunks = ["Goal!", " Team", " A", " equalises."]
+    response, meta, played, made = await run_response(cache, chunks)
+    logger.info(f"longer phrase cached: {response!r}, {played} samples played")
+    ok &= check(response == "Goal! Team A equalises." and not meta.get("tts_cached")
+                and played == len(chunks) * CHUNK, "truncation: stopped at a shorter cached phrase")
+    return ok
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        ok = check_cache(tmp)
+    ok &= asyncio.run(check_hits())
+    if not ok:
+        raise SystemExit(1)
+    logger.info("PASS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Standalone test: early repeat detection (app/repetition.py).
+
+Usage:
+    cd video_chat
+    python -m scripts.test_repetition
+
+No model or GPU needed. Responses are streamed into RepeatDetector word by
+word, as the model produces them. Checks:
+
+1. Threshold: an exact repeat and a close rephrasing (overlap above
+   REPEAT_THRESHOLD) are caught, before the response ends; a response
+   sharing a phrase below the threshold and a different one are not.
+   The decision comes after REPEAT_MIN_NGRAMS n-grams, so a response that
+   starts like an earlier one is judged on its start.
+2. Short responses (fewer than REPEAT_MIN_NGRAMS n-grams) are never flagged.
+3. History: "..." is not remembered, only the last REPEAT_HISTORY responses
+   count, and clear() forgets them.
+"""
+
+import logging
+
+from app.config import REPEAT_MIN_NGRAMS, REPEAT_THRESHOLD
+from app.repetition import RepeatDetector
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+logger = logging.getLogger(__name__)
+
+EARLIER = "The home team keeps the ball in midfield and looks for an opening on the left wing."
+# 15 trigrams; the first 12 are those of EARLIER (80%)
+CLOSE = "The home team keeps the ball in midfield and looks for an opening through the middle now."
+# 12 trigrams; the last 6 are in EARLIER (50%)
+PARTIAL = "After a long spell of pressure the home team keeps the ball in midfield."
+DIFFERENT = "A long throw into the box is headed clear by the goalkeeper at the near post."
+CARD = "The referee shows a yellow card for a late tackle near the halfway line."
+SHORT = "Corner kick for the home team."
+
+
+def stream(detector: RepeatDetector, text: str) -> tuple[bool, int]:
+    """Feed text word by word. (flagged, words fed when flagged or in total)."""
+    detector.begin()
+    words = text.split(" ")
+    for i in range(len(words)):
+        so_far = " ".join(words[:i + 1])
+        if detector.update(so_far):
+            return True, i + 1
+    return False, len(words)
+
+
+def check(detector: RepeatDetector, name: str, text: str, expect: bool) -> bool:
+    flagged, fed = stream(detector, text)
+    total = len(text.split(" "))
+    logger.info(f"{name:10s} repeat={flagged!s:5s} overlap {detector.score:4.0%} "
+                f"after {fed}/{total} words")
+    if flagged != expect:
+        logger.error(f"FAIL {name}: expected repeat={expect}")
+        return False
+    if flagged and fed >= total:
+        logger.error(f"FAIL {name}: repeat only caught at the end of the response")
+        return False
+    return True
+
+
+def main():
+    logger.info(f"REPEAT_THRESHOLD {REPEAT_THRESHOLD:.0%}, REPEAT_MIN_NGRAMS {REPEAT_MIN_NGRAMS}")
+    ok = True
+
+    # 1. Threshold
+    detector = RepeatDetector(history=3, n=3, threshold=0.6, min_ngrams=5)
+    detector.remember(EARLIER)
+    ok &= check(detector, "exact", EARLIER, True)
+    ok &= check(detector, "close", CLOSE, True)
+    ok &= check(detector, "partial", PARTIAL, False)
+    ok &= check(detector, "different", DIFFERENT, False)
+    # The same 50% overlap is a repeat once the threshold is at or below it
+    lower = RepeatDetector(history=3, n=3, threshold=0.5, min_ngrams=5)
+    lower.remember(EARLIER)
+    if not stream(lower, PARTIAL)[0]:
+        logger.error(f"FAIL threshold: {lower.score:.0%} overlap not a repeat at threshold 50%")
+        ok = False
+
+    # 2. Short responses
+    detector.remember(SHORT)
+    ok &= check(detector, "short", SHORT, False)
+
+    # 3. History
+    detector = RepeatDetector(history=3, n=3, threshold=0.6, min_ngrams=5)
+    detector.remember("...")
+    if detector.update(EARLIER) or detector.score:
+        logger.error('FAIL history: "..." was remembered')
+        ok = False
+    detector.remember(EARLIER)
+    for other in (DIFFERENT, CARD, SHORT):
+        detector.remember(other)  # pushes EARLIER out of the history
+    ok &= check(detector, "forgotten", EARLIER, False)
+    detector.remember(EARLIER)
+    detector.clear()
+    ok &= check(detector, "cleared", EARLIER, False)
+
+    if not ok:
+        raise SystemExit(1)
+    logger.info("PASS")
+
+
+if __name__ == "__main__":
+    main()
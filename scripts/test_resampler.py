@@ -0,0 +1,106 @@
+"""Standalone test: streaming TTS resampler (24kHz -> 48kHz).
+
+Usage:
+    cd video_chat
+    python -m scripts.test_resampler
+    python -m scripts.test_resampler --chunk-ms 40 --seconds 10
+
+No model or GPU needed. Checks three things:
+
+1. Artefacts: a test signal is split into TTS-sized chunks and resampled
+   chunk by chunk, (a) with resample_poly per chunk (the old path) and
+   (b) with StreamingResampler. Both are compared against resample_poly on
+   the whole signal. The streaming output should match it to within
+   int16 rounding; per-chunk output shows errors at every chunk boundary.
+2. Tail: flush() returns the samples still in the filter, so the output
+   (minus the filter delay) is the whole signal, up to its last sample.
+3. Speed: time per chunk for both paths.
+"""
+
+import argparse
+import logging
+import time
+
+import numpy as np
+from scipy.signal import resample_poly
+
+from app.resampler import StreamingResampler
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE_IN = 24000
+
+
+def to_int16(audio: np.ndarray) -> np.ndarray:
+    return np.clip(audio * 32767, -32768, 32767).astype(np.int16)
+
+
+def test_signal(seconds: float) -> np.ndarray:
+    """Speech-like test signal: a few harmonics with a slow amplitude envelope."""
+    t = np.arange(int(seconds * SAMPLE_RATE_IN)) / SAMPLE_RATE_IN
+    envelope = 0.5 + 0.4 * np.sin(2 * np.pi * 3 * t)
+    tone = sum(np.sin(2 * np.pi * f * t) / (i + 1) for i, f in enumerate((180, 360, 1100, 3400)))
+    return (0.3 * envelope * tone).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test the streaming TTS resampler")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Test signal length. Default: 5")
+    parser.add_argument("--chunk-ms", type=float, default=80.0,
+                        help="Chunk length in ms (TTS chunks are ~40-1000 ms). Default: 80")
+    args = parser.parse_args()
+
+    signal = test_signal(args.seconds)
+    chunk_len = int(SAMPLE_RATE_IN * args.chunk_ms / 1000)
+    chunks = [signal[i:i + chunk_len] for i in range(0, len(signal), chunk_len)]
+    reference = to_int16(resample_poly(signal, up=2, down=1)).astype(np.int32)
+
+    # Old path: resample_poly on every chunk independently
+    t0 = time.perf_counter()
+    per_chunk = np.concatenate([to_int16(resample_poly(c, up=2, down=1)) for c in chunks])
+    per_chunk_sec = time.perf_counter() - t0
+
+    # New path: streaming resampler with state across chunks
+    resampler = StreamingResampler(up=2)
+    t0 = time.perf_counter()
+    streamed = np.frombuffer(b"".join(resampler.process(c) for c in chunks), dtype=np.int16)
+    streaming_sec = time.perf_counter() - t0
+
+    # The streaming filter is causal: its output lags by resampler.delay samples
+    d = resampler.delay
+    edge = 2 * d  # ignore start/end of the whole signal (both methods differ there)
+    streaming_err = np.abs(streamed[d:].astype(np.int32) - reference[:len(streamed) - d])[edge:-edge]
+    per_chunk_err = np.abs(per_chunk.astype(np.int32) - reference)[edge:-edge]
+
+    logger.info(f"{len(chunks)} chunks of {args.chunk_ms:.0f} ms, {args.seconds:.1f}s of audio")
+    logger.info(f"Per-chunk resample_poly: max error {per_chunk_err.max():6d}, "
+                f"{per_chunk_sec / len(chunks) * 1e6:7.1f} us/chunk")
+    logger.info(f"StreamingResampler:      max error {streaming_err.max():6d}, "
+                f"{streaming_sec / len(chunks) * 1e6:7.1f} us/chunk "
+                f"(delay {d / 48:.2f} ms)")
+
+    # The last d samples are still in the filter: flush() pushes them out
+    tail = np.frombuffer(resampler.flush(), dtype=np.int16)
+    full = np.concatenate([streamed, tail])
+    end_err = np.abs(full[d:].astype(np.int32) - reference[:len(full) - d])[-2 * edge:]
+    logger.info(f"Flushed tail: {len(tail)} samples, output {len(full)} samples "
+                f"for {len(signal)} input, max error at the end {end_err.max()}")
+
+    failed = False
+    if streaming_err.max() > 2:
+        logger.error("FAIL: streaming output deviates from whole-signal resampling")
+        failed = True
+    if len(tail) != d or len(full) - d != len(reference):
+        logger.error("FAIL: flush() did not return the samples held in the filter")
+        failed = True
+    if end_err.max() > 2:
+        logger.error("FAIL: flushed tail deviates from whole-signal resampling")
+        failed = True
+    if failed:
+        raise SystemExit(1)
+    logger.info("PASS: streaming output matches whole-signal resampling")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Standalone test: SourceClock (source PTS -> wall-clock capture time).
+
+Usage:
+    cd video_chat
+    python -m scripts.test_source_clock
+    python -m scripts.test_source_clock --frames 2000 --seed 3
+
+No model, GPU or video source needed. A synthetic 25 FPS source is fed to
+SourceClock with jittered arrival times, a decode stall, a file loop (PTS
+back to 0), a forward PTS jump and a source clock running slow. Checks:
+
+1. Anchoring: frames map to pts + the smallest arrival delay; frames that
+   arrive late after a stall keep their true capture time.
+2. Re-anchoring: after a PTS jump (backwards, or forward beyond
+   JUMP_THRESHOLD) the mapping follows the new timeline at once.
+3. Drift: the offset follows a slow source clock at most DRIFT per second.
+4. Guarantees: mapped times never go backwards and are never in the future
+   (later than arrival), including frames without PTS.
+"""
+
+import argparse
+import logging
+
+import numpy as np
+
+from app.frame_capture import SourceClock
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+logger = logging.getLogger(__name__)
+
+FPS = 25.0
+BASE_DELAY = 0.2  # minimum transport delay of the synthetic source
+
+
+def run(clock: SourceClock, frames: list[tuple]) -> list[float]:
+    return [clock.to_wall(pts, arrival) for pts, arrival in frames]
+
+
+def check_monotonic(name: str, frames: list[tuple], walls: list[float]) -> bool:
+    ok = True
+    if any(b < a for a, b in zip(walls, walls[1:])):
+        logger.error(f"FAIL {name}: mapped time went backwards")
+        ok = False
+    if any(w > arrival + 1e-9 for (_, arrival), w in zip(frames, walls)):
+        logger.error(f"FAIL {name}: mapped time later than arrival")
+        ok = False
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test SourceClock")
+    parser.add_argument("--frames", type=int, default=1000, help="Frames per scenario. Default: 1000")
+    parser.add_argument("--seed", type=int, default=0, help="Jitter seed. Default: 0")
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+    start = 1000.0  # wall time of the first frame's capture
+    n = args.frames
+    ok = True
+
+    # 1. Jitter + a 1.5 s decode stall: late frames keep their capture time
+    pts = np.arange(n) / FPS
+    arrival = start + pts + BASE_DELAY + rng.exponential(0.03, n)
+    arrival[0] = start + BASE_DELAY  # one frame with the minimum delay
+    stall = slice(n // 2, n // 2 + int(1.5 * FPS))
+    arrival[stall] = arrival[stall.stop]  # stalled frames all arrive at once
+    frames = list(zip(pts.tolist(), arrival.tolist()))
+    walls = np.array(run(SourceClock(), frames))
+    err = np.abs(walls - (start + pts + BASE_DELAY))
+    logger.info(f"Jitter + stall: max error {err.max() * 1000:.1f} ms "
+                f"(stalled frames {err[stall].max() * 1000:.1f} ms)")
+    # The offset may creep up by DRIFT per second between minimum-delay frames
+    if err.max() > 0.05:
+        logger.error("FAIL jitter: mapped times are off the capture times")
+        ok = False
+    ok &= check_monotonic("jitter", frames, walls.tolist())
+
+    # 2. File loop (PTS back to 0) and a forward jump beyond JUMP_THRESHOLD
+    clock = SourceClock()
+    first = [(p, start + p + BASE_DELAY) for p in (np.arange(n // 2) / FPS).tolist()]
+    loop_at = first[-1][1] + 1 / FPS
+    looped = [(p, loop_at + p) for p in (np.arange(n // 4) / FPS).tolist()]
+    jump_at = looped[-1][1] + 1 / FPS
+    jumped = [(100.0 + p, jump_at + p) for p in (np.arange(n // 4) / FPS).tolist()]
+    frames = first + looped + jumped
+    walls = run(clock, frames)
+    loop_err = abs(walls[len(first) + 1] - looped[1][1])
+    jump_err = abs(walls[len(first) + len(looped) + 1] - jumped[1][1])
+    logger.info(f"Re-anchor: {loop_err * 1000:.1f} ms after a loop, "
+                f"{jump_err * 1000:.1f} ms after a {100 - looped[-1][0]:.0f}s PTS jump")
+    if loop_err > 0.01 or jump_err > 0.01:
+        logger.error("FAIL re-anchor: mapping did not follow the new timeline")
+        ok = False
+    ok &= check_monotonic("re-anchor", frames, walls)
+
+    # 3. Source clock 0.5% slow: arrival delay grows by 5 ms per second
+    slow = 0.005
+    pts = np.arange(n) / FPS
+    arrival = start + pts * (1 + slow) + BASE_DELAY
+    frames = list(zip(pts.tolist(), arrival.tolist()))
+    walls = np.array(run(SourceClock(), frames))
+    lag = arrival[-1] - walls[-1]
+    logger.info(f"Slow source: mapped time {lag * 1000:.1f} ms behind arrival "
+                f"after {pts[-1]:.0f}s (source clock adds {slow * pts[-1] * 1000:.0f} ms)")
+    if lag > 0.01:
+        logger.error("FAIL drift: offset did not follow the slow source clock")
+        ok = False
+    ok &= check_monotonic("drift", frames, walls.tolist())
+
+    # 4. Frames without PTS, mixed in: arrival time, still monotonic
+    clock = SourceClock()
+    frames = [(p if i % 3 else None, start + p + BASE_DELAY + (0.0 if i % 3 else 0.03))
+              for i, p in enumerate((np.arange(n) / FPS).tolist())]
+    ok &= check_monotonic("no pts", frames, run(clock, frames))
+
+    if not ok:
+        raise SystemExit(1)
+    logger.info("PASS")
+
+
+if __name__ == "__main__":
+    main()
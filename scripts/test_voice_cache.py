@@ -0,0 +1,97 @@
+"""Standalone test: vocoder voice cache files (app/voice_cache.py).
+
+Usage:
+    cd video_chat
+    python -m scripts.test_voice_cache
+
+Needs torch (CPU is enough), no model or GPU. A cache shaped like the
+vocoder's token2wav_cache (nested dicts, lists and tuples of tensors) goes
+through save_voice_cache() / load_voice_cache(). Checks:
+
+1. Round trip: structure, container types, dtypes and values come back
+   unchanged, through torch.load(weights_only=True).
+2. Non-tensor content (numbers, numpy arrays, objects) is refused: nothing
+   is written, instead of a file that could never load.
+3. Files that are not a flat dict of tensors (e.g. a cache saved as-is by
+   an older version) raise, so the voice is recomputed.
+"""
+
+import logging
+import os
+import tempfile
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def same(a, b) -> bool:
+    """Equal structure, container types and tensors."""
+    import torch
+
+    if isinstance(a, torch.Tensor):
+        return (isinstance(b, torch.Tensor) and a.dtype == b.dtype
+                and a.shape == b.shape and torch.equal(a, b))
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(same(a[k], b[k]) for k in a)
+    return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+
+
+def main():
+    try:
+        import torch
+    except ImportError:
+        logger.warning("SKIP: torch is not installed")
+        return
+    from app.voice_cache import load_voice_cache, save_voice_cache
+
+    ok = True
+    cache = {
+        "speaker_embedding": torch.randn(1, 192),
+        "prompt_tokens": torch.randint(0, 6561, (1, 87)),
+        "prompt_mels": torch.randn(1, 174, 80, dtype=torch.float16),
+        "flow_cache": {"conformer": [torch.randn(2, 4, 8), torch.randn(2, 4, 8)], "estimator": []},
+        "hift_cache": (torch.zeros(1, 80, 3), {"source": torch.randn(1, 1, 480)}),
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        # 1. Round trip
+        path = os.path.join(tmp, "voices", "voice.pt")
+        if not save_voice_cache(cache, path):
+            logger.error("FAIL round trip: an all-tensor cache was refused")
+            ok = False
+        else:
+            loaded = load_voice_cache(path, "cpu")
+            logger.info(f"Round trip: {len(torch.load(path, weights_only=True))} tensors, "
+                        f"{os.path.getsize(path) / 1024:.0f} KB")
+            if not same(cache, loaded):
+                logger.error("FAIL round trip: loaded cache differs")
+                ok = False
+
+        # 2. Non-tensor content
+        for name, bad in (("number", {"length": 87}), ("numpy array", {"mel": np.zeros(3)}),
+                          ("object", [torch.zeros(1), object()]), ("int key", {0: torch.zeros(1)})):
+            path = os.path.join(tmp, f"bad-{name.replace(' ', '-')}.pt")
+            if save_voice_cache(bad, path) or os.path.exists(path):
+                logger.error(f"FAIL non-tensor: cache with a {name} was saved")
+                ok = False
+
+        # 3. Files in another format
+        path = os.path.join(tmp, "old.pt")
+        torch.save({"prompt_tokens": torch.zeros(3), "meta": {"length": 3}}, path)
+        try:
+            load_voice_cache(path, "cpu")
+            logger.error("FAIL old format: loaded a file that is not a flat dict of tensors")
+            ok = False
+        except Exception as e:
+            logger.info(f"Old format rejected: {e}")
+
+    if not ok:
+        raise SystemExit(1)
+    logger.info("PASS")
+
+
+if __name__ == "__main__":
+    main()